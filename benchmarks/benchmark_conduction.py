@@ -0,0 +1,96 @@
+"""Benchmark the annual throughput of the conduction solvers.
+
+Run with sitka installed (``pip install -e .``)::
+
+    python benchmarks/benchmark_conduction.py
+
+A 200 mm concrete wall is run for a year of 15 minute time steps with the
+outside temperature as a daily sine wave and a constant zone air
+temperature. The explicit solver uses 5 nodes, the finest grid that is
+stable at this time step, the implicit solvers are also run on 50 nodes.
+"""
+import contextlib
+import io
+import time as timer
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from sitka.io.time import Time
+from sitka.calculations.conduction import FiniteDifferenceMethod1D, BatchFiniteDifferenceMethod1D, ConductionTransferFunction, FrequencyDomainConduction
+from sitka.components.construction import Material, Construction
+
+
+def build_wall(time, number_of_nodes):
+    # 200 mm concrete with the discretization constant chosen for the number of nodes
+    concrete = Material('concrete', 0.2, 1.4, 2100, 1000)
+    space_discretization_constant = (concrete.thickness/number_of_nodes)**2/(concrete.diffusivity*time.time_step)*1.001
+    construction = Construction('concrete wall', [concrete], 0.04, 0.13, space_discretization_constant)
+    discretization = construction.get_discretization(time.time_step)
+    surface = SimpleNamespace(
+        layers=discretization.layers,
+        thickness=discretization.thickness,
+        thermal_resistance_array=discretization.thermal_resistance_array,
+        thermal_capacitance_array=discretization.thermal_capacitance_array,
+        weather=SimpleNamespace(dry_bulb_temperature=pd.Series(10 + 10*np.sin(np.linspace(0, 365*2*np.pi, time.length)))),
+    )
+    zone_air = SimpleNamespace(
+        initial_zone_air_temperature=21.0,
+        zone_air_temperature=pd.Series(np.full(time.length, 21.0)),
+    )
+    return surface, zone_air
+
+
+def run_annual(time, solver):
+    start = timer.perf_counter()
+    for time_index in range(time.length):
+        solver.run_solver(0, time_index)
+    return timer.perf_counter() - start
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        time = Time(year=2021, time_steps_per_hour=4)
+    print('Time steps: %d (4 per hour)' % time.length)
+    for scheme, number_of_nodes in [('explicit', 5), ('implicit', 5), ('crank_nicolson', 5), ('implicit', 50), ('crank_nicolson', 50)]:
+        surface, zone_air = build_wall(time, number_of_nodes)
+        solver = FiniteDifferenceMethod1D(time, surface, zone_air, scheme=scheme)
+        seconds = run_annual(time, solver)
+        print('  %-14s %4d nodes %8.2f s %12.0f steps/s' % (scheme, number_of_nodes, seconds, time.length/seconds))
+
+    for number_of_nodes in [5, 50]:
+        surface, zone_air = build_wall(time, number_of_nodes)
+        start = timer.perf_counter()
+        ctf = ConductionTransferFunction(surface.thermal_resistance_array, surface.thermal_capacitance_array, time.time_step)
+        ctf.calculate_heat_flux(surface.weather.dry_bulb_temperature, zone_air.zone_air_temperature)
+        seconds = timer.perf_counter() - start
+        print('  %-14s %4d nodes %8.2f s %12.0f steps/s (%d modes)' % ('ctf', number_of_nodes, seconds, time.length/seconds, ctf.number_of_modes))
+
+    # Many surfaces sharing one weather file and zone, over the first month
+    steps = 31*24*4
+    for number_of_surfaces in [1000]:
+        surface, zone_air = build_wall(time, 10)
+        surfaces = [surface]*number_of_surfaces
+        solver = BatchFiniteDifferenceMethod1D(time, surfaces, zone_air, scheme='implicit')
+        start = timer.perf_counter()
+        for time_index in range(steps):
+            solver.run_solver(0, time_index)
+        seconds = timer.perf_counter() - start
+        print('  %-14s %4d nodes %8.2f s %12.0f surface-steps/s (%d surfaces)' % (
+            'batch implicit', 10, seconds, number_of_surfaces*steps/seconds, number_of_surfaces))
+
+    # Steady periodic annual screening of many assemblies at once
+    for number_of_surfaces in [1000]:
+        surfaces = [build_wall(time, number_of_nodes)[0] for number_of_nodes in np.arange(number_of_surfaces) % 10 + 3]
+        start = timer.perf_counter()
+        solver = FrequencyDomainConduction(time, surfaces)
+        solver.calculate_heat_flux(surfaces[0].weather.dry_bulb_temperature, zone_air.zone_air_temperature)
+        seconds = timer.perf_counter() - start
+        print('  %-14s %4s nodes %8.2f s %12.0f surface-steps/s (%d surfaces)' % (
+            'fft', '3-12', seconds, number_of_surfaces*time.length/seconds, number_of_surfaces))
+
+
+if __name__ == '__main__':
+    main()
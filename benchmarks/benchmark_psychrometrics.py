@@ -0,0 +1,72 @@
+"""Benchmark the exact and table psychrometric evaluations on a weather year.
+
+Run with sitka installed (``pip install -e .``)::
+
+    python benchmarks/benchmark_psychrometrics.py [weather.epw]
+
+The dry bulb temperature, relative humidity and pressure are read from the
+EPW file when one is given, otherwise a synthetic year of 15 minute time
+steps with daily and annual cycles at standard pressure is used. The table
+errors are the largest differences from the exact evaluation over the year:
+the Hyland-Wexler equations and the Newton solution of the psychrometric
+equation for the wet bulb temperature.
+"""
+import contextlib
+import io
+import sys
+import time as timer
+
+import numpy as np
+
+from sitka.io.time import Time
+from sitka.io.weather import EPW
+from sitka.calculations.fluids import (
+    calculate_saturation_pressure, calculate_humidity_ratio_from_relative_humidity, solve_wet_bulb_temperature,
+    get_saturation_pressure_table, get_wet_bulb_table,
+)
+
+
+def load_weather(filename=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        time = Time(year=2021, time_steps_per_hour=4)
+        if filename is not None:
+            weather = EPW(time, filename)
+            return (
+                np.asarray(weather.dry_bulb_temperature, dtype=float),
+                np.asarray(weather.relative_humidity, dtype=float)/100,
+                np.asarray(weather.atmospheric_pressure, dtype=float),
+            )
+    hours = np.arange(time.length)/4
+    dry_bulb_temperature = 12 - 15*np.cos(2*np.pi*hours/8760) + 6*np.sin(2*np.pi*(hours - 9)/24)
+    relative_humidity = np.clip(0.6 - 0.25*np.sin(2*np.pi*(hours - 9)/24), 0.05, 1.0)
+    return dry_bulb_temperature, relative_humidity, np.full(time.length, 101325.0)
+
+
+def run(function, *args, repeat=20):
+    start = timer.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return result, (timer.perf_counter() - start)/repeat
+
+
+def main():
+    filename = sys.argv[1] if len(sys.argv) > 1 else None
+    dry_bulb_temperature, relative_humidity, pressure = load_weather(filename)
+    length = len(dry_bulb_temperature)
+    print('Weather: %s, %d time steps' % (filename or 'synthetic year', length))
+
+    saturation_pressure_table = get_saturation_pressure_table()
+    exact, exact_seconds = run(calculate_saturation_pressure, dry_bulb_temperature)
+    table, table_seconds = run(saturation_pressure_table.calculate_saturation_pressure, dry_bulb_temperature)
+    print('  %-22s exact %12.0f values/s  table %12.0f values/s  max relative error %.1e' % (
+        'saturation pressure', length/exact_seconds, length/table_seconds, np.max(np.abs(table/exact - 1))))
+
+    wet_bulb_table = get_wet_bulb_table()
+    humidity_ratio = calculate_humidity_ratio_from_relative_humidity(dry_bulb_temperature, relative_humidity, pressure)
+    (exact, converged), exact_seconds = run(solve_wet_bulb_temperature, dry_bulb_temperature, humidity_ratio, pressure)
+    table, table_seconds = run(wet_bulb_table.interpolate, dry_bulb_temperature, relative_humidity, pressure)
+    print('  %-22s exact %12.0f values/s  table %12.0f values/s  max error %.1e C (%d not converged)' % (
+        'wet bulb temperature', length/exact_seconds, length/table_seconds, np.max(np.abs(table - exact)), np.sum(~converged)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark the speed and accuracy of the solar position algorithms.
+
+Run with sitka installed (``pip install -e .``)::
+
+    python benchmarks/benchmark_solar_position.py
+
+The 'noaa' algorithm is used as the reference for the accuracy of the 'fast'
+algorithm. Errors are reported for time steps where the sun is above the
+horizon in both algorithms.
+"""
+import contextlib
+import io
+import timeit
+
+import numpy as np
+
+from sitka.io.time import Time
+from sitka.components.site import Site
+from sitka.calculations.solar import SolarAngles, SOLAR_POSITION_ALGORITHMS
+
+
+def build_solar_angles(time, site, algorithm):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SolarAngles(time, site, algorithm=algorithm)
+
+
+def main(repeat=5):
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    for time_steps_per_hour in [1, 4, 60]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            time = Time(year=2021, time_steps_per_hour=time_steps_per_hour)
+
+        print('Time steps: %d (%d per hour)' % (time.length, time_steps_per_hour))
+        results = {}
+        for algorithm in SOLAR_POSITION_ALGORITHMS:
+            seconds = min(timeit.repeat(
+                lambda: build_solar_angles(time, site, algorithm), number=1, repeat=repeat
+            ))
+            results[algorithm] = build_solar_angles(time, site, algorithm)
+            print('  %-6s %8.1f ms %12.0f steps/s' % (algorithm, 1000*seconds, time.length/seconds))
+
+        fast = results['fast']
+        reference = results['noaa']
+        sun_up = (fast.sun_up > 0) & (reference.sun_up > 0)
+        altitude_error = np.abs(fast.solar_altitude - reference.solar_altitude)[sun_up]
+        azimuth_error = np.abs(fast.solar_azimuth - reference.solar_azimuth)[sun_up]
+        print('  fast altitude error [deg]: mean %.2f, max %.2f' % (altitude_error.mean(), altitude_error.max()))
+        print('  fast azimuth error [deg]:  mean %.2f, max %.2f' % (azimuth_error.mean(), azimuth_error.max()))
+
+
+if __name__ == '__main__':
+    main()
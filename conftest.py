@@ -0,0 +1,63 @@
+"""Shared fixtures of the sitka tests.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _build_surface(time, thermal_resistance_array, thermal_capacitance_array, thickness, layers=None):
+    # Outside temperature as a daily sine wave between 0 and 20 C, zone air at 21 C
+    number_of_nodes = len(thermal_capacitance_array)
+    weather = SimpleNamespace(dry_bulb_temperature=pd.Series(10 + 10*np.sin(np.linspace(0, 365*2*np.pi, time.length))))
+    surface = SimpleNamespace(
+        layers=[None]*number_of_nodes if layers is None else layers,
+        thickness=thickness,
+        thermal_resistance_array=thermal_resistance_array,
+        thermal_capacitance_array=thermal_capacitance_array,
+        weather=weather,
+    )
+    zone_air = SimpleNamespace(
+        initial_zone_air_temperature=21.0,
+        zone_air_temperature=pd.Series(np.full(time.length, 21.0)),
+    )
+    return surface, zone_air
+
+
+@pytest.fixture
+def build_wall():
+    """
+    Factory of 200 mm concrete walls, k = 1.4 W/m-K and rho*cp = 2.1e6
+    J/m^3-K, with 0.04 and 0.13 m^2-K/W outside and inside films.
+
+    build_wall(time, number_of_nodes=5) returns the surface and zone air.
+    """
+    def build(time, number_of_nodes=5):
+        thickness = 0.2
+        dx = thickness/number_of_nodes
+        resistance = np.full(number_of_nodes + 1, dx/1.4)
+        resistance[[0, -1]] = dx/2/1.4 + np.array([0.04, 0.13])
+        return _build_surface(time, resistance, np.full(number_of_nodes, 2.1e6*dx), thickness)
+    return build
+
+
+@pytest.fixture
+def build_construction_wall():
+    """
+    Factory of walls from the discretization of a construction for the time
+    step.
+
+    build_construction_wall(time, construction) returns the surface and zone
+    air.
+    """
+    def build(time, construction):
+        discretization = construction.get_discretization(time.time_step)
+        return _build_surface(
+            time,
+            discretization.thermal_resistance_array,
+            discretization.thermal_capacitance_array,
+            discretization.thickness,
+            layers=discretization.layers,
+        )
+    return build
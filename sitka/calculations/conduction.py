@@ -1,14 +1,101 @@
+"""One dimensional conduction through surfaces.
+"""
 import numpy as np
 import pandas as pd
 
+from sitka.io.checkpoint import open_history_array
+from sitka.utils.time_stepping import StepDoublingController, interpolate_states
+
+# Weight of the new time step in the finite difference schemes
+FINITE_DIFFERENCE_SCHEMES = {
+    'explicit': 0.0,
+    'crank_nicolson': 0.5,
+    'implicit': 1.0,
+}
+
+# Time steps per block of the conduction transfer function recursion
+CTF_BLOCK_SIZE = 64
+
+
 class FiniteDifferenceMethod1D:
-    def __init__(self, time, surface, zone_air):
-        # Explicit solver
+    """
+    Finite difference conduction through a surface.
+
+    The explicit scheme applies the operator to the previous temperatures.
+    The implicit and Crank-Nicolson schemes are unconditionally stable: the
+    explicit part of the operator gives the right hand side of a
+    tridiagonal system, which is solved with the Thomas algorithm using LU
+    factors calculated once for the time step and properties.
+
+    The node temperatures are held in a preallocated (time, node) array and
+    each time step is written in place, a DataFrame is only built on request
+    with get_temperature_dataframe. With a history path the array is memory
+    mapped to a .npy file, so long runs only keep the pages being written in
+    memory and can restart from a Checkpoint.
+
+    Parameters
+    ----------
+    time : Time
+    surface : HeatTransferSurface
+        Surface with layers, thickness, thermal_resistance_array (node + 1)
+        and thermal_capacitance_array (node), and the weather.
+    zone_air : ZoneAir
+        Zone air with zone_air_temperature and initial_zone_air_temperature.
+    scheme : string
+        Time stepping scheme ('explicit', 'implicit' or 'crank_nicolson'),
+        default explicit when it is stable for the surface and time step and
+        implicit otherwise.
+    history_path : string
+        Optional .npy file for a memory mapped temperature array.
+    resume : bool
+        Open the existing history file to restart from a checkpoint.
 
+    Attributes
+    ----------
+    temperature_array : array
+        Node temperatures (time, node) [C].
+    time_array : Series
+    theta : float
+        Weight of the new time step, 0 explicit, 0.5 Crank-Nicolson and 1
+        implicit.
+    lower : array
+        Coefficients of the outside neighbour of each node in the explicit
+        part of the operator.
+    diagonal : array
+        Coefficients of each node in the explicit part of the operator.
+    upper : array
+        Coefficients of the inside neighbour of each node in the explicit
+        part of the operator.
+    implicit_lower : array
+        Sub diagonal of the implicit system.
+    implicit_diagonal : array
+        Diagonal of the implicit system.
+    implicit_upper : array
+        Super diagonal of the implicit system.
+    multiplier : array
+        Elimination multipliers of the implicit system.
+    inverse_pivot : array
+        Inverse pivots of the implicit system.
+    A : array
+        Dense explicit finite difference matrix (node, node + 2), built from
+        the diagonals on request. The operator is applied to the node
+        temperatures with the outside and inside temperatures at the ends.
+    """
+    def __init__(self, time, surface, zone_air, scheme=None, history_path=None, resume=False):
         # General properties
         self.time = time
         self.surface = surface
         self.zone_air = zone_air
+        self.history_path = history_path
+        self.resume = resume
+        if scheme is None:
+            scheme = select_finite_difference_scheme(
+                surface.thermal_resistance_array, surface.thermal_capacitance_array, time.time_step
+            )
+        if scheme not in FINITE_DIFFERENCE_SCHEMES:
+            raise ValueError('Unknown finite difference scheme %s, expected one of %s' % (scheme, list(FINITE_DIFFERENCE_SCHEMES)))
+        self.scheme = scheme
+        self.theta = FINITE_DIFFERENCE_SCHEMES[scheme]
 
         # Stored variables
         self.temperature_array = None
@@ -26,11 +113,21 @@ class FiniteDifferenceMethod1D:
         self.x = np.linspace(0,1,self.Nx+2)
         self.x = self.x[1:-1]
 
-        # FD matrix
-        self.A = None
+        # FD operator diagonals
+        self.lower = None
+        self.diagonal = None
+        self.upper = None
+        self.implicit_lower = None
+        self.implicit_diagonal = None
+        self.implicit_upper = None
+        self.multiplier = None
+        self.inverse_pivot = None
         self.b = None
         self.u = None
 
+        # Boundary temperatures
+        self.outside_temperature = None
+
         # Initial methods
         self.update_calculated_values()
 
@@ -39,61 +136,1269 @@ class FiniteDifferenceMethod1D:
         self.initialize_arrays()
 
     def setup_finite_difference_matrix(self):
-        R = np.array(self.surface.thermal_resistance_array)
-        C = np.array(self.surface.thermal_capacitance_array)
-        dt = self.time.time_step
-        Nx = self.Nx
+        """
+        Calculate the three diagonals of the explicit part of the finite
+        difference operator, and the diagonals and LU factors of the
+        implicit system. The operator is shared between surfaces with the
+        same properties and time step.
 
-        A1 = dt/(R[:-1]*C)
-        A2 = 1-(dt/C)*(1/R[1:]+1/R[:-1])
-        A3 = dt/(R[1:]*C)
+        The boundary temperatures are applied in full in the explicit part.
 
+        Yields
+        ----------
+        lower : array
+        diagonal : array
+        upper : array
+        implicit_lower : array
+        implicit_diagonal : array
+        implicit_upper : array
+        multiplier : array
+        inverse_pivot : array
+        """
+        operator = get_finite_difference_operator(
+            self.surface.thermal_resistance_array, self.surface.thermal_capacitance_array, self.time.time_step, self.scheme
+        )
+        self.lower = operator.lower
+        self.diagonal = operator.diagonal
+        self.upper = operator.upper
+        self.implicit_lower = operator.implicit_lower
+        self.implicit_diagonal = operator.implicit_diagonal
+        self.implicit_upper = operator.implicit_upper
+        self.multiplier = operator.multiplier
+        self.inverse_pivot = operator.inverse_pivot
+
+    def get_finite_difference_matrix(self):
+        """
+        Build the dense finite difference matrix from the diagonals.
+
+        Returns
+        -------
+        A : array
+            Finite difference matrix (node, node + 2).
+        """
+        Nx = self.Nx
         A = np.zeros((Nx,Nx+2))
-        A[:,:-2] += np.diag(A1)
-        A[:,1:-1] += np.diag(A2)
-        A[:,2:] += np.diag(A3)
+        A[:,:-2] += np.diag(self.lower)
+        A[:,1:-1] += np.diag(self.diagonal)
+        A[:,2:] += np.diag(self.upper)
+        return A
 
-        self.A = A
+    @property
+    def A(self):
+        return self.get_finite_difference_matrix()
 
     def initialize_arrays(self):
-        #self.temperature_array = np.zeros((len(self.time.time_range),len(self.x)))
-        #self.time_array = np.zeros(len(self.time.time_range))
-
-        df = pd.DataFrame()
-        for x in self.x:
-            df[str(x)] = np.ones(self.time.length)*self.zone_air.initial_zone_air_temperature
-        #df.index = self.time.time_range
-        self.temperature_array = df
+        """
+        Preallocate the node temperatures at the initial zone air temperature
+        and the work array with the boundary temperatures.
+
+        Yields
+        ----------
+        temperature_array : array
+        time_array : Series
+        b : array
+        u : array
+        outside_temperature : array
+        """
+        shape = (self.time.length, self.Nx)
+        if self.history_path is not None:
+            self.temperature_array = open_history_array(
+                self.history_path, shape, self.zone_air.initial_zone_air_temperature, resume=self.resume
+            )
+        else:
+            self.temperature_array = np.full(shape, self.zone_air.initial_zone_air_temperature, dtype=float)
         self.time_array = pd.Series(self.time.time_range)
+        self.b = np.empty(self.Nx + 2)
+        self.u = np.empty(self.Nx)
+        self.outside_temperature = np.asarray(self.surface.weather.dry_bulb_temperature, dtype=float)
 
     def run_solver(self, iteration, time_index):
-        surface = self.surface
-        #t = self.time.time_range[start_time_step:end_time_step]
-        x = self.x
-
-        #for sim_index, time_index in enumerate(self.time_array[start_time_step:end_time_step].index):
-        #array_index = start_time_step + sim_time_step
         if time_index > 0 and iteration == 0:
-            b = np.array(self.temperature_array.loc[time_index-1])
+            b = self.temperature_array[time_index-1]
         else:
-            b = np.array(self.temperature_array.loc[time_index])
+            b = self.temperature_array[time_index]
 
         # Boundary conditions
-        inside_temperature = self.zone_air.zone_air_temperature.iloc[time_index]
-        outside_temperature = self.surface.weather.dry_bulb_temperature.iloc[time_index]
+        zone_air_temperature = self.zone_air.zone_air_temperature.values
+        inside_temperature = zone_air_temperature[time_index]
+        outside_temperature = self.outside_temperature[time_index]
+        previous_index = max(time_index-1, 0)
 
         # Solve timestep
-        self.solve_timestep(time_index, b, outside_temperature, inside_temperature)
+        self.solve_timestep(
+            time_index, b, outside_temperature, inside_temperature,
+            self.outside_temperature[previous_index], zone_air_temperature[previous_index],
+        )
+
+    def solve_timestep(self, time_index, temperature_array, outside_temperature, inside_temperature,
+                       previous_outside_temperature=None, previous_inside_temperature=None):
+        # Boundary Conditions, weighted between the previous and the new time
+        # step like the nodes (the explicit scheme uses the new time step)
+        weight = self.theta if self.theta > 0 else 1.0
+        if previous_outside_temperature is None:
+            previous_outside_temperature = outside_temperature
+        if previous_inside_temperature is None:
+            previous_inside_temperature = inside_temperature
+        b = self.b
+        b[0] = weight*outside_temperature + (1-weight)*previous_outside_temperature
+        b[1:-1] = temperature_array
+        b[-1] = weight*inside_temperature + (1-weight)*previous_inside_temperature
+
+        # Apply the 3-point stencil, storing the values in place
+        u = self.temperature_array[time_index]
+        work = self.u
+        np.multiply(self.diagonal, b[1:-1], out=u)
+        np.multiply(self.lower, b[:-2], out=work)
+        u += work
+        np.multiply(self.upper, b[2:], out=work)
+        u += work
+
+        # Solve the implicit system in place
+        if self.theta > 0:
+            solve_tridiagonal(self.multiplier, self.inverse_pivot, self.implicit_upper, u, out=u)
+
+    def get_temperature_dataframe(self):
+        """
+        Get the node temperatures as a DataFrame with a column per node.
+
+        Returns
+        -------
+        temperature_dataframe : DataFrame
+        """
+        return pd.DataFrame(self.temperature_array, columns=[str(x) for x in self.x])
+
+    def get_state(self, time_index):
+        """
+        Get the state needed to continue after a time step.
+
+        Parameters
+        ----------
+        time_index : int
+
+        Returns
+        -------
+        state : dict
+        """
+        return {'temperature': np.array(self.temperature_array[time_index])}
+
+    def set_state(self, time_index, state):
+        """
+        Restore the state after a time step.
+
+        Parameters
+        ----------
+        time_index : int
+        state : dict
+        """
+        self.temperature_array[time_index] = state['temperature']
+
+    def flush(self):
+        """
+        Write a memory mapped temperature array to disk.
+        """
+        if isinstance(self.temperature_array, np.memmap):
+            self.temperature_array.flush()
+
+
+class BatchFiniteDifferenceMethod1D:
+    """
+    Finite difference conduction through many surfaces in one time loop.
+
+    The node temperatures of all the surfaces are packed into a padded
+    (surface, node) array with per surface diagonals, so each time step is
+    one vectorized update for every surface. Padding nodes are decoupled
+    with an identity row. The boundary temperatures are gathered as arrays,
+    with the weather and zone air arrays shared between the surfaces that
+    use the same objects.
+
+    Unlike FiniteDifferenceMethod1D, later iterations of a time step are
+    solved again from the temperatures of the previous time step.
+
+    Parameters
+    ----------
+    time : Time
+    surfaces : list of HeatTransferSurface
+        Surfaces with thermal_resistance_array (node + 1),
+        thermal_capacitance_array (node) and the weather.
+    zone_air : ZoneAir or list of ZoneAir
+        Zone air of all the surfaces or of each surface.
+    scheme : string
+        Time stepping scheme ('explicit', 'implicit' or 'crank_nicolson'),
+        default explicit when it is stable for every surface and the time
+        step and implicit otherwise.
+    history : bool
+        Whether to store the node temperatures of every time step.
+    history_path : string
+        Optional .npy file for a memory mapped history, implies history.
+    resume : bool
+        Open the existing history file to restart from a checkpoint.
+
+    Attributes
+    ----------
+    number_of_nodes : array of int
+        Number of nodes of each surface.
+    temperature : array
+        Node temperatures at the last solved time step (surface, node) [C].
+    previous_temperature : array
+        Node temperatures at the previous time step (surface, node) [C].
+    temperature_array : array
+        Node temperatures (time, surface, node) [C], if history is stored.
+    outside_temperature : array
+        Outside temperatures of the distinct weather objects (weather, time) [C].
+    weather_index : array of int
+        Weather of each surface.
+    zone_index : array of int
+        Zone air of each surface.
+    theta : float
+    lower : array
+    diagonal : array
+    upper : array
+        Diagonals of the explicit part of the operator (surface, node),
+        without the boundary coefficients.
+    outside_coefficient : array
+        Coefficient of the outside temperature for the first node (surface).
+    inside_coefficient : array
+        Coefficient of the inside temperature for the last node (surface).
+    multiplier : array
+    inverse_pivot : array
+    implicit_upper : array
+        LU factors and super diagonal of the implicit system (surface, node).
+    """
+    def __init__(self, time, surfaces, zone_air, scheme=None, history=False, history_path=None, resume=False):
+        # General properties
+        self.time = time
+        self.surfaces = surfaces
+        self.zone_air = zone_air if isinstance(zone_air, (list, tuple)) else [zone_air]*len(surfaces)
+        if scheme is None:
+            schemes = [
+                select_finite_difference_scheme(surface.thermal_resistance_array, surface.thermal_capacitance_array, time.time_step)
+                for surface in surfaces
+            ]
+            scheme = 'explicit' if all(scheme == 'explicit' for scheme in schemes) else 'implicit'
+        if scheme not in FINITE_DIFFERENCE_SCHEMES:
+            raise ValueError('Unknown finite difference scheme %s, expected one of %s' % (scheme, list(FINITE_DIFFERENCE_SCHEMES)))
+        self.scheme = scheme
+        self.theta = FINITE_DIFFERENCE_SCHEMES[scheme]
+        self.history = history or history_path is not None
+        self.history_path = history_path
+        self.resume = resume
+
+        # Stored variables
+        self.number_of_nodes = None
+        self.temperature = None
+        self.previous_temperature = None
+        self.temperature_array = None
+
+        # Boundary temperatures
+        self.outside_temperature = None
+        self.weather_index = None
+        self.zone_index = None
+        self._zones = None
+
+        # FD operator diagonals
+        self.lower = None
+        self.diagonal = None
+        self.upper = None
+        self.outside_coefficient = None
+        self.inside_coefficient = None
+        self.multiplier = None
+        self.inverse_pivot = None
+        self.implicit_upper = None
+        self._rows = None
+        self._work = None
+
+        # Initial methods
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.setup_finite_difference_matrix()
+        self.setup_boundary_conditions()
+        self.initialize_arrays()
+
+    def setup_finite_difference_matrix(self):
+        """
+        Calculate the padded diagonals of the explicit part of the operator,
+        the boundary coefficients and the LU factors of the implicit system.
+
+        Yields
+        ----------
+        number_of_nodes : array of int
+        lower : array
+        diagonal : array
+        upper : array
+        outside_coefficient : array
+        inside_coefficient : array
+        multiplier : array
+        inverse_pivot : array
+        implicit_upper : array
+        """
+        dt = self.time.time_step
+        theta = self.theta
+        number_of_nodes = np.array([len(surface.thermal_capacitance_array) for surface in self.surfaces])
+        shape = (len(self.surfaces), number_of_nodes.max())
+
+        # Padding nodes are decoupled: zero conductance and unit capacitance
+        a = np.zeros(shape)
+        c = np.zeros(shape)
+        for s, surface in enumerate(self.surfaces):
+            operator = get_finite_difference_operator(
+                surface.thermal_resistance_array, surface.thermal_capacitance_array, dt, self.scheme
+            )
+            a[s, :operator.number_of_nodes] = operator.outside_ratio
+            c[s, :operator.number_of_nodes] = operator.inside_ratio
+
+        self._rows = np.arange(shape[0])
+        last = number_of_nodes - 1
+        self.number_of_nodes = number_of_nodes
+        self.outside_coefficient = a[:, 0].copy()
+        self.inside_coefficient = c[self._rows, last].copy()
+
+        self.diagonal = 1-(1-theta)*(a+c)
+        internal_a = a.copy()
+        internal_c = c.copy()
+        internal_a[:, 0] = 0
+        internal_c[self._rows, last] = 0
+        self.lower = (1-theta)*internal_a
+        self.upper = (1-theta)*internal_c
+
+        self.implicit_upper = -theta*internal_c
+        self.multiplier, self.inverse_pivot = factor_tridiagonal(-theta*internal_a, 1+theta*(a+c), self.implicit_upper)
+
+    def setup_boundary_conditions(self):
+        """
+        Share the outside temperature arrays and zone air objects between
+        surfaces.
+
+        Yields
+        ----------
+        outside_temperature : array
+        weather_index : array of int
+        zone_index : array of int
+        """
+        weather_positions = {}
+        outside_temperature = []
+        weather_index = []
+        for surface in self.surfaces:
+            key = id(surface.weather)
+            if key not in weather_positions:
+                weather_positions[key] = len(outside_temperature)
+                outside_temperature.append(np.asarray(surface.weather.dry_bulb_temperature, dtype=float))
+            weather_index.append(weather_positions[key])
+        self.outside_temperature = np.array(outside_temperature)
+        self.weather_index = np.array(weather_index)
+
+        zone_positions = {}
+        self._zones = []
+        zone_index = []
+        for zone_air in self.zone_air:
+            key = id(zone_air)
+            if key not in zone_positions:
+                zone_positions[key] = len(self._zones)
+                self._zones.append(zone_air)
+            zone_index.append(zone_positions[key])
+        self.zone_index = np.array(zone_index)
+
+    def initialize_arrays(self):
+        """
+        Set the node temperatures to the initial zone air temperatures.
+
+        Yields
+        ----------
+        temperature : array
+        previous_temperature : array
+        temperature_array : array
+        """
+        initial_temperature = np.array([zone_air.initial_zone_air_temperature for zone_air in self._zones], dtype=float)
+        self.temperature = np.repeat(initial_temperature[self.zone_index].reshape(-1, 1), self.diagonal.shape[1], axis=1)
+        self.previous_temperature = self.temperature.copy()
+        self._work = np.empty(self.temperature.shape)
+        if self.history_path is not None:
+            self.temperature_array = open_history_array(
+                self.history_path, (self.time.length,) + self.temperature.shape, resume=self.resume
+            )
+            if not self.resume:
+                self.temperature_array[:] = self.temperature
+        elif self.history:
+            self.temperature_array = np.empty((self.time.length,) + self.temperature.shape)
+            self.temperature_array[:] = self.temperature
+
+    def get_zone_air_temperature(self, time_index):
+        """
+        Get the zone air temperature of each surface for a time step.
+
+        Parameters
+        ----------
+        time_index : int
+
+        Returns
+        -------
+        zone_air_temperature : array
+        """
+        zone_air_temperature = np.fromiter(
+            (zone_air.zone_air_temperature.values[time_index] for zone_air in self._zones), float, len(self._zones)
+        )
+        return zone_air_temperature[self.zone_index]
+
+    def run_solver(self, iteration, time_index):
+        if iteration == 0:
+            self.previous_temperature[...] = self.temperature
+
+        # Boundary conditions
+        previous_index = max(time_index-1, 0)
+        outside_temperature = self.outside_temperature[self.weather_index, time_index]
+        previous_outside_temperature = self.outside_temperature[self.weather_index, previous_index]
+        inside_temperature = self.get_zone_air_temperature(time_index)
+        previous_inside_temperature = self.get_zone_air_temperature(previous_index)
+
+        # Solve timestep
+        self.solve_timestep(
+            time_index, self.previous_temperature, outside_temperature, inside_temperature,
+            previous_outside_temperature, previous_inside_temperature,
+        )
+
+    def solve_timestep(self, time_index, temperature_array, outside_temperature, inside_temperature,
+                       previous_outside_temperature=None, previous_inside_temperature=None):
+        # Boundary Conditions, weighted between the previous and the new time
+        # step like the nodes (the explicit scheme uses the new time step)
+        weight = self.theta if self.theta > 0 else 1.0
+        if previous_outside_temperature is None:
+            previous_outside_temperature = outside_temperature
+        if previous_inside_temperature is None:
+            previous_inside_temperature = inside_temperature
+        outside_temperature = weight*outside_temperature + (1-weight)*previous_outside_temperature
+        inside_temperature = weight*inside_temperature + (1-weight)*previous_inside_temperature
+
+        # Apply the 3-point stencil to every surface
+        u = self.temperature
+        work = self._work
+        np.multiply(self.diagonal, temperature_array, out=u)
+        np.multiply(self.lower[:, 1:], temperature_array[:, :-1], out=work[:, 1:])
+        u[:, 1:] += work[:, 1:]
+        np.multiply(self.upper[:, :-1], temperature_array[:, 1:], out=work[:, :-1])
+        u[:, :-1] += work[:, :-1]
+        u[:, 0] += self.outside_coefficient*outside_temperature
+        u[self._rows, self.number_of_nodes - 1] += self.inside_coefficient*inside_temperature
+
+        # Solve the implicit systems in place
+        if self.theta > 0:
+            solve_tridiagonal(self.multiplier, self.inverse_pivot, self.implicit_upper, u, out=u)
+
+        if self.history:
+            self.temperature_array[time_index] = u
+
+    def get_surface_temperature(self, surface_index, temperature=None):
+        """
+        Get the node temperatures of one surface without the padding.
+
+        Parameters
+        ----------
+        surface_index : int
+        temperature : array
+            Padded node temperatures, default the last solved time step.
+
+        Returns
+        -------
+        temperature : array
+        """
+        temperature = self.temperature if temperature is None else temperature
+        return temperature[..., surface_index, :self.number_of_nodes[surface_index]]
+
+    def get_state(self, time_index):
+        """
+        Get the state needed to continue after a time step.
+
+        Parameters
+        ----------
+        time_index : int
+
+        Returns
+        -------
+        state : dict
+        """
+        return {'temperature': self.temperature.copy()}
+
+    def set_state(self, time_index, state):
+        """
+        Restore the state after a time step.
+
+        Parameters
+        ----------
+        time_index : int
+        state : dict
+        """
+        self.temperature[...] = state['temperature']
+        self.previous_temperature[...] = state['temperature']
+        if self.history:
+            self.temperature_array[time_index] = state['temperature']
+
+    def flush(self):
+        """
+        Write a memory mapped history to disk.
+        """
+        if isinstance(self.temperature_array, np.memmap):
+            self.temperature_array.flush()
+
+
+def factor_tridiagonal(lower, diagonal, upper):
+    """
+    Calculate the LU factors of tridiagonal systems for the Thomas algorithm.
+
+    The systems are along the last axis, so a batch of systems is factored
+    together.
+
+    Parameters
+    ----------
+    lower : array
+        Sub diagonal, aligned with the rows (the first value is not used).
+    diagonal : array
+        Diagonal.
+    upper : array
+        Super diagonal, aligned with the rows (the last value is not used).
+
+    Returns
+    -------
+    multiplier : array
+        Elimination multipliers.
+    inverse_pivot : array
+        Inverse of the pivots.
+    """
+    lower, diagonal, upper = np.broadcast_arrays(lower, diagonal, upper)
+    multiplier = np.zeros(diagonal.shape)
+    pivot = np.array(diagonal, dtype=float)
+    for i in range(1, diagonal.shape[-1]):
+        multiplier[..., i] = lower[..., i]/pivot[..., i-1]
+        pivot[..., i] -= multiplier[..., i]*upper[..., i-1]
+    return multiplier, 1/pivot
+
+
+def solve_tridiagonal(multiplier, inverse_pivot, upper, rhs, out=None):
+    """
+    Solve tridiagonal systems with LU factors from factor_tridiagonal.
+
+    The loops run over the nodes on the last axis and are vectorized over
+    any leading (surface) axes.
+
+    Parameters
+    ----------
+    multiplier : array
+    inverse_pivot : array
+    upper : array
+        Super diagonal, aligned with the rows.
+    rhs : array
+        Right hand sides.
+    out : array
+        Output array, may be rhs to solve in place.
+
+    Returns
+    -------
+    solution : array
+    """
+    if out is None:
+        out = np.array(rhs, dtype=float)
+    elif out is not rhs:
+        out[...] = rhs
+    n = out.shape[-1]
+
+    # A single system is faster with Python floats than numpy scalars
+    if out.ndim == 1:
+        x = out.tolist()
+        m = multiplier.tolist()
+        p = inverse_pivot.tolist()
+        c = upper.tolist()
+        for i in range(1, n):
+            x[i] -= m[i]*x[i-1]
+        x[n-1] *= p[n-1]
+        for i in range(n-2, -1, -1):
+            x[i] = (x[i] - c[i]*x[i+1])*p[i]
+        out[:] = x
+        return out
+
+    for i in range(1, n):
+        out[..., i] -= multiplier[..., i]*out[..., i-1]
+    out[..., n-1] *= inverse_pivot[..., n-1]
+    for i in range(n-2, -1, -1):
+        out[..., i] -= upper[..., i]*out[..., i+1]
+        out[..., i] *= inverse_pivot[..., i]
+    return out
+
+
+class ConductionTransferFunction:
+    """
+    Conduction transfer functions of a surface, for the heat flux as a
+    recursive filter over the boundary temperatures.
+
+    The node network from the resistance and capacitance arrays is
+    discretized exactly for a zero order hold of the boundary temperatures
+    over each time step. The state matrix is similar to a symmetric matrix,
+    so its eigendecomposition is real and the heat fluxes are calculated
+    with the diagonal state space form, one first order recursion per mode,
+    which is stable for any network.
+
+    Modes whose pole rounds to zero at the time step (|pole| < 1e-12) decay
+    within the step, so they are quasi-steady and their steady state gains
+    are added to the direct gains. Only the remaining slow modes are kept
+    for the recursion.
+
+    The boundary temperatures are the temperatures at the ends of the
+    resistance array, the surface temperatures when the end resistances are
+    half node resistances only.
+
+    Parameters
+    ----------
+    thermal_resistance_array : array
+        Resistances between the boundaries and the nodes (node + 1) [m^2-K/W].
+    thermal_capacitance_array : array
+        Node capacitances (node) [J/m^2-K].
+    time_step : float
+        Time step [s].
+
+    Attributes
+    ----------
+    poles : array
+        Discrete time poles of the slow modes.
+    number_of_modes : int
+        Number of slow modes in the recursion.
+    modal_input : array
+        Input gains of the slow modes for the outside and inside
+        temperatures (mode, 2).
+    modal_output : array
+        Output gains of the slow modes for the inside and outside heat
+        fluxes (2, mode).
+    direct_gain : array
+        Gains of the current outside and inside temperatures for the inside
+        and outside heat fluxes, including the quasi-steady modes (2, 2).
+
+    References
+    --------
+    Seem, J. E. (1987). Modeling of heat transfer in buildings. PhD thesis,
+    University of Wisconsin-Madison.
+    """
+    def __init__(self, thermal_resistance_array, thermal_capacitance_array, time_step):
+        self.thermal_resistance_array = np.array(thermal_resistance_array, dtype=float)
+        self.thermal_capacitance_array = np.array(thermal_capacitance_array, dtype=float)
+        self.time_step = time_step
+        self.poles = None
+        self.number_of_modes = None
+        self.modal_input = None
+        self.modal_output = None
+        self.direct_gain = None
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_transfer_functions()
+
+    def calculate_transfer_functions(self):
+        """
+        Calculate the modal form of the transfer functions.
+
+        Yields
+        ----------
+        poles : array
+        number_of_modes : int
+        modal_input : array
+        modal_output : array
+        direct_gain : array
+        """
+        R = self.thermal_resistance_array
+        C = self.thermal_capacitance_array
+        n = len(C)
+
+        # Conductance matrix and input matrix of C dT/dt = K T + B u, u = (outside, inside)
+        K = np.diag(-(1/R[:-1] + 1/R[1:])) + np.diag(1/R[1:-1], 1) + np.diag(1/R[1:-1], -1)
+        B = np.zeros((n, 2))
+        B[0, 0] = 1/R[0]
+        B[-1, 1] = 1/R[-1]
+
+        # Symmetric form C^-1/2 K C^-1/2 = V diag(eigenvalues) V^T
+        scale = 1/np.sqrt(C)
+        eigenvalues, V = np.linalg.eigh(scale[:, None]*K*scale[None, :])
+        exponent = eigenvalues*self.time_step
+        poles = np.exp(exponent)
+        input_gain = np.expm1(exponent)/eigenvalues
+
+        # Modal form: states P^-1 T with P = C^-1/2 V
+        P = scale[:, None]*V
+        modal_input = input_gain[:, None]*(V.T @ (scale[:, None]*B))
+
+        # Heat flux outputs y = Cy T + Dy u, inside surface to zone and outside into the surface
+        Cy = np.zeros((2, n))
+        Cy[0, -1] = 1/R[-1]
+        Cy[1, 0] = -1/R[0]
+        Dy = np.array([[0.0, -1/R[-1]], [1/R[0], 0.0]])
+        modal_output = Cy @ P
+
+        # Quasi-steady fast modes x = modal_input @ u/(1 - pole) join the direct gains
+        fast = np.abs(poles) < 1e-12
+        Dy += modal_output[:, fast] @ (modal_input[fast]/(1 - poles[fast, None]))
+
+        self.poles = poles[~fast]
+        self.number_of_modes = int((~fast).sum())
+        self.modal_input = modal_input[~fast]
+        self.modal_output = modal_output[:, ~fast]
+        self.direct_gain = Dy
+
+    def calculate_heat_flux(self, outside_temperature, inside_temperature):
+        """
+        Calculate the heat fluxes for series of boundary temperatures, from
+        steady state at the first boundary temperatures.
+
+        The modal forcing and the outputs are products over the whole series
+        and only the mode amplitudes are a recursion over the time steps,
+        x[t] = poles*x[t-1] + modal_input @ u[t-1]. The recursion is solved
+        in blocks of time steps, each block a product with the powers of
+        the poles.
+
+        Parameters
+        ----------
+        outside_temperature : array
+            Outside boundary temperatures [C].
+        inside_temperature : array
+            Inside boundary temperatures [C].
+
+        Returns
+        -------
+        inside_heat_flux : array
+            Heat flux from the inside surface to the zone [W/m^2].
+        outside_heat_flux : array
+            Heat flux from outside into the outside surface [W/m^2].
+        """
+        temperatures = np.array([outside_temperature, inside_temperature], dtype=float)
+        length = temperatures.shape[1]
+        block = min(CTF_BLOCK_SIZE, max(length - 1, 1))
+
+        # Block transfer x[s+1+i] = poles^(i+1)*x[s] + sum over j <= i of poles^(i-j)*forcing[s+j]
+        lag = np.arange(block)[:, None] - np.arange(block)[None, :]
+        transfer = np.where(lag >= 0, self.poles[:, None, None]**np.maximum(lag, 0), 0.0)
+        powers = self.poles[:, None]**np.arange(1, block + 1)
+
+        # Mode amplitudes at steady state with the initial boundary temperatures
+        forcing = self.modal_input @ temperatures
+        amplitudes = np.empty((self.number_of_modes, length))
+        amplitudes[:, 0] = forcing[:, 0]/(1 - self.poles)
+        for start in range(0, length - 1, block):
+            size = min(block, length - 1 - start)
+            amplitudes[:, start + 1:start + 1 + size] = (
+                np.matmul(transfer[:, :size, :size], forcing[:, start:start + size, None])[:, :, 0]
+                + powers[:, :size]*amplitudes[:, start, None]
+            )
+
+        heat_flux = self.modal_output @ amplitudes + self.direct_gain @ temperatures
+        return heat_flux[0], heat_flux[1]
+
+
+class AdaptiveFiniteDifferenceMethod1D:
+    """
+    Finite difference conduction through a surface with adaptive time steps.
+
+    The time step is chosen by a StepDoublingController from the maximum
+    time step divided by powers of two, so large steps are taken in
+    quiescent periods and small steps around sharp changes of the boundary
+    temperatures. The operators of the time steps are shared through the
+    finite difference operator cache. The boundary temperatures are linearly
+    interpolated between the time steps of the Time object, and the node
+    temperatures are interpolated back onto them.
+
+    Parameters
+    ----------
+    time : Time
+    surface : HeatTransferSurface
+        Surface with thermal_resistance_array (node + 1),
+        thermal_capacitance_array (node) and the weather.
+    zone_air : ZoneAir
+        Zone air with zone_air_temperature and initial_zone_air_temperature.
+    scheme : string
+        Time stepping scheme ('implicit' or 'crank_nicolson').
+    tolerance : float
+        Largest accepted local error estimate of the node temperatures [C].
+    maximum_time_step : float
+        Largest time step, default 4 time steps of the Time object [s].
+    levels : int
+        Number of times the maximum time step can be halved.
+
+    Attributes
+    ----------
+    temperature_array : array
+        Node temperatures at the time steps of the Time object (time, node) [C].
+    step_times : array
+        Times of the adaptive steps [s].
+    step_temperature_array : array
+        Node temperatures at the adaptive steps (step, node) [C].
+    controller : StepDoublingController
+    """
+    def __init__(self, time, surface, zone_air, scheme='implicit', tolerance=0.05, maximum_time_step=None, levels=4):
+        # General properties
+        self.time = time
+        self.surface = surface
+        self.zone_air = zone_air
+        if scheme not in ('implicit', 'crank_nicolson'):
+            raise ValueError('Adaptive time steps need an implicit scheme, got %s' % scheme)
+        self.scheme = scheme
+        self.tolerance = tolerance
+        self.maximum_time_step = 4*time.time_step if maximum_time_step is None else maximum_time_step
+        self.levels = levels
+
+        # Stored variables
+        self.temperature_array = None
+        self.step_times = None
+        self.step_temperature_array = None
+        self.controller = None
+
+        # Boundary temperatures
+        self.report_times = None
+        self.outside_temperature = None
+        self.inside_temperature = None
+
+        # Initial methods
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.setup_boundary_conditions()
+
+    def setup_boundary_conditions(self):
+        """
+        Get the boundary temperatures at the end of each time step of the
+        Time object.
+
+        Yields
+        ----------
+        report_times : array
+        outside_temperature : array
+        inside_temperature : array
+        """
+        self.report_times = self.time.time_step*np.arange(1, self.time.length + 1)
+        self.outside_temperature = np.asarray(self.surface.weather.dry_bulb_temperature, dtype=float)
+        self.inside_temperature = np.asarray(self.zone_air.zone_air_temperature, dtype=float)
+
+    def get_boundary_temperature(self, time):
+        """
+        Interpolate the boundary temperatures at a time.
+
+        Parameters
+        ----------
+        time : float
+            Time from the start of the simulation [s].
+
+        Returns
+        -------
+        outside_temperature : float
+        inside_temperature : float
+        """
+        return (
+            np.interp(time, self.report_times, self.outside_temperature),
+            np.interp(time, self.report_times, self.inside_temperature),
+        )
+
+    def step(self, temperature, time, time_step):
+        """
+        Advance the node temperatures by a time step.
+
+        Parameters
+        ----------
+        temperature : array
+        time : float
+            Time at the start of the step [s].
+        time_step : float
+
+        Returns
+        -------
+        temperature : array
+        """
+        operator = get_finite_difference_operator(
+            self.surface.thermal_resistance_array, self.surface.thermal_capacitance_array, time_step, self.scheme
+        )
+        previous_outside_temperature, previous_inside_temperature = self.get_boundary_temperature(time)
+        outside_temperature, inside_temperature = self.get_boundary_temperature(time + time_step)
+        return operator.step(
+            temperature, outside_temperature, inside_temperature,
+            previous_outside_temperature, previous_inside_temperature,
+        )
+
+    def run_solver(self):
+        """
+        Solve all the time steps and interpolate the node temperatures onto
+        the time steps of the Time object.
+
+        Yields
+        ----------
+        controller : StepDoublingController
+        step_times : array
+        step_temperature_array : array
+        temperature_array : array
+        """
+        order = 2 if self.scheme == 'crank_nicolson' else 1
+        self.controller = StepDoublingController(self.maximum_time_step, self.levels, self.tolerance, order)
+        initial_temperature = np.full(len(self.surface.thermal_capacitance_array), self.zone_air.initial_zone_air_temperature, dtype=float)
+        self.step_times, self.step_temperature_array = self.controller.integrate(
+            self.step, initial_temperature, 0.0, self.report_times[-1]
+        )
+        self.temperature_array = interpolate_states(self.step_times, self.step_temperature_array, self.report_times)
+
+
+class FrequencyDomainConduction:
+    """
+    Steady periodic conduction through linear surfaces in the frequency
+    domain.
+
+    The boundary temperature series are taken as one period (a year for an
+    annual run) and transformed with the FFT. Each frequency is solved with
+    the transmission (ABCD) matrix of the resistance-capacitance chain of
+    the surface, and the heat fluxes are transformed back, so the whole
+    period costs O(N log N) per surface. Surfaces are padded to the same
+    number of nodes with zero resistances and capacitances, which leave the
+    chain unchanged.
+
+    Parameters
+    ----------
+    time : Time
+    surfaces : list of HeatTransferSurface
+        Surfaces with thermal_resistance_array (node + 1) and
+        thermal_capacitance_array (node).
+
+    Attributes
+    ----------
+    frequency : array
+        Angular frequencies of the FFT [rad/s].
+    A : array
+    B : array
+    C : array
+    D : array
+        Transmission matrix of each surface, relating the outside
+        temperature and heat flux to the inside temperature and heat flux
+        (surface, frequency).
+    """
+    def __init__(self, time, surfaces):
+        self.time = time
+        self.surfaces = surfaces
+        self.frequency = None
+        self.A = None
+        self.B = None
+        self.C = None
+        self.D = None
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_transmission_matrix()
+
+    def calculate_transmission_matrix(self):
+        """
+        Calculate the transmission matrix of each surface for each frequency.
+
+        Yields
+        ----------
+        frequency : array
+        A : array
+        B : array
+        C : array
+        D : array
+
+        References
+        --------
+        Carslaw, H. S. and Jaeger, J. C. (1959). Conduction of Heat in
+        Solids. Oxford University Press.
+        """
+        number_of_nodes = max(len(surface.thermal_capacitance_array) for surface in self.surfaces)
+        R = np.zeros((len(self.surfaces), number_of_nodes + 1))
+        C = np.zeros((len(self.surfaces), number_of_nodes))
+        for s, surface in enumerate(self.surfaces):
+            n = len(surface.thermal_capacitance_array)
+            R[s, :n + 1] = surface.thermal_resistance_array
+            C[s, :n] = surface.thermal_capacitance_array
+
+        self.frequency = 2*np.pi*np.fft.rfftfreq(self.time.length, self.time.time_step)
+        shape = (len(self.surfaces), len(self.frequency))
+        A = np.ones(shape, dtype=complex)
+        B = np.zeros(shape, dtype=complex)
+        C_ = np.zeros(shape, dtype=complex)
+        D = np.ones(shape, dtype=complex)
+
+        # Chain of resistance [[1, R], [0, 1]] and capacitance [[1, 0], [jwC, 1]] sections
+        for i in range(number_of_nodes + 1):
+            resistance = R[:, i:i+1]
+            B = B + A*resistance
+            D = D + C_*resistance
+            if i < number_of_nodes:
+                admittance = 1j*self.frequency*C[:, i:i+1]
+                A = A + B*admittance
+                C_ = C_ + D*admittance
+
+        self.A = A
+        self.B = B
+        self.C = C_
+        self.D = D
+
+    def calculate_heat_flux(self, outside_temperature, inside_temperature):
+        """
+        Calculate the steady periodic heat fluxes for boundary temperature
+        series over one period.
+
+        Parameters
+        ----------
+        outside_temperature : array
+            Outside boundary temperatures, such as the sol-air temperature,
+            (time) or (surface, time) [C].
+        inside_temperature : array
+            Inside boundary temperatures, (time) or (surface, time) [C].
+
+        Returns
+        -------
+        inside_heat_flux : array
+            Heat flux from the inside boundary to the zone (surface, time) [W/m^2].
+        outside_heat_flux : array
+            Heat flux from outside into the outside boundary (surface, time) [W/m^2].
+        """
+        length = self.time.length
+        outside_spectrum = np.fft.rfft(np.asarray(outside_temperature, dtype=float), axis=-1)
+        inside_spectrum = np.fft.rfft(np.asarray(inside_temperature, dtype=float), axis=-1)
+        inside_flux_spectrum = (outside_spectrum - self.A*inside_spectrum)/self.B
+        outside_flux_spectrum = self.C*inside_spectrum + self.D*inside_flux_spectrum
+        return np.fft.irfft(inside_flux_spectrum, n=length, axis=-1), np.fft.irfft(outside_flux_spectrum, n=length, axis=-1)
+
+
+# Largest number of cached conduction transfer functions, the oldest is dropped first
+TRANSFER_FUNCTION_CACHE_SIZE = 256
+_TRANSFER_FUNCTION_CACHE = {}
+
+
+def get_conduction_transfer_function(thermal_resistance_array, thermal_capacitance_array, time_step):
+    """
+    Get the conduction transfer functions of a surface, calculated once per
+    distinct resistance array, capacitance array and time step. At most
+    TRANSFER_FUNCTION_CACHE_SIZE are kept.
+
+    Parameters
+    ----------
+    thermal_resistance_array : array
+    thermal_capacitance_array : array
+    time_step : float
+
+    Returns
+    -------
+    conduction_transfer_function : ConductionTransferFunction
+    """
+    R = np.ascontiguousarray(thermal_resistance_array, dtype=float)
+    C = np.ascontiguousarray(thermal_capacitance_array, dtype=float)
+    key = (R.tobytes(), C.tobytes(), float(time_step))
+    if key not in _TRANSFER_FUNCTION_CACHE:
+        if len(_TRANSFER_FUNCTION_CACHE) >= TRANSFER_FUNCTION_CACHE_SIZE:
+            del _TRANSFER_FUNCTION_CACHE[next(iter(_TRANSFER_FUNCTION_CACHE))]
+        _TRANSFER_FUNCTION_CACHE[key] = ConductionTransferFunction(R, C, time_step)
+    return _TRANSFER_FUNCTION_CACHE[key]
+
+
+def clear_conduction_transfer_function_cache():
+    """
+    Remove all cached conduction transfer functions.
+    """
+    _TRANSFER_FUNCTION_CACHE.clear()
+
+
+class FiniteDifferenceOperator:
+    """
+    Finite difference operator of a surface for a time step and scheme.
+
+    Parameters
+    ----------
+    thermal_resistance_array : array
+        Resistances between the boundaries and the nodes (node + 1) [m^2-K/W].
+    thermal_capacitance_array : array
+        Node capacitances (node) [J/m^2-K].
+    time_step : float
+        Time step [s].
+    scheme : string
+        Time stepping scheme ('explicit', 'implicit' or 'crank_nicolson').
+
+    Attributes
+    ----------
+    number_of_nodes : int
+    theta : float
+        Weight of the new time step.
+    outside_ratio : array
+        Time step over the resistance to the outside neighbour and the
+        capacitance of each node.
+    inside_ratio : array
+        Time step over the resistance to the inside neighbour and the
+        capacitance of each node.
+    lower : array
+    diagonal : array
+    upper : array
+        Diagonals of the explicit part of the operator.
+    implicit_lower : array
+    implicit_diagonal : array
+    implicit_upper : array
+        Diagonals of the implicit system.
+    multiplier : array
+    inverse_pivot : array
+        LU factors of the implicit system.
+    """
+    def __init__(self, thermal_resistance_array, thermal_capacitance_array, time_step, scheme='explicit'):
+        if scheme not in FINITE_DIFFERENCE_SCHEMES:
+            raise ValueError('Unknown finite difference scheme %s, expected one of %s' % (scheme, list(FINITE_DIFFERENCE_SCHEMES)))
+        self.thermal_resistance_array = np.asarray(thermal_resistance_array, dtype=float)
+        self.thermal_capacitance_array = np.asarray(thermal_capacitance_array, dtype=float)
+        self.time_step = time_step
+        self.scheme = scheme
+        self.theta = FINITE_DIFFERENCE_SCHEMES[scheme]
+        self.number_of_nodes = len(self.thermal_capacitance_array)
+
+        self.outside_ratio = None
+        self.inside_ratio = None
+        self.lower = None
+        self.diagonal = None
+        self.upper = None
+        self.implicit_lower = None
+        self.implicit_diagonal = None
+        self.implicit_upper = None
+        self.multiplier = None
+        self.inverse_pivot = None
+
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_diagonals()
+
+    def calculate_diagonals(self):
+        """
+        Calculate the diagonals of the explicit part of the operator and the
+        diagonals and LU factors of the implicit system. The arrays are
+        read only as they are shared between surfaces.
+
+        Yields
+        ----------
+        outside_ratio : array
+        inside_ratio : array
+        lower : array
+        diagonal : array
+        upper : array
+        implicit_lower : array
+        implicit_diagonal : array
+        implicit_upper : array
+        multiplier : array
+        inverse_pivot : array
+        """
+        R = self.thermal_resistance_array
+        C = self.thermal_capacitance_array
+        dt = self.time_step
+        theta = self.theta
+
+        a = dt/(R[:-1]*C)
+        c = dt/(R[1:]*C)
+        self.outside_ratio = a
+        self.inside_ratio = c
+
+        self.lower = (1-theta)*a
+        self.diagonal = 1-(1-theta)*(a+c)
+        self.upper = (1-theta)*c
+        self.lower[0] = a[0]
+        self.upper[-1] = c[-1]
+
+        self.implicit_lower = -theta*a
+        self.implicit_diagonal = 1+theta*(a+c)
+        self.implicit_upper = -theta*c
+        self.multiplier, self.inverse_pivot = factor_tridiagonal(self.implicit_lower, self.implicit_diagonal, self.implicit_upper)
+
+        for array in (self.outside_ratio, self.inside_ratio, self.lower, self.diagonal, self.upper,
+                      self.implicit_lower, self.implicit_diagonal, self.implicit_upper,
+                      self.multiplier, self.inverse_pivot):
+            array.flags.writeable = False
+
+    def step(self, temperature, outside_temperature, inside_temperature,
+             previous_outside_temperature, previous_inside_temperature):
+        """
+        Advance node temperatures by the time step of the operator.
+
+        Parameters
+        ----------
+        temperature : array
+            Node temperatures at the start of the time step [C].
+        outside_temperature : float
+        inside_temperature : float
+            Boundary temperatures at the end of the time step [C].
+        previous_outside_temperature : float
+        previous_inside_temperature : float
+            Boundary temperatures at the start of the time step [C].
+
+        Returns
+        -------
+        temperature : array
+            Node temperatures at the end of the time step [C].
+        """
+        weight = self.theta if self.theta > 0 else 1.0
+        outside_temperature = weight*outside_temperature + (1-weight)*previous_outside_temperature
+        inside_temperature = weight*inside_temperature + (1-weight)*previous_inside_temperature
+
+        u = self.diagonal*temperature
+        u[1:] += self.lower[1:]*temperature[:-1]
+        u[:-1] += self.upper[:-1]*temperature[1:]
+        u[0] += self.lower[0]*outside_temperature
+        u[-1] += self.upper[-1]*inside_temperature
+        if self.theta > 0:
+            solve_tridiagonal(self.multiplier, self.inverse_pivot, self.implicit_upper, u, out=u)
+        return u
+
+
+# Largest number of cached finite difference operators, the oldest is dropped first
+OPERATOR_CACHE_SIZE = 256
+_OPERATOR_CACHE = {}
+
+
+def select_finite_difference_scheme(thermal_resistance_array, thermal_capacitance_array, time_step):
+    """
+    Select the explicit scheme when it is stable for a surface and time
+    step, and the implicit scheme otherwise.
+
+    The explicit scheme is stable and free of oscillations when every
+    diagonal coefficient 1 - dt/C (1/R_outside + 1/R_inside) is not
+    negative.
+
+    Parameters
+    ----------
+    thermal_resistance_array : array
+    thermal_capacitance_array : array
+    time_step : float
+
+    Returns
+    -------
+    scheme : string
+    """
+    R = np.asarray(thermal_resistance_array, dtype=float)
+    C = np.asarray(thermal_capacitance_array, dtype=float)
+    diagonal = 1 - time_step*(1/R[:-1] + 1/R[1:])/C
+    return 'explicit' if (diagonal >= 0).all() else 'implicit'
+
+
+def get_finite_difference_operator(thermal_resistance_array, thermal_capacitance_array, time_step, scheme='explicit'):
+    """
+    Get the finite difference operator of a surface, calculated once per
+    distinct resistance array, capacitance array, time step and scheme. At
+    most OPERATOR_CACHE_SIZE are kept.
+
+    Parameters
+    ----------
+    thermal_resistance_array : array
+    thermal_capacitance_array : array
+    time_step : float
+    scheme : string
 
-    def solve_timestep(self, time_index, temperature_array, outside_temperature, inside_temperature):
-        # Boundary Conditions
-        T = outside_temperature
-        b = np.insert(temperature_array,0,T,axis=0)
-        b = np.append(b, inside_temperature)
+    Returns
+    -------
+    operator : FiniteDifferenceOperator
+    """
+    R = np.ascontiguousarray(thermal_resistance_array, dtype=float)
+    C = np.ascontiguousarray(thermal_capacitance_array, dtype=float)
+    key = (R.tobytes(), C.tobytes(), float(time_step), scheme)
+    if key not in _OPERATOR_CACHE:
+        if len(_OPERATOR_CACHE) >= OPERATOR_CACHE_SIZE:
+            del _OPERATOR_CACHE[next(iter(_OPERATOR_CACHE))]
+        _OPERATOR_CACHE[key] = FiniteDifferenceOperator(R, C, time_step, scheme)
+    return _OPERATOR_CACHE[key]
 
-        # Solve
-        u = np.dot(self.A,b)
-        b = np.array(u)
 
-        # Store values in object
-        self.temperature_array.iloc[time_index] = u
+def clear_finite_difference_operator_cache():
+    """
+    Remove all cached finite difference operators.
+    """
+    _OPERATOR_CACHE.clear()
@@ -5,24 +5,77 @@ import pandas as pd
 
 from sitka.utils.time_series import TimeSeriesComponent
 
+EXTERIOR_CONVECTION_MODELS = ('simple_combined', 'tarp', 'doe2', 'mowitt')
+INTERIOR_CONVECTION_MODELS = ('walton', 'tarp', 'ashrae_vertical_wall', 'fisher_pedersen')
+
+# Simple combined coefficients D, E, F and forced convection roughness
+# multiplier R_f by surface roughness
+ROUGHNESS_COEFFICIENTS = {
+    'very_rough': (11.58, 5.894, 0.0, 2.17),
+    'rough': (12.49, 4.065, 0.028, 1.67),
+    'medium_rough': (10.79, 4.192, 0.0, 1.52),
+    'medium_smooth': (8.23, 4.0, -0.057, 1.13),
+    'smooth': (10.22, 3.1, 0.0, 1.11),
+    'very_smooth': (8.23, 3.33, -0.036, 1.00),
+}
+
 
 class OutsideConvection(TimeSeriesComponent):
-    v
-    def __init__(self, time, weather, surface, surface_temperature):
+    """
+    Outside convection calculation for time-series.
+
+    Parameters
+    ----------
+    time : Time
+    weather : Weather
+    surface : Surface
+    surface_temperature : Series
+    model : string
+        Exterior convection model ('simple_combined', 'tarp', 'doe2' or
+        'mowitt').
+
+    Attributes
+    ----------
+    heat_transfer_coefficient : Series
+        Convection heat transfer coefficient [W/m^2-K].
+    surface_height : float
+        Height of the surface centroid above the ground [m].
+    wind_speed : Series
+        Wind speed at the surface height [m/s].
+    windward : Series
+        Whether the surface faces the wind.
+    surface_temperature : Series
+        Surface temperature [C].
+    heat_transfer_rate : Series
+        Heat transfer rate from the surface to the air [W].
+    time : Time
+    weather : Weather
+    surface : Surface
+    model : string
+    """
+    def __init__(self, time, weather, surface, surface_temperature, model='simple_combined'):
         # Model parameters
-        self.heat_transfer_coefficient = None  # Convection coefficient (default 22.7) [W/m^2-K]
+        self.heat_transfer_coefficient = None  # Convection coefficient [W/m^2-K]
 
         # Geometric parameters
         self.surface_height = None
 
         # Thermal properties
         self.wind_speed = None
+        self.windward = None
         self.surface_temperature = surface_temperature
         self.heat_transfer_rate = None
+        self._surface_temperature = None
+        self._ambient_temperature = None
+        self._wind_speed = None
+        self._windward = None
+        self._heat_transfer_coefficient = None
+        self._heat_transfer_rate = None
 
         # Associated objects
         self._weather = weather
         self._surface = surface
+        self._model = model
 
         # Add attributes from super class
         super().__init__(time)
@@ -31,11 +84,23 @@ class OutsideConvection(TimeSeriesComponent):
         self.update_calculated_values()
 
     def update_calculated_values(self):
-        print('Updating external longwave radiation calculations.')
+        print('Updating outside convection calculations.')
+        self.calculate_surface_height()
         self.calculate_surface_wind_speed()
-        self.calculate_heat_transfer_coefficient()
+        self.calculate_windward()
         self.calculate_heat_transfer()
 
+    def calculate_surface_height(self):
+        """
+        Calculate the height of the surface centroid, taken as half the
+        surface height.
+
+        Yields
+        ----------
+        surface_height : float
+        """
+        self.surface_height = 0.5*self.surface.height
+
     def calculate_surface_wind_speed(self):
         """
         Calculate the wind speed at the surface based on the height.
@@ -43,42 +108,338 @@ class OutsideConvection(TimeSeriesComponent):
         Yields
         ----------
         wind_speed : Series
+        """
+        wind_profile_factor = calculate_wind_profile_factor(self.surface_height)
+        self._wind_speed = wind_profile_factor*np.asarray(self.weather.wind_speed, dtype=float)
+        self.wind_speed = pd.Series(self._wind_speed, copy=False)
 
-        References
-        --------
+    def calculate_windward(self):
         """
-        self.wind_speed = self.weather.wind_speed*((270/10)^0.14*(0.5*self.surface_height/370)^0.22)
+        Find the time steps with the surface facing the wind.
 
-    def calculate_heat_transfer_coefficient(self):
+        Yields
+        ----------
+        windward : Series
+        """
+        self._windward = calculate_windward(self.weather.wind_direction, self.surface.azimuth, self.surface.tilt, self.time.length)
+        self.windward = pd.Series(self._windward, copy=False)
+
+    def calculate_heat_transfer(self):
+        """
+        Calculate the outside convection coefficient and the heat transfer
+        rate for all time steps.
+
+        Yields
+        ----------
+        surface_temperature : Series
+        heat_transfer_coefficient : Series
+        heat_transfer_rate : Series
+        """
+        length = self.time.length
+        if (self._heat_transfer_coefficient is None) or (len(self._heat_transfer_coefficient) != length):
+            self._heat_transfer_coefficient = np.empty(length)
+            self._heat_transfer_rate = np.empty(length)
+            self.heat_transfer_coefficient = pd.Series(self._heat_transfer_coefficient, copy=False)
+            self.heat_transfer_rate = pd.Series(self._heat_transfer_rate, copy=False)
+
+        # Own copy of the surface temperature so that steps can be updated in place
+        self._surface_temperature = np.array(self.surface_temperature, dtype=float)
+        self.surface_temperature = pd.Series(self._surface_temperature, copy=False)
+        self._ambient_temperature = np.asarray(self.weather.dry_bulb_temperature, dtype=float)
+        self.update_surface_temperature(self._surface_temperature, 0, length)
+
+    def update_surface_temperature(self, surface_temperature, start, stop=None):
+        """
+        Update the surface temperature, the convection coefficient and the
+        heat transfer rate for one time step or a block of time steps, in
+        place.
+
+        Parameters
+        ----------
+        surface_temperature : float or array
+            Surface temperature for the time steps [C].
+        start : int
+            Position of the first time step.
+        stop : int
+            Position after the last time step, default start + 1.
+
+        Yields
+        ----------
+        surface_temperature : Series
+        heat_transfer_coefficient : Series
+        heat_transfer_rate : Series
+        """
+        window = slice(start, start + 1 if stop is None else stop)
+        self._surface_temperature[window] = surface_temperature
+        self.calculate_heat_transfer_coefficient(window)
+        delta_temperature = self._heat_transfer_rate[window]
+        np.subtract(self._surface_temperature[window], self._ambient_temperature[window], out=delta_temperature)
+        np.multiply(delta_temperature, self._heat_transfer_coefficient[window], out=delta_temperature)
+        np.multiply(delta_temperature, self.surface.area, out=delta_temperature)
+
+    def calculate_heat_transfer_coefficient(self, window=slice(None)):
         """
         Calculate the outside convection coefficient on the surface.
 
+        Parameters
+        ----------
+        window : slice
+            Time steps to calculate, default all.
+
         Yields
         ----------
         heat_transfer_coefficient : Series
+        """
+        surface = self.surface
+        self._heat_transfer_coefficient[window] = calculate_outside_heat_transfer_coefficient(
+            self.model,
+            self._surface_temperature[window] - self._ambient_temperature[window],
+            self._wind_speed[window],
+            self._windward[window],
+            surface.tilt,
+            ROUGHNESS_COEFFICIENTS[surface.roughness],
+            surface.perimeter,
+            surface.area,
+        )
+
+    @property
+    def weather(self):
+        return self._weather
+
+    @weather.setter
+    def weather(self, value):
+        self._weather = value
+        self.update_calculated_values()
+
+    @property
+    def surface(self):
+        return self._surface
+
+    @surface.setter
+    def surface(self, value):
+        self._surface = value
+        self.update_calculated_values()
+
+    @property
+    def model(self):
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+        self.update_calculated_values()
+
+
+class BatchOutsideConvection(TimeSeriesComponent):
+    """
+    Outside convection for many surfaces at once, as (surface, time) arrays.
+
+    The wind profile factor is calculated once per distinct surface height
+    and the surfaces are grouped by convection model, so each model is one
+    array calculation over its surfaces and time steps.
 
-        References
-        --------
+    Parameters
+    ----------
+    time : Time
+    weather : Weather
+    surfaces : list of Surface
+    surface_temperature : array
+        Surface temperatures (surface, time) [C].
+    models : string or list of string
+        Exterior convection model for all surfaces or for each surface.
+
+    Attributes
+    ----------
+    surface_height : array
+        Height of the surface centroids above the ground [m].
+    wind_speed : array
+        Wind speed at the surface heights (surface, time) [m/s].
+    windward : array of bool
+        Whether the surfaces face the wind (surface, time).
+    surface_temperature : array
+        Surface temperatures (surface, time) [C].
+    heat_transfer_coefficient : array
+        Convection heat transfer coefficients (surface, time) [W/m^2-K].
+    heat_transfer_rate : array
+        Heat transfer rates from the surfaces to the air (surface, time) [W].
+    model_index : dict
+        Positions of the surfaces using each model.
+    time : Time
+    weather : Weather
+    surfaces : list of Surface
+    """
+    def __init__(self, time, weather, surfaces, surface_temperature, models='simple_combined'):
+        self.surface_height = None
+        self.wind_speed = None
+        self.windward = None
+        self.surface_temperature = surface_temperature
+        self.heat_transfer_coefficient = None
+        self.heat_transfer_rate = None
+        self.model_index = None
+        self._ambient_temperature = None
+        self._azimuth = None
+        self._tilt = None
+        self._perimeter = None
+        self._area = None
+        self._roughness_coefficients = None
+
+        # Associated objects
+        self._weather = weather
+        self._surfaces = surfaces
+        self._models = models
+
+        # Add attributes from super class
+        super().__init__(time)
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        print('Updating batch outside convection calculations.')
+        self.calculate_surface_properties()
+        self.calculate_surface_wind_speed()
+        self.calculate_windward()
+        self.calculate_heat_transfer()
+
+    def calculate_surface_properties(self):
+        """
+        Collect the surface properties as column arrays and group the
+        surfaces by convection model.
+
+        Yields
+        ----------
+        surface_height : array
+        model_index : dict
+        """
+        surfaces = self.surfaces
+        self.surface_height = np.array([0.5*surface.height for surface in surfaces], dtype=float)
+        self._azimuth = np.array([surface.azimuth for surface in surfaces], dtype=float).reshape(-1, 1)
+        self._tilt = np.array([surface.tilt for surface in surfaces], dtype=float).reshape(-1, 1)
+        self._perimeter = np.array([surface.perimeter for surface in surfaces], dtype=float).reshape(-1, 1)
+        self._area = np.array([surface.area for surface in surfaces], dtype=float).reshape(-1, 1)
+        self._roughness_coefficients = np.array(
+            [ROUGHNESS_COEFFICIENTS[surface.roughness] for surface in surfaces], dtype=float
+        ).reshape(-1, 4, 1)
+
+        models = self.models
+        if isinstance(models, str):
+            models = [models]*len(surfaces)
+        self.model_index = {}
+        for position, model in enumerate(models):
+            self.model_index.setdefault(model, []).append(position)
+        self.model_index = {model: np.array(index) for model, index in self.model_index.items()}
+
+    def calculate_surface_wind_speed(self):
+        """
+        Calculate the wind speed at the surface heights, with the wind
+        profile factor calculated once per distinct height.
+
+        Yields
+        ----------
+        wind_speed : array
+        """
+        heights, height_index = np.unique(self.surface_height, return_inverse=True)
+        wind_profile_factor = calculate_wind_profile_factor(heights)[height_index]
+        self.wind_speed = np.outer(wind_profile_factor, np.asarray(self.weather.wind_speed, dtype=float))
+
+    def calculate_windward(self):
+        """
+        Find the time steps with each surface facing the wind.
+
+        Yields
+        ----------
+        windward : array of bool
         """
-        # Outside convection coefficient
-        D = 10.79
-        E = 4.192
-        F = 0.0
-        self.heat_transfer_coefficient = D+E*self.wind_speed+F*self.wind_speed^2
+        self.windward = calculate_windward(self.weather.wind_direction, self._azimuth, self._tilt, self.time.length)
 
     def calculate_heat_transfer(self):
         """
-        Calculate the heat transfer rate for the surface.
+        Calculate the outside convection coefficients and the heat transfer
+        rates for all time steps.
 
         Yields
         ----------
-        heat_transfer_rate : Series
+        surface_temperature : array
+        heat_transfer_coefficient : array
+        heat_transfer_rate : array
+        """
+        shape = (len(self.surfaces), self.time.length)
+        if (self.heat_transfer_coefficient is None) or (self.heat_transfer_coefficient.shape != shape):
+            self.heat_transfer_coefficient = np.empty(shape)
+            self.heat_transfer_rate = np.empty(shape)
+        self.surface_temperature = np.array(np.broadcast_to(self.surface_temperature, shape), dtype=float)
+        self._ambient_temperature = np.asarray(self.weather.dry_bulb_temperature, dtype=float)
+        self.update_surface_temperature(self.surface_temperature, 0, shape[1])
 
-        References
-        --------
+    def update_surface_temperature(self, surface_temperature, start, stop=None):
         """
-        # TODO add heat transfer rate calculation
-        self.heat_transfer_rate = 1
+        Update the surface temperatures, the convection coefficients and the
+        heat transfer rates for one time step or a block of time steps, in
+        place.
+
+        Parameters
+        ----------
+        surface_temperature : array
+            Surface temperatures for the time steps, (surface) or
+            (surface, step) [C].
+        start : int
+            Position of the first time step.
+        stop : int
+            Position after the last time step, default start + 1.
+
+        Yields
+        ----------
+        surface_temperature : array
+        heat_transfer_coefficient : array
+        heat_transfer_rate : array
+        """
+        window = slice(start, start + 1 if stop is None else stop)
+        surface_temperature = np.asarray(surface_temperature, dtype=float)
+        if surface_temperature.ndim == 1:
+            surface_temperature = surface_temperature.reshape(-1, 1)
+        self.surface_temperature[:, window] = surface_temperature
+        delta_temperature = self.heat_transfer_rate[:, window]
+        np.subtract(self.surface_temperature[:, window], self._ambient_temperature[window], out=delta_temperature)
+        for model, index in self.model_index.items():
+            self.heat_transfer_coefficient[index, window] = calculate_outside_heat_transfer_coefficient(
+                model,
+                delta_temperature[index],
+                self.wind_speed[index, window],
+                self.windward[index, window],
+                self._tilt[index],
+                self._roughness_coefficients[index].transpose(1, 0, 2),
+                self._perimeter[index],
+                self._area[index],
+            )
+        np.multiply(delta_temperature, self.heat_transfer_coefficient[:, window], out=delta_temperature)
+        np.multiply(delta_temperature, self._area, out=delta_temperature)
+
+    @property
+    def weather(self):
+        return self._weather
+
+    @weather.setter
+    def weather(self, value):
+        self._weather = value
+        self.update_calculated_values()
+
+    @property
+    def surfaces(self):
+        return self._surfaces
+
+    @surfaces.setter
+    def surfaces(self, value):
+        self._surfaces = value
+        self.update_calculated_values()
+
+    @property
+    def models(self):
+        return self._models
+
+    @models.setter
+    def models(self, value):
+        self._models = value
+        self.update_calculated_values()
 
 
 class InsideConvection(TimeSeriesComponent):
@@ -88,59 +449,529 @@ class InsideConvection(TimeSeriesComponent):
     Parameters
     ----------
     time : Time
-    weather : Weather
     surface : Surface
     surface_temperature : Series
+        Inside surface temperature [C].
+    air_temperature : Series
+        Zone air temperature [C].
+    model : string
+        Interior convection model ('walton', 'tarp', 'ashrae_vertical_wall'
+        or 'fisher_pedersen').
+    air_changes_per_hour : float or Series
+        Supply air changes per hour, used by the Fisher-Pedersen model [1/h].
 
     Attributes
     ----------
     heat_transfer_coefficient : Series
         Convection heat transfer coefficient [W/m^2-K].
-    surface_height : float
-        Surface height [m].
-    wind_speed : Series
-        Ambient wind speed [m/s].
+    inside_tilt : float
+        Tilt angle of the inside face of the surface (0 = facing up) [deg].
     surface_temperature : Series
-        Surface temperature [C].
+        Inside surface temperature [C].
+    air_temperature : Series
+        Zone air temperature [C].
     heat_transfer_rate : Series
-        Heat transfer rate [W].
+        Heat transfer rate from the surface to the zone air [W].
     time : Time
-    weather : Weather
     surface : Surface
+    model : string
+    """
+    def __init__(self, time, surface, surface_temperature, air_temperature, model='walton', air_changes_per_hour=0.0):
+        # Model parameters
+        self.heat_transfer_coefficient = None  # Convection coefficient [W/m^2-K]
+        self.air_changes_per_hour = air_changes_per_hour
+        self.inside_tilt = None
+
+        # Thermal properties
+        self.surface_temperature = surface_temperature
+        self.air_temperature = air_temperature
+        self.heat_transfer_rate = None
+        self._surface_temperature = None
+        self._air_temperature = None
+        self._air_changes_per_hour = None
+        self._heat_transfer_coefficient = None
+        self._heat_transfer_rate = None
+
+        # Associated objects
+        self._surface = surface
+        self._model = model
+
+        # Add attributes from super class
+        super().__init__(time)
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        print('Updating inside convection calculations.')
+        self.calculate_inside_tilt()
+        self.calculate_heat_transfer()
+
+    def calculate_inside_tilt(self):
+        """
+        Calculate the tilt of the inside face, which faces the opposite way
+        to the outside face.
+
+        Yields
+        ----------
+        inside_tilt : float
+        """
+        self.inside_tilt = 180 - self.surface.tilt
+
+    def calculate_heat_transfer(self):
+        """
+        Calculate the inside convection coefficient and the heat transfer
+        rate for all time steps.
+
+        Yields
+        ----------
+        surface_temperature : Series
+        air_temperature : Series
+        heat_transfer_coefficient : Series
+        heat_transfer_rate : Series
+        """
+        length = self.time.length
+        if (self._heat_transfer_coefficient is None) or (len(self._heat_transfer_coefficient) != length):
+            self._heat_transfer_coefficient = np.empty(length)
+            self._heat_transfer_rate = np.empty(length)
+            self.heat_transfer_coefficient = pd.Series(self._heat_transfer_coefficient, copy=False)
+            self.heat_transfer_rate = pd.Series(self._heat_transfer_rate, copy=False)
+
+        # Own copies of the temperatures so that steps can be updated in place
+        self._surface_temperature = np.array(np.broadcast_to(self.surface_temperature, length), dtype=float)
+        self._air_temperature = np.array(np.broadcast_to(self.air_temperature, length), dtype=float)
+        self._air_changes_per_hour = np.broadcast_to(np.asarray(self.air_changes_per_hour, dtype=float), length)
+        self.surface_temperature = pd.Series(self._surface_temperature, copy=False)
+        self.air_temperature = pd.Series(self._air_temperature, copy=False)
+        self.update_surface_temperature(self._surface_temperature, 0, length)
+
+    def update_surface_temperature(self, surface_temperature, start, stop=None, air_temperature=None):
+        """
+        Update the temperatures, the convection coefficient and the heat
+        transfer rate for one time step or a block of time steps, in place.
+
+        Parameters
+        ----------
+        surface_temperature : float or array
+            Inside surface temperature for the time steps [C].
+        start : int
+            Position of the first time step.
+        stop : int
+            Position after the last time step, default start + 1.
+        air_temperature : float or array
+            Zone air temperature for the time steps, unchanged if not given [C].
+
+        Yields
+        ----------
+        surface_temperature : Series
+        air_temperature : Series
+        heat_transfer_coefficient : Series
+        heat_transfer_rate : Series
+        """
+        window = slice(start, start + 1 if stop is None else stop)
+        self._surface_temperature[window] = surface_temperature
+        if air_temperature is not None:
+            self._air_temperature[window] = air_temperature
+        delta_temperature = self._heat_transfer_rate[window]
+        np.subtract(self._surface_temperature[window], self._air_temperature[window], out=delta_temperature)
+        self._heat_transfer_coefficient[window] = calculate_inside_heat_transfer_coefficient(
+            self.model, delta_temperature, self.inside_tilt, self._air_changes_per_hour[window]
+        )
+        np.multiply(delta_temperature, self._heat_transfer_coefficient[window], out=delta_temperature)
+        np.multiply(delta_temperature, self.surface.area, out=delta_temperature)
+
+    @property
+    def surface(self):
+        return self._surface
+
+    @surface.setter
+    def surface(self, value):
+        self._surface = value
+        self.update_calculated_values()
+
+    @property
+    def model(self):
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+        self.update_calculated_values()
+
+
+class BatchInsideConvection(TimeSeriesComponent):
     """
-    def __init__(self):
-        self.heat_transfer_coefficient = 8.29 # Convection coefficient [W/m^2-K]
-        self.surface_tilt = 90
-        self.air_temperature = []
-        self.surface_temperature = []
-
-    def ashrae_vertical_wall(self):
-        #  ASHRAE Vertical Wall Model
-        delta_temperature = self.surface_temperature - self.air_temperature
-        h = 1.31*np.abs(delta_temperature)**(1/3)
-        h[h < 0.1] = 0.1
-        return h
-
-    def simple_natural_convection_algorithm(self):
-        # Simple Natural Convection Algorithm [Walton (1983)]
-        #inside_convection_coefficient = 1.31*np.abs(delta_temperature)**(1/3)
-        surface_tilt = self.surface_tilt
-
-        if (surface_tilt == 90):
-            h = 3.076
-            #obj.h_in(tim) = 1.31*np.abs(delta_temperature)**(1/3)
-        elif (surface_tilt  < 90) & (delta_temperature > 0):
-             h = 4.040
-             #obj.h_in(tim) = 9.482*np.abs(delta_temperature)**(1/3)/(7.283-np.abs(np.cos(rad_surface_tilt)))
-        elif (surface_tilt  < 90) & (DT < 0):
-             h = 0.948
-             #obj.h_in(tim) = 1.810*np.abs(delta_temperature)**(1/3)/(1.382+np.abs(np.cos(rad_surface_tilt)))
-        else:
-            h = 3.076
-
-        return h
-
-    def calculate_coefficient(self):
-        # inside surface natural convection coefficient
-        inside_convection_coefficient = simple_natural_convection_algorithm()
-        self.heat_transfer_coefficient = inside_convection_coefficient
+    Inside convection for many surfaces at once, as (surface, time) arrays.
+
+    The surfaces are grouped by convection model, so each model is one
+    masked array calculation over its surfaces and time steps.
+
+    Parameters
+    ----------
+    time : Time
+    surfaces : list of Surface
+    surface_temperature : array
+        Inside surface temperatures (surface, time) [C].
+    air_temperature : array
+        Zone air temperatures, (time) or (surface, time) [C].
+    models : string or list of string
+        Interior convection model for all surfaces or for each surface.
+    air_changes_per_hour : float or array
+        Supply air changes per hour, broadcast to (surface, time) [1/h].
+
+    Attributes
+    ----------
+    inside_tilt : array
+        Tilt angles of the inside faces (surface, 1) [deg].
+    surface_temperature : array
+        Inside surface temperatures (surface, time) [C].
+    air_temperature : array
+        Zone air temperatures (surface, time) [C].
+    heat_transfer_coefficient : array
+        Convection heat transfer coefficients (surface, time) [W/m^2-K].
+    heat_transfer_rate : array
+        Heat transfer rates from the surfaces to the zone air (surface, time) [W].
+    model_index : dict
+        Positions of the surfaces using each model.
+    time : Time
+    surfaces : list of Surface
+    """
+    def __init__(self, time, surfaces, surface_temperature, air_temperature, models='walton', air_changes_per_hour=0.0):
+        self.inside_tilt = None
+        self.surface_temperature = surface_temperature
+        self.air_temperature = air_temperature
+        self.air_changes_per_hour = air_changes_per_hour
+        self.heat_transfer_coefficient = None
+        self.heat_transfer_rate = None
+        self.model_index = None
+        self._area = None
+        self._air_changes_per_hour = None
+
+        # Associated objects
+        self._surfaces = surfaces
+        self._models = models
+
+        # Add attributes from super class
+        super().__init__(time)
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        print('Updating batch inside convection calculations.')
+        self.calculate_surface_properties()
+        self.calculate_heat_transfer()
+
+    def calculate_surface_properties(self):
+        """
+        Collect the surface properties as column arrays and group the
+        surfaces by convection model.
+
+        Yields
+        ----------
+        inside_tilt : array
+        model_index : dict
+        """
+        surfaces = self.surfaces
+        self.inside_tilt = 180 - np.array([surface.tilt for surface in surfaces], dtype=float).reshape(-1, 1)
+        self._area = np.array([surface.area for surface in surfaces], dtype=float).reshape(-1, 1)
+
+        models = self.models
+        if isinstance(models, str):
+            models = [models]*len(surfaces)
+        self.model_index = {}
+        for position, model in enumerate(models):
+            self.model_index.setdefault(model, []).append(position)
+        self.model_index = {model: np.array(index) for model, index in self.model_index.items()}
+
+    def calculate_heat_transfer(self):
+        """
+        Calculate the inside convection coefficients and the heat transfer
+        rates for all time steps.
+
+        Yields
+        ----------
+        surface_temperature : array
+        air_temperature : array
+        heat_transfer_coefficient : array
+        heat_transfer_rate : array
+        """
+        shape = (len(self.surfaces), self.time.length)
+        if (self.heat_transfer_coefficient is None) or (self.heat_transfer_coefficient.shape != shape):
+            self.heat_transfer_coefficient = np.empty(shape)
+            self.heat_transfer_rate = np.empty(shape)
+        self.surface_temperature = np.array(np.broadcast_to(self.surface_temperature, shape), dtype=float)
+        self.air_temperature = np.array(np.broadcast_to(self.air_temperature, shape), dtype=float)
+        self._air_changes_per_hour = np.broadcast_to(np.asarray(self.air_changes_per_hour, dtype=float), shape)
+        self.update_surface_temperature(self.surface_temperature, 0, shape[1])
+
+    def update_surface_temperature(self, surface_temperature, start, stop=None, air_temperature=None):
+        """
+        Update the temperatures, the convection coefficients and the heat
+        transfer rates for one time step or a block of time steps, in place.
+
+        Parameters
+        ----------
+        surface_temperature : array
+            Inside surface temperatures for the time steps, (surface) or
+            (surface, step) [C].
+        start : int
+            Position of the first time step.
+        stop : int
+            Position after the last time step, default start + 1.
+        air_temperature : float or array
+            Zone air temperatures for the time steps, unchanged if not given [C].
+
+        Yields
+        ----------
+        surface_temperature : array
+        air_temperature : array
+        heat_transfer_coefficient : array
+        heat_transfer_rate : array
+        """
+        window = slice(start, start + 1 if stop is None else stop)
+        surface_temperature = np.asarray(surface_temperature, dtype=float)
+        if surface_temperature.ndim == 1:
+            surface_temperature = surface_temperature.reshape(-1, 1)
+        self.surface_temperature[:, window] = surface_temperature
+        if air_temperature is not None:
+            air_temperature = np.asarray(air_temperature, dtype=float)
+            if air_temperature.ndim == 1 and len(air_temperature) == len(self.surfaces):
+                air_temperature = air_temperature.reshape(-1, 1)
+            self.air_temperature[:, window] = air_temperature
+        delta_temperature = self.heat_transfer_rate[:, window]
+        np.subtract(self.surface_temperature[:, window], self.air_temperature[:, window], out=delta_temperature)
+        for model, index in self.model_index.items():
+            self.heat_transfer_coefficient[index, window] = calculate_inside_heat_transfer_coefficient(
+                model, delta_temperature[index], self.inside_tilt[index], self._air_changes_per_hour[index, window]
+            )
+        np.multiply(delta_temperature, self.heat_transfer_coefficient[:, window], out=delta_temperature)
+        np.multiply(delta_temperature, self._area, out=delta_temperature)
+
+    @property
+    def surfaces(self):
+        return self._surfaces
+
+    @surfaces.setter
+    def surfaces(self, value):
+        self._surfaces = value
+        self.update_calculated_values()
+
+    @property
+    def models(self):
+        return self._models
+
+    @models.setter
+    def models(self, value):
+        self._models = value
+        self.update_calculated_values()
+
+
+def calculate_wind_profile_factor(height):
+    """
+    Calculate the ratio of the wind speed at a height to the wind speed
+    measured at the weather station.
+
+    Parameters
+    ----------
+    height : float or array
+        Height above the ground [m].
+
+    Returns
+    -------
+    wind_profile_factor : float or array
+
+    References
+    --------
+    ASHRAE (2017). Handbook of Fundamentals, Chapter 24, wind speed profile
+    for an urban terrain from a meteorological station at 10 m.
+    """
+    return (270/10)**0.14*(np.asarray(height, dtype=float)/370)**0.22
+
+
+def calculate_windward(wind_direction, azimuth, tilt, length):
+    """
+    Find whether surfaces face the wind. Horizontal surfaces are always
+    windward.
+
+    Parameters
+    ----------
+    wind_direction : Series
+        Wind direction, clockwise from north [deg]. All surfaces are
+        windward when no wind direction is given.
+    azimuth : float or array
+        Surface azimuth angles (0 = south, west positive) [deg].
+    tilt : float or array
+        Surface tilt angles [deg].
+    length : int
+        Number of time steps.
+
+    Returns
+    -------
+    windward : array of bool
+    """
+    azimuth = np.asarray(azimuth, dtype=float)
+    if wind_direction is None:
+        return np.ones(np.broadcast(azimuth, np.empty(length)).shape, dtype=bool)
+    compass_azimuth = 180 + azimuth
+    difference = np.abs(np.mod(np.asarray(wind_direction, dtype=float) - compass_azimuth + 180, 360) - 180)
+    horizontal = np.abs(np.sin(np.deg2rad(np.asarray(tilt, dtype=float)))) < 1e-3
+    return (difference <= 90) | horizontal
+
+
+def calculate_natural_convection_coefficient(delta_temperature, tilt):
+    """
+    Calculate the natural convection coefficient of surfaces with the TARP
+    (Walton) correlations.
+
+    The enhanced correlation is used when the heat flows up from a surface
+    facing up or down to a surface facing down, the reduced correlation
+    otherwise. Both give the vertical wall correlation 1.31|dT|^(1/3) for
+    vertical surfaces, so no separate case is needed.
+
+    Parameters
+    ----------
+    delta_temperature : array
+        Surface temperature minus air temperature [K].
+    tilt : float or array
+        Surface tilt angles [deg].
+
+    Returns
+    -------
+    heat_transfer_coefficient : array
+        Natural convection coefficient [W/m^2-K].
+
+    References
+    --------
+    Walton, G. N. (1983). Thermal Analysis Research Program Reference
+    Manual. NBSIR 83-2655.
+    """
+    cos_tilt = np.cos(np.deg2rad(tilt))
+    abs_cos_tilt = np.abs(cos_tilt)
+    cube_root = np.cbrt(np.abs(delta_temperature))
+    enhanced = delta_temperature*cos_tilt > 0
+    return np.where(enhanced, 9.482/(7.238 - abs_cos_tilt), 1.810/(1.382 + abs_cos_tilt))*cube_root
+
+
+def calculate_outside_heat_transfer_coefficient(model, delta_temperature, wind_speed, windward, tilt,
+                                                roughness_coefficients, perimeter, area):
+    """
+    Calculate the outside convection coefficient of surfaces with an
+    exterior convection model.
+
+    All arguments broadcast, so the same kernel is used for one surface over
+    time and for (surface, time) arrays with column surface properties.
+
+    Parameters
+    ----------
+    model : string
+        Exterior convection model ('simple_combined', 'tarp', 'doe2' or
+        'mowitt').
+    delta_temperature : array
+        Surface temperature minus air temperature [K].
+    wind_speed : array
+        Wind speed at the surface height [m/s].
+    windward : array of bool
+        Whether the surface faces the wind.
+    tilt : float or array
+        Surface tilt angles [deg].
+    roughness_coefficients : array
+        Simple combined coefficients D, E, F and roughness multiplier R_f,
+        stacked on the first axis.
+    perimeter : float or array
+        Surface perimeter [m].
+    area : float or array
+        Surface area [m^2].
+
+    Returns
+    -------
+    heat_transfer_coefficient : array
+        Convection coefficient [W/m^2-K].
+
+    References
+    --------
+    U.S. Department of Energy (2020). EnergyPlus Engineering Reference,
+    Outside Surface Heat Balance, exterior convection.
+    """
+    D, E, F, roughness_multiplier = roughness_coefficients
+    if model == 'simple_combined':
+        return D + E*wind_speed + F*wind_speed**2
+
+    if model == 'tarp':
+        natural = calculate_natural_convection_coefficient(delta_temperature, tilt)
+        wind_direction_modifier = np.where(windward, 1.0, 0.5)
+        perimeter_per_area = np.divide(perimeter, area, out=np.zeros(np.shape(area)), where=np.asarray(area) > 0)
+        forced = 2.537*wind_direction_modifier*roughness_multiplier*np.sqrt(perimeter_per_area*wind_speed)
+        return natural + forced
+
+    if model == 'doe2':
+        natural = calculate_natural_convection_coefficient(delta_temperature, tilt)
+        a = np.where(windward, 2.38, 2.86)
+        b = np.where(windward, 0.89, 0.617)
+        smooth = np.sqrt(natural**2 + (a*wind_speed**b)**2)
+        return natural + roughness_multiplier*(smooth - natural)
+
+    if model == 'mowitt':
+        a = np.where(windward, 3.26, 3.55)
+        b = np.where(windward, 0.89, 0.617)
+        return np.sqrt((0.84*np.cbrt(np.abs(delta_temperature)))**2 + (a*wind_speed**b)**2)
+
+    raise ValueError('Unknown exterior convection model %s, expected one of %s' % (model, EXTERIOR_CONVECTION_MODELS))
+
+
+def calculate_inside_heat_transfer_coefficient(model, delta_temperature, tilt, air_changes_per_hour=0.0):
+    """
+    Calculate the inside convection coefficient of surfaces with an interior
+    convection model.
+
+    Surfaces within 22.5 deg of vertical are walls, the others face up
+    (floors) or down (ceilings). All arguments broadcast, so the same kernel
+    is used for one surface over time and for (surface, time) arrays with
+    column surface properties.
+
+    Parameters
+    ----------
+    model : string
+        Interior convection model ('walton', 'tarp', 'ashrae_vertical_wall'
+        or 'fisher_pedersen').
+    delta_temperature : array
+        Surface temperature minus zone air temperature [K].
+    tilt : float or array
+        Tilt angles of the inside faces (0 = facing up) [deg].
+    air_changes_per_hour : float or array
+        Supply air changes per hour, used by the Fisher-Pedersen model [1/h].
+
+    Returns
+    -------
+    heat_transfer_coefficient : array
+        Convection coefficient [W/m^2-K].
+
+    References
+    --------
+    Walton, G. N. (1983). Thermal Analysis Research Program Reference
+    Manual. NBSIR 83-2655.
+    Fisher, D. E. and Pedersen, C. O. (1997). Convective heat transfer in
+    building energy and thermal load calculations. ASHRAE Transactions.
+    """
+    delta_temperature = np.asarray(delta_temperature, dtype=float)
+    cos_tilt = np.cos(np.deg2rad(tilt))
+    vertical = np.abs(cos_tilt) < np.cos(np.deg2rad(67.5))
+
+    if model == 'walton':
+        enhanced = delta_temperature*cos_tilt > 0
+        return np.where(vertical, 3.076, np.where(enhanced, 4.040, 0.948))*np.ones_like(delta_temperature)
+
+    if model == 'tarp':
+        return calculate_natural_convection_coefficient(delta_temperature, tilt)
+
+    if model == 'ashrae_vertical_wall':
+        return np.maximum(1.31*np.cbrt(np.abs(delta_temperature)), 0.1)
+
+    if model == 'fisher_pedersen':
+        air_changes_per_hour = np.asarray(air_changes_per_hour, dtype=float)
+        wall = 1.208 + 1.012*air_changes_per_hour**0.604
+        ceiling = 2.234 + 4.099*air_changes_per_hour**0.503
+        floor = 3.873 + 0.082*air_changes_per_hour**0.98
+        return np.where(vertical, wall, np.where(cos_tilt < 0, ceiling, floor))*np.ones_like(delta_temperature)
+
+    raise ValueError('Unknown interior convection model %s, expected one of %s' % (model, INTERIOR_CONVECTION_MODELS))
@@ -1,46 +1,988 @@
 """Psychrometric calculations.
+
+The functions work on floats, arrays or Series in SI units and return
+arrays, so whole weather years are calculated at once.
 """
+import warnings
+
 import numpy as np
 import pandas as pd
 
-from sitka.utils.time_series import TimeSeriesComponent
+# Evaluation modes of MoistAir
+PSYCHROMETRIC_MODES = ['exact', 'table']
+
+# Ratio of the molecular masses of water vapor and dry air
+MOLECULAR_MASS_RATIO = 0.621945
+
+# Gas constant of dry air [J/kg-K]
+DRY_AIR_GAS_CONSTANT = 287.042
+
+# Specific heats and latent heat for the moist air enthalpy [J/kg-K] and [J/kg]
+DRY_AIR_SPECIFIC_HEAT = 1006.0
+WATER_VAPOR_SPECIFIC_HEAT = 1860.0
+WATER_VAPORIZATION_ENTHALPY = 2501000.0
+
+# Hyland-Wexler saturation pressure coefficients over ice (t < 0 C) and over
+# liquid water (t >= 0 C), for ln(pws) = C1/T + C2 + C3 T + C4 T^2 + C5 T^3
+# + C6 T^4 + C7 ln(T) with T [K] and pws [Pa]
+HYLAND_WEXLER_COEFFICIENTS = np.array([
+    [-5.6745359e3, 6.3925247, -9.6778430e-3, 6.2215701e-7, 2.0747825e-9, -9.4840240e-13, 4.1635019],
+    [-5.8002206e3, 1.3914993, -4.8640239e-2, 4.1764768e-5, -1.4452093e-8, 0.0, 6.5459673],
+])
+
+
+def calculate_standard_pressure(elevation):
+    """
+    Calculate the standard atmospheric pressure for an elevation.
+
+    Parameters
+    ----------
+    elevation : float or array
+        Elevation above sea level [m].
+
+    Returns
+    -------
+    standard_pressure : float or array
+        Standard pressure [Pa].
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 3
+    """
+    return 101325*(1.0-2.25577e-5*np.asarray(elevation, dtype=float))**5.2559
+
+
+def calculate_saturation_pressure(temperature, water=None):
+    """
+    Calculate the water vapor saturation pressure with the Hyland-Wexler
+    equations, over ice below 0 C and over liquid water above.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    water : bool or array of bool
+        Optional phase of each element, True over liquid water and False
+        over ice, instead of the phase of the temperature.
+
+    Returns
+    -------
+    saturation_pressure : array
+        Water vapor saturation pressure [Pa].
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 5 and 6
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    T = temperature + 273.15
+    water = temperature >= 0 if water is None else np.asarray(water, dtype=bool)
+    C = HYLAND_WEXLER_COEFFICIENTS[water.astype(int)]
+    C = np.moveaxis(C, -1, 0)
+    return np.exp(C[0]/T + C[1] + T*(C[2] + T*(C[3] + T*(C[4] + T*C[5]))) + C[6]*np.log(T))
+
+
+def calculate_humidity_ratio(vapor_pressure, pressure):
+    """
+    Calculate the humidity ratio from the water vapor partial pressure.
+
+    Parameters
+    ----------
+    vapor_pressure : float or array
+        Water vapor partial pressure [Pa].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+
+    Returns
+    -------
+    humidity_ratio : array
+        Humidity ratio [kg_w/kg_da].
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 20
+    """
+    vapor_pressure = np.asarray(vapor_pressure, dtype=float)
+    return MOLECULAR_MASS_RATIO*vapor_pressure/(np.asarray(pressure, dtype=float) - vapor_pressure)
+
+
+def calculate_vapor_pressure(humidity_ratio, pressure):
+    """
+    Calculate the water vapor partial pressure from the humidity ratio.
+
+    Parameters
+    ----------
+    humidity_ratio : float or array
+        Humidity ratio [kg_w/kg_da].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+
+    Returns
+    -------
+    vapor_pressure : array
+        Water vapor partial pressure [Pa].
+    """
+    humidity_ratio = np.asarray(humidity_ratio, dtype=float)
+    return np.asarray(pressure, dtype=float)*humidity_ratio/(MOLECULAR_MASS_RATIO + humidity_ratio)
+
+
+def calculate_humidity_ratio_from_relative_humidity(temperature, relative_humidity, pressure):
+    """
+    Calculate the humidity ratio from the relative humidity.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    relative_humidity : float or array
+        Relative humidity [0-1].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+
+    Returns
+    -------
+    humidity_ratio : array
+        Humidity ratio [kg_w/kg_da].
+    """
+    vapor_pressure = np.asarray(relative_humidity, dtype=float)*calculate_saturation_pressure(temperature)
+    return calculate_humidity_ratio(vapor_pressure, pressure)
+
+
+def calculate_relative_humidity(temperature, humidity_ratio, pressure):
+    """
+    Calculate the relative humidity from the humidity ratio.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    humidity_ratio : float or array
+        Humidity ratio [kg_w/kg_da].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+
+    Returns
+    -------
+    relative_humidity : array
+        Relative humidity [0-1].
+    """
+    return calculate_vapor_pressure(humidity_ratio, pressure)/calculate_saturation_pressure(temperature)
+
+
+def calculate_enthalpy(temperature, humidity_ratio):
+    """
+    Calculate the moist air specific enthalpy.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    humidity_ratio : float or array
+        Humidity ratio [kg_w/kg_da].
+
+    Returns
+    -------
+    enthalpy : array
+        Moist air specific enthalpy [J/kg_da].
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 32
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    humidity_ratio = np.asarray(humidity_ratio, dtype=float)
+    return DRY_AIR_SPECIFIC_HEAT*temperature + humidity_ratio*(WATER_VAPORIZATION_ENTHALPY + WATER_VAPOR_SPECIFIC_HEAT*temperature)
+
+
+def calculate_dew_point_temperature(vapor_pressure):
+    """
+    Calculate the dew point temperature from the water vapor partial
+    pressure, with the fit over ice for dew points below 0 C.
+
+    Parameters
+    ----------
+    vapor_pressure : float or array
+        Water vapor partial pressure [Pa].
+
+    Returns
+    -------
+    dew_point_temperature : array
+        Dew point temperature [C].
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 37 and 38
+    """
+    vapor_pressure = np.asarray(vapor_pressure, dtype=float)/1000
+    alpha = np.log(vapor_pressure)
+    dew_point_temperature = 6.54 + 14.526*alpha + 0.7389*alpha**2 + 0.09486*alpha**3 + 0.4569*vapor_pressure**0.1984
+    ice_dew_point_temperature = 6.09 + 12.608*alpha + 0.4959*alpha**2
+    return np.where(dew_point_temperature < 0, ice_dew_point_temperature, dew_point_temperature)
+
+
+def calculate_wet_bulb_temperature(temperature, relative_humidity):
+    """
+    Calculate the wet bulb temperature with the Stull approximation, for
+    temperatures between -20 and 50 C and relative humidities between 5 and
+    99 % at standard pressure. solve_wet_bulb_temperature solves the
+    psychrometric equation for any state.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    relative_humidity : float or array
+        Relative humidity [0-1].
+
+    Returns
+    -------
+    wet_bulb_temperature : array
+        Wet bulb temperature [C].
+
+    References
+    --------
+    Stull, 2011. "Wet-bulb temperature from relative humidity and air
+    temperature". Journal of Applied Meteorology and Climatology.
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    relative_humidity = 100*np.asarray(relative_humidity, dtype=float)
+    return (
+        temperature*np.arctan(0.151977*(relative_humidity + 8.313659)**0.5)
+        + np.arctan(temperature + relative_humidity)
+        - np.arctan(relative_humidity - 1.676331)
+        + 0.00391838*relative_humidity**1.5*np.arctan(0.023101*relative_humidity)
+        - 4.686035
+    )
+
+
+def calculate_specific_volume(temperature, humidity_ratio, pressure):
+    """
+    Calculate the moist air specific volume per mass of dry air.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    humidity_ratio : float or array
+        Humidity ratio [kg_w/kg_da].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+
+    Returns
+    -------
+    specific_volume : array
+        Specific volume [m^3/kg_da].
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 26
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    humidity_ratio = np.asarray(humidity_ratio, dtype=float)
+    return DRY_AIR_GAS_CONSTANT*(temperature + 273.15)*(1 + 1.607858*humidity_ratio)/np.asarray(pressure, dtype=float)
+
+
+def calculate_density(temperature, humidity_ratio, pressure):
+    """
+    Calculate the moist air density.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    humidity_ratio : float or array
+        Humidity ratio [kg_w/kg_da].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+
+    Returns
+    -------
+    density : array
+        Moist air density [kg/m^3].
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 11
+    """
+    return (1 + np.asarray(humidity_ratio, dtype=float))/calculate_specific_volume(temperature, humidity_ratio, pressure)
+
+
+def calculate_saturation_pressure_derivative(temperature, water=None):
+    """
+    Calculate the derivative of the Hyland-Wexler saturation pressure with
+    temperature.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    water : bool or array of bool
+        Optional phase of each element, True over liquid water and False
+        over ice, instead of the phase of the temperature.
+
+    Returns
+    -------
+    saturation_pressure_derivative : array
+        Derivative of the saturation pressure [Pa/K].
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    T = temperature + 273.15
+    water = temperature >= 0 if water is None else np.asarray(water, dtype=bool)
+    C = np.moveaxis(HYLAND_WEXLER_COEFFICIENTS[water.astype(int)], -1, 0)
+    logarithmic_derivative = -C[0]/T**2 + C[2] + T*(2*C[3] + T*(3*C[4] + T*4*C[5])) + C[6]/T
+    return calculate_saturation_pressure(temperature, water)*logarithmic_derivative
+
+
+def calculate_freezing_wet_bulb_humidity_ratio(temperature, pressure):
+    """
+    Calculate the humidity ratio with a wet bulb temperature of 0 C over
+    liquid water. Drier air has its wet bulb temperature over ice.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+
+    Returns
+    -------
+    humidity_ratio : array
+        Humidity ratio [kg_w/kg_da].
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 33
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    saturation_humidity_ratio = calculate_humidity_ratio(calculate_saturation_pressure(0.0, True), pressure)
+    return (2501*saturation_humidity_ratio - 1.006*temperature)/(2501 + 1.86*temperature)
+
+
+def solve_newton(residual, initial_value, tolerance=1e-6, maximum_iterations=50, upper_bound=None):
+    """
+    Solve equations element by element with Newton iterations on arrays.
+
+    Only the elements that have not converged are evaluated in each
+    iteration. An element converges when its Newton step is within the
+    tolerance, elements that do not converge keep their last value. Steps
+    past the upper bound of an element are limited to the bound.
+
+    Parameters
+    ----------
+    residual : callable
+        residual(x, index) returning the residual and its derivative for the
+        unconverged values x at the flat indices index.
+    initial_value : array
+        Initial values, NaN values are not solved.
+    tolerance : float
+        Largest Newton step of a converged element.
+    maximum_iterations : int
+    upper_bound : array
+        Largest value of each element.
+
+    Returns
+    -------
+    solution : array
+    converged : array of bool
+    """
+    x = np.array(initial_value, dtype=float).ravel()
+    if upper_bound is not None:
+        upper_bound = np.broadcast_to(np.asarray(upper_bound, dtype=float), np.shape(initial_value)).ravel()
+        x = np.minimum(x, upper_bound)
+    converged = np.zeros(x.shape, dtype=bool)
+    active = np.flatnonzero(np.isfinite(x))
+    for _ in range(maximum_iterations):
+        if active.size == 0:
+            break
+        f, df = residual(x[active], active)
+        step = f/df
+        if upper_bound is not None:
+            step = np.maximum(step, x[active] - upper_bound[active])
+        x[active] -= step
+        done = np.abs(step) <= tolerance
+        converged[active[done]] = True
+        active = active[~done & np.isfinite(step)]
+    shape = np.shape(initial_value)
+    return x.reshape(shape), converged.reshape(shape)
+
+
+def solve_wet_bulb_temperature(temperature, humidity_ratio, pressure, tolerance=1e-6, maximum_iterations=50, water=None):
+    """
+    Solve the psychrometric equation for the thermodynamic wet bulb
+    temperature, over ice when the equation over liquid water has a wet
+    bulb temperature below 0 C. The equations over ice and water both have
+    solutions in a narrow band of humidity ratios, so the phase is chosen
+    from the humidity ratio to make the wet bulb temperature unique.
+
+    Parameters
+    ----------
+    temperature : float or array
+        Dry bulb temperature [C].
+    humidity_ratio : float or array
+        Humidity ratio [kg_w/kg_da].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+    tolerance : float
+        Convergence tolerance of the wet bulb temperature [C].
+    maximum_iterations : int
+    water : bool or array of bool
+        Optional phase of each element, True over liquid water and False
+        over ice, instead of the phase from the humidity ratio.
+
+    Returns
+    -------
+    wet_bulb_temperature : array
+        Wet bulb temperature [C].
+    converged : array of bool
+
+    References
+    --------
+    2017 ASHRAE Handbook of Fundamentals, Chapter 1, Eq. 33 and 35
+    """
+    shape = np.broadcast(np.asarray(temperature), np.asarray(humidity_ratio), np.asarray(pressure)).shape
+    temperature, humidity_ratio, pressure = (np.ravel(x) for x in np.broadcast_arrays(
+        np.asarray(temperature, dtype=float), np.asarray(humidity_ratio, dtype=float), np.asarray(pressure, dtype=float)))
+    if water is None:
+        water = humidity_ratio >= calculate_freezing_wet_bulb_humidity_ratio(temperature, pressure)
+    else:
+        water = np.ravel(np.broadcast_to(np.asarray(water, dtype=bool), shape))
+
+    def residual(wet_bulb_temperature, index):
+        t = temperature[index]
+        p = pressure[index]
+        ice = ~water[index]
+        a = np.where(ice, 2830.0, 2501.0)
+        b = np.where(ice, 0.24, 2.326)
+        d = np.where(ice, 2.1, 4.186)
+        saturation_pressure = calculate_saturation_pressure(wet_bulb_temperature, ~ice)
+        saturation_humidity_ratio = MOLECULAR_MASS_RATIO*saturation_pressure/(p - saturation_pressure)
+        saturation_humidity_ratio_derivative = (
+            MOLECULAR_MASS_RATIO*p*calculate_saturation_pressure_derivative(wet_bulb_temperature, ~ice)/(p - saturation_pressure)**2
+        )
+        numerator = (a - b*wet_bulb_temperature)*saturation_humidity_ratio - 1.006*(t - wet_bulb_temperature)
+        denominator = a + 1.86*t - d*wet_bulb_temperature
+        numerator_derivative = -b*saturation_humidity_ratio + (a - b*wet_bulb_temperature)*saturation_humidity_ratio_derivative + 1.006
+        derivative = (numerator_derivative*denominator + numerator*d)/denominator**2
+        return numerator/denominator - humidity_ratio[index], derivative
+
+    # Start between the dew point and the dry bulb temperature, or below the
+    # dry bulb temperature for dry air without a dew point
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dew_point_temperature = calculate_dew_point_temperature(calculate_vapor_pressure(humidity_ratio, pressure))
+    initial_value = np.where(
+        np.isfinite(dew_point_temperature),
+        np.minimum(dew_point_temperature + (temperature - dew_point_temperature)/3, temperature),
+        temperature - 10,
+    )
+    wet_bulb_temperature, converged = solve_newton(residual, initial_value, tolerance, maximum_iterations)
+    return wet_bulb_temperature.reshape(shape), converged.reshape(shape)
+
+
+def solve_dry_bulb_temperature(enthalpy, relative_humidity, pressure, tolerance=1e-6, maximum_iterations=50):
+    """
+    Solve for the dry bulb temperature of moist air with an enthalpy and a
+    relative humidity.
+
+    The enthalpy increases with temperature and is convex, so the
+    iterations start from the dry air temperature of the enthalpy, which is
+    above the solution, and decrease to it. The temperatures are kept below
+    the dew point of a vapor pressure of 0.6 times the pressure, over the
+    relative humidity, so the humidity ratio stays finite.
+
+    Parameters
+    ----------
+    enthalpy : float or array
+        Moist air specific enthalpy [J/kg_da].
+    relative_humidity : float or array
+        Relative humidity [0-1].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+    tolerance : float
+        Convergence tolerance of the dry bulb temperature [C].
+    maximum_iterations : int
+
+    Returns
+    -------
+    dry_bulb_temperature : array
+        Dry bulb temperature [C].
+    converged : array of bool
+    """
+    shape = np.broadcast(np.asarray(enthalpy), np.asarray(relative_humidity), np.asarray(pressure)).shape
+    enthalpy, relative_humidity, pressure = (np.ravel(x) for x in np.broadcast_arrays(
+        np.asarray(enthalpy, dtype=float), np.asarray(relative_humidity, dtype=float), np.asarray(pressure, dtype=float)))
+
+    def residual(temperature, index):
+        p = pressure[index]
+        vapor_pressure = relative_humidity[index]*calculate_saturation_pressure(temperature)
+        humidity_ratio = MOLECULAR_MASS_RATIO*vapor_pressure/(p - vapor_pressure)
+        humidity_ratio_derivative = (
+            MOLECULAR_MASS_RATIO*p*relative_humidity[index]*calculate_saturation_pressure_derivative(temperature)/(p - vapor_pressure)**2
+        )
+        derivative = (
+            DRY_AIR_SPECIFIC_HEAT + WATER_VAPOR_SPECIFIC_HEAT*humidity_ratio
+            + (WATER_VAPORIZATION_ENTHALPY + WATER_VAPOR_SPECIFIC_HEAT*temperature)*humidity_ratio_derivative
+        )
+        return calculate_enthalpy(temperature, humidity_ratio) - enthalpy[index], derivative
+
+    upper_bound = calculate_dew_point_temperature(0.6*pressure/np.maximum(relative_humidity, 1e-6))
+    dry_bulb_temperature, converged = solve_newton(
+        residual, enthalpy/DRY_AIR_SPECIFIC_HEAT, tolerance, maximum_iterations, upper_bound
+    )
+    return dry_bulb_temperature.reshape(shape), converged.reshape(shape)
+
+
+def solve_dew_point_temperature(humidity_ratio, pressure, tolerance=1e-6, maximum_iterations=50):
+    """
+    Solve the Hyland-Wexler equations for the dew point temperature of a
+    humidity ratio, the frost point below 0 C.
+
+    Parameters
+    ----------
+    humidity_ratio : float or array
+        Humidity ratio [kg_w/kg_da].
+    pressure : float or array
+        Atmospheric pressure [Pa].
+    tolerance : float
+        Convergence tolerance of the dew point temperature [C].
+    maximum_iterations : int
+
+    Returns
+    -------
+    dew_point_temperature : array
+        Dew point temperature [C].
+    converged : array of bool
+    """
+    vapor_pressure = np.ravel(calculate_vapor_pressure(humidity_ratio, pressure))
+    shape = np.broadcast(np.asarray(humidity_ratio), np.asarray(pressure)).shape
+    vapor_pressure = np.where(vapor_pressure > 0, vapor_pressure, np.nan)
+    logarithmic_vapor_pressure = np.log(vapor_pressure)
+
+    # The phase is fixed by the vapor pressure, so each element is solved on
+    # one smooth equation
+    water = vapor_pressure >= calculate_saturation_pressure(0.0)
 
+    def residual(temperature, index):
+        saturation_pressure = calculate_saturation_pressure(temperature, water[index])
+        return (
+            np.log(saturation_pressure) - logarithmic_vapor_pressure[index],
+            calculate_saturation_pressure_derivative(temperature, water[index])/saturation_pressure,
+        )
 
-class MoistAir: #(TimeSeriesComponent):
+    initial_value = calculate_dew_point_temperature(vapor_pressure)
+    dew_point_temperature, converged = solve_newton(residual, initial_value, tolerance, maximum_iterations)
+    return dew_point_temperature.reshape(shape), converged.reshape(shape)
+
+
+class SaturationPressureTable:
+    """
+    Table of the saturation pressure for fast evaluation without exp and log.
+
+    The saturation pressure and its derivative are stored at equally spaced
+    temperatures and interpolated with cubic Hermite polynomials. Each
+    interval uses the ice or water equation of its lower temperature, so the
+    change of equation at 0 C is a table node. Temperatures outside the table
+    use the Hyland-Wexler equations. With the default 0.5 C resolution the
+    largest relative error is below 1e-7.
+
+    Parameters
+    ----------
+    minimum_temperature : float
+        Lowest temperature of the table [C].
+    maximum_temperature : float
+        Highest temperature of the table [C].
+    resolution : float
+        Temperature step of the table [C]. 0 C should be a multiple of the
+        step from the minimum temperature.
+
+    Attributes
+    ----------
+    temperature : array
+        Table temperatures [C].
+    coefficients : array
+        Hermite polynomial coefficients of each interval (4, interval).
+    maximum_relative_error : float
+        Largest relative error against the Hyland-Wexler equations, sampled
+        at 8 points per interval.
+    """
+    def __init__(self, minimum_temperature=-60.0, maximum_temperature=100.0, resolution=0.5):
+        self.minimum_temperature = minimum_temperature
+        self.maximum_temperature = maximum_temperature
+        self.resolution = resolution
+        self.temperature = None
+        self.coefficients = None
+        self.maximum_relative_error = None
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_table()
+        self.calculate_maximum_relative_error()
+
+    def calculate_table(self):
+        """
+        Calculate the polynomial coefficients of each interval, in powers of
+        the position in the interval, with the values and derivatives of the
+        equation of the interval at both ends.
+
+        Yields
+        ----------
+        temperature : array
+        coefficients : array
+        """
+        number_of_intervals = int(round((self.maximum_temperature - self.minimum_temperature)/self.resolution))
+        self.temperature = self.minimum_temperature + self.resolution*np.arange(number_of_intervals + 1)
+        lower = self.temperature[:-1]
+        upper = self.temperature[1:]
+
+        # Evaluate both ends with the equation of the lower end
+        water = lower >= 0
+        p0 = calculate_saturation_pressure(lower, water)
+        p1 = calculate_saturation_pressure(upper, water)
+        m0 = self.resolution*calculate_saturation_pressure_derivative(lower, water)
+        m1 = self.resolution*calculate_saturation_pressure_derivative(upper, water)
+
+        self.coefficients = np.array([
+            p0,
+            m0,
+            3*(p1 - p0) - 2*m0 - m1,
+            2*(p0 - p1) + m0 + m1,
+        ])
+
+    def calculate_maximum_relative_error(self):
+        """
+        Sample the relative error of the table inside each interval.
+
+        Yields
+        ----------
+        maximum_relative_error : float
+        """
+        temperature = (self.temperature[:-1, None] + self.resolution*np.arange(1, 9)/9).ravel()
+        exact = calculate_saturation_pressure(temperature)
+        self.maximum_relative_error = float(np.max(np.abs(self.calculate_saturation_pressure(temperature)/exact - 1)))
+
+    def calculate_saturation_pressure(self, temperature):
+        """
+        Interpolate the saturation pressure.
+
+        Parameters
+        ----------
+        temperature : float or array
+            Dry bulb temperature [C].
+
+        Returns
+        -------
+        saturation_pressure : array
+            Water vapor saturation pressure [Pa].
+        """
+        temperature = np.asarray(temperature, dtype=float)
+        position = (temperature - self.minimum_temperature)/self.resolution
+        index = np.clip(np.floor(position).astype(int), 0, self.coefficients.shape[1] - 1)
+        s = position - index
+        c0, c1, c2, c3 = self.coefficients
+        saturation_pressure = c0.take(index) + s*(c1.take(index) + s*(c2.take(index) + s*c3.take(index)))
+
+        outside = (temperature < self.minimum_temperature) | (temperature > self.maximum_temperature)
+        if outside.any():
+            saturation_pressure = np.where(outside, calculate_saturation_pressure(np.where(outside, temperature, 0.0)), saturation_pressure)
+        return saturation_pressure
+
+
+class PsychrometricTable:
+    """
+    Table of a psychrometric function on a regular grid, interpolated
+    linearly along each axis.
+
+    Values outside the grid are clipped to the grid. The largest error is
+    sampled at the centre of each cell, where linear interpolation of a
+    smooth function is furthest from the function.
+
+    Parameters
+    ----------
+    function : callable
+        Function of one array per axis.
+    axes : list of tuple
+        (minimum, maximum, step) of each axis.
+
+    Attributes
+    ----------
+    grid : list of array
+        Values of each axis.
+    values : array
+        Function values on the grid.
+    maximum_error : float
+        Largest absolute error sampled at the cell centres.
+    """
+    def __init__(self, function, axes):
+        self.function = function
+        self.axes = [tuple(float(value) for value in axis) for axis in axes]
+        self.grid = None
+        self.values = None
+        self.maximum_error = None
+        self._strides = None
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_table()
+        self.calculate_maximum_error()
+
+    def calculate_table(self):
+        """
+        Evaluate the function on the grid.
+
+        Yields
+        ----------
+        grid : list of array
+        values : array
+        """
+        self.grid = [
+            minimum + step*np.arange(int(round((maximum - minimum)/step)) + 1)
+            for minimum, maximum, step in self.axes
+        ]
+        self.values = np.ascontiguousarray(self.function(*np.meshgrid(*self.grid, indexing='ij')), dtype=float)
+        self._strides = [stride//self.values.itemsize for stride in self.values.strides]
+
+    def calculate_maximum_error(self):
+        """
+        Compare the interpolation and the function at the cell centres.
+
+        Yields
+        ----------
+        maximum_error : float
+        """
+        centres = [(axis[:-1] + axis[1:])/2 for axis in self.grid]
+        points = np.meshgrid(*centres, indexing='ij')
+        self.maximum_error = float(np.nanmax(np.abs(self.interpolate(*points) - self.function(*points))))
+
+    def interpolate(self, *values):
+        """
+        Interpolate the function.
+
+        Parameters
+        ----------
+        values : float or array
+            Values of each axis.
+
+        Returns
+        -------
+        result : array
+        """
+        flat_index = 0
+        weights = []
+        strides = []
+        for value, (minimum, maximum, step), axis, stride in zip(values, self.axes, self.grid, self._strides):
+            position = (np.clip(np.asarray(value, dtype=float), minimum, maximum) - minimum)/step
+            index = np.minimum(position.astype(np.intp), len(axis) - 2)
+            flat_index = flat_index + index*stride
+            weights.append(position - index)
+            strides.append(stride)
+
+        values = self.values.ravel()
+        result = 0.0
+        for corner in np.ndindex(*(2,)*len(weights)):
+            weight = 1.0
+            for offset, w in zip(corner, weights):
+                weight = weight*(w if offset else 1 - w)
+            result = result + weight*values.take(flat_index + sum(offset*stride for offset, stride in zip(corner, strides)))
+        return result
+
+
+_TABLE_CACHE = {}
+
+
+def get_saturation_pressure_table():
+    """
+    Get the shared default saturation pressure table.
+
+    Returns
+    -------
+    saturation_pressure_table : SaturationPressureTable
+    """
+    if 'saturation_pressure' not in _TABLE_CACHE:
+        _TABLE_CACHE['saturation_pressure'] = SaturationPressureTable()
+    return _TABLE_CACHE['saturation_pressure']
+
+
+def _solve_wet_bulb_temperature_from_relative_humidity(temperature, relative_humidity, pressure, water=None):
+    humidity_ratio = calculate_humidity_ratio_from_relative_humidity(temperature, relative_humidity, pressure)
+    return solve_wet_bulb_temperature(temperature, humidity_ratio, pressure, water=water)[0]
+
+
+class WetBulbTable:
+    """
+    Tables of the wet bulb temperature over liquid water and over ice, for
+    dry bulb temperature, relative humidity and pressure axes.
+
+    The wet bulb temperature jumps where the psychrometric equation changes
+    from water to ice, so each equation is tabulated on its own over the
+    whole grid, where it is smooth, and the phase of each state is chosen
+    from its humidity ratio as in solve_wet_bulb_temperature. States outside
+    the grid are solved with solve_wet_bulb_temperature.
+
+    Parameters
+    ----------
+    axes : list of tuple
+        (minimum, maximum, step) of the dry bulb temperature [C], relative
+        humidity [0-1] and pressure [Pa] axes.
+
+    Attributes
+    ----------
+    water_table : PsychrometricTable
+        Wet bulb temperature over liquid water.
+    ice_table : PsychrometricTable
+        Wet bulb temperature over ice.
+    maximum_error : float
+        Largest absolute error of the two tables sampled at the cell centres.
+    """
+    def __init__(self, axes):
+        self.axes = axes
+        self.water_table = None
+        self.ice_table = None
+        self.maximum_error = None
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_tables()
+
+    def calculate_tables(self):
+        """
+        Tabulate the wet bulb temperature over water and over ice.
+
+        Yields
+        ----------
+        water_table : PsychrometricTable
+        ice_table : PsychrometricTable
+        maximum_error : float
+        """
+        self.water_table = PsychrometricTable(
+            lambda t, rh, p: _solve_wet_bulb_temperature_from_relative_humidity(t, rh, p, water=True), self.axes
+        )
+        self.ice_table = PsychrometricTable(
+            lambda t, rh, p: _solve_wet_bulb_temperature_from_relative_humidity(t, rh, p, water=False), self.axes
+        )
+        self.maximum_error = max(self.water_table.maximum_error, self.ice_table.maximum_error)
+
+    def interpolate(self, temperature, relative_humidity, pressure):
+        """
+        Interpolate the wet bulb temperature.
+
+        Parameters
+        ----------
+        temperature : float or array
+            Dry bulb temperature [C].
+        relative_humidity : float or array
+            Relative humidity [0-1].
+        pressure : float or array
+            Atmospheric pressure [Pa].
+
+        Returns
+        -------
+        wet_bulb_temperature : array
+            Wet bulb temperature [C].
+        """
+        temperature, relative_humidity, pressure = np.broadcast_arrays(
+            np.asarray(temperature, dtype=float), np.asarray(relative_humidity, dtype=float), np.asarray(pressure, dtype=float))
+        humidity_ratio = calculate_humidity_ratio_from_relative_humidity(temperature, relative_humidity, pressure)
+        water = humidity_ratio >= calculate_freezing_wet_bulb_humidity_ratio(temperature, pressure)
+        wet_bulb_temperature = np.where(
+            water,
+            self.water_table.interpolate(temperature, relative_humidity, pressure),
+            self.ice_table.interpolate(temperature, relative_humidity, pressure),
+        )
+
+        outside = np.zeros(temperature.shape, dtype=bool)
+        for value, (minimum, maximum, step) in zip((temperature, relative_humidity, pressure), self.axes):
+            outside |= (value < minimum) | (value > maximum)
+        if outside.any():
+            wet_bulb_temperature[outside] = solve_wet_bulb_temperature(
+                temperature[outside], humidity_ratio[outside], pressure[outside])[0]
+        return wet_bulb_temperature
+
+
+def get_wet_bulb_table():
+    """
+    Get the shared default wet bulb table of the psychrometric equation,
+    over -40 to 60 C dry bulb in 0.5 C steps, 1 to 100 % relative humidity
+    in 1 % steps and 60 to 110 kPa in 5 kPa steps. The error is within
+    0.02 C, states outside the grid are solved.
+
+    Returns
+    -------
+    wet_bulb_table : WetBulbTable
+    """
+    if 'wet_bulb_temperature' not in _TABLE_CACHE:
+        _TABLE_CACHE['wet_bulb_temperature'] = WetBulbTable(
+            [(-40.0, 60.0, 0.5), (0.01, 1.0, 0.01), (60000.0, 110000.0, 5000.0)],
+        )
+    return _TABLE_CACHE['wet_bulb_temperature']
+
+
+class MoistAir:
     """Models psychrometric properties for moist air
+
+    The properties are calculated for whole Series from the dry bulb
+    temperature and either the humidity ratio or the relative humidity. The
+    last one set with set_humidity_ratio or set_relative_humidity is kept
+    and the other is recalculated from it, so a new temperature keeps the
+    given humidity. The pressure defaults to the standard pressure of the
+    site elevation.
+
+    In exact mode the wet bulb and dew point temperatures are solved with
+    Newton iterations. In table mode the saturation pressure and the wet
+    bulb temperature are interpolated from shared tables, see
+    SaturationPressureTable and get_wet_bulb_table for the errors, and the
+    dew point temperature uses the ASHRAE fit.
+
     Parameters
     ----------
     time
     site
+    mode : string
+        'exact' to evaluate the equations or 'table' to interpolate tables.
 
     Attributes
     ----------
     standard_pressure : Float
         Standard pressure [Pa].
-    standard_temperature : Float
-        Standard temperature [C].
     dry_air_specific_heat : Float
         Dry air specific heat [J/kg-K].
     water_vapor_specific_heat : Float
         Water vapor specific heat [J/kg-K].
-    pressure : Float
-        Air pressure [Pa].
-    dry_bulb_temperature : Float
+    pressure : Series
+        Air pressure [Pa], the standard pressure is used if not set.
+    dry_bulb_temperature : Series
         Dry-bulb temperature [C].
-    wet_bulb_temperature : Float
+    wet_bulb_temperature : Series
         Wet-bulb temperature [C].
-    dew_point_temperature : Float
+    dew_point_temperature : Series
         Dew-point temperature [C].
-    humidity_ratio : Float
-        Humidity ratio [kg_w/kd_da].
-    relative_humidity : Float
-        Relative humidity [].
-    moist_air_density : Float
+    humidity_ratio : Series
+        Humidity ratio [kg_w/kg_da].
+    relative_humidity : Series
+        Relative humidity [0-1].
+    saturation_pressure : Series
+        Water vapor saturation pressure [Pa].
+    vapor_pressure : Series
+        Water vapor partial pressure [Pa].
+    enthalpy : Series
+        Moist air specific enthalpy [J/kg_da].
+    specific_volume : Series
+        Specific volume [m^3/kg_da].
+    moist_air_density : Series
         Moist air density [kg/m^3]
+    converged : Series
+        Whether the wet bulb and dew point temperatures converged in exact
+        mode, a RuntimeWarning is raised for the states that did not.
     """
-    def __init__(self, time, site):
-        #self.volume_flow_rate = None
-        #self.mass_flow_rate = None
+    def __init__(self, time, site, mode='exact'):
+        if mode not in PSYCHROMETRIC_MODES:
+            raise ValueError('Unknown psychrometric mode %s, expected one of %s' % (mode, PSYCHROMETRIC_MODES))
+        self.mode = mode
 
         # Moist air parameters
         self.pressure = None
@@ -49,34 +991,30 @@ class MoistAir: #(TimeSeriesComponent):
         self.dew_point_temperature = None
         self.humidity_ratio = None
         self.relative_humidity = None
+        self.saturation_pressure = None
+        self.vapor_pressure = None
+        self.enthalpy = None
+        self.specific_volume = None
         self.moist_air_density = None
+        self.converged = None
+        self._humidity_input = None
 
         # Moist air properties
         self.standard_pressure = None
-        self.standard_temperature = None
-        self.dry_air_specific_heat = 1000
-        self.water_vapor_specific_heat = 1864
+        self.dry_air_specific_heat = DRY_AIR_SPECIFIC_HEAT
+        self.water_vapor_specific_heat = WATER_VAPOR_SPECIFIC_HEAT
 
         # General Properties
+        self.time = time
         self._site = site
 
-        # Add attributes from super class
-        #super().__init__(time)
-
         # Run method to update all calculated values
-        #self.update_calculated_values()
+        self.update_calculated_values()
 
     def update_calculated_values(self):
-        pass
-
-    """
-    def calculate_volume_flow_rate(self):
-
-        volumeflowrate = zeros(len(massflowrate))
-        volumeflowrate[massflowrate > 0] = massflowrate[massflowrate > 0]/density[massflowrate > 0]
-
-        return volumeflowrate
-    """
+        self.calculate_standard_pressure()
+        if self.dry_bulb_temperature is not None and (self.humidity_ratio is not None or self.relative_humidity is not None):
+            self.calculate_properties()
 
     def calculate_standard_pressure(self):
         """
@@ -92,20 +1030,109 @@ class MoistAir: #(TimeSeriesComponent):
 
         References
         --------
-        2009 ASHRAE Handbook of Fundamentals, Chapter 1
+        2017 ASHRAE Handbook of Fundamentals, Chapter 1
         """
-        elevation = self.site.elevation
-        standard_pressure = 101.325*(1.0-2.25577*10**-5*elevation)**5.2559
-        self.standard_pressure = standard_pressure
+        self.standard_pressure = float(calculate_standard_pressure(self.site.elevation))
 
     def set_temperature(self, temperature):
-        self.temperature = pd.Series(temperature)
+        self.dry_bulb_temperature = pd.Series(temperature)
 
     def set_pressure(self, pressure):
         self.pressure = pd.Series(pressure)
 
     def set_humidity_ratio(self, humidity_ratio):
         self.humidity_ratio = pd.Series(humidity_ratio)
+        self.relative_humidity = None
+        self._humidity_input = 'humidity_ratio'
+
+    def set_relative_humidity(self, relative_humidity):
+        self.relative_humidity = pd.Series(relative_humidity)
+        self.humidity_ratio = None
+        self._humidity_input = 'relative_humidity'
+
+    def set_weather(self, weather):
+        """
+        Use the dry bulb temperature, relative humidity and pressure of a
+        weather file.
+
+        Parameters
+        ----------
+        weather : EPW
+        """
+        self.set_temperature(weather.dry_bulb_temperature)
+        self.set_relative_humidity(np.asarray(weather.relative_humidity, dtype=float)/100)
+        if weather.atmospheric_pressure is not None:
+            self.set_pressure(weather.atmospheric_pressure)
+        self.calculate_properties()
+
+    def calculate_properties(self):
+        """
+        Calculate the psychrometric properties of the Series.
+
+        Yields
+        ----------
+        saturation_pressure : Series
+        humidity_ratio : Series
+        relative_humidity : Series
+        vapor_pressure : Series
+        enthalpy : Series
+        dew_point_temperature : Series
+        wet_bulb_temperature : Series
+        specific_volume : Series
+        moist_air_density : Series
+        """
+        temperature = np.asarray(self.dry_bulb_temperature, dtype=float)
+        pressure = self.get_pressure()
+
+        if self.mode == 'table':
+            saturation_pressure = get_saturation_pressure_table().calculate_saturation_pressure(temperature)
+        else:
+            saturation_pressure = calculate_saturation_pressure(temperature)
+        humidity_input = self._humidity_input
+        if humidity_input is None:
+            humidity_input = 'relative_humidity' if self.humidity_ratio is None else 'humidity_ratio'
+        if humidity_input == 'relative_humidity':
+            vapor_pressure = np.asarray(self.relative_humidity, dtype=float)*saturation_pressure
+            humidity_ratio = calculate_humidity_ratio(vapor_pressure, pressure)
+            self.humidity_ratio = pd.Series(humidity_ratio)
+        else:
+            humidity_ratio = np.asarray(self.humidity_ratio, dtype=float)
+            vapor_pressure = calculate_vapor_pressure(humidity_ratio, pressure)
+            self.relative_humidity = pd.Series(vapor_pressure/saturation_pressure)
+
+        self.saturation_pressure = pd.Series(saturation_pressure)
+        self.vapor_pressure = pd.Series(vapor_pressure)
+        self.enthalpy = pd.Series(calculate_enthalpy(temperature, humidity_ratio))
+        if self.mode == 'table':
+            dew_point_temperature = calculate_dew_point_temperature(vapor_pressure)
+            wet_bulb_temperature = get_wet_bulb_table().interpolate(temperature, self.relative_humidity, pressure)
+            self.converged = None
+        else:
+            dew_point_temperature, dew_point_converged = solve_dew_point_temperature(humidity_ratio, pressure)
+            wet_bulb_temperature, wet_bulb_converged = solve_wet_bulb_temperature(temperature, humidity_ratio, pressure)
+            converged = np.broadcast_to(dew_point_converged & wet_bulb_converged, np.shape(temperature))
+            self.converged = pd.Series(converged)
+            if not converged.all():
+                warnings.warn(
+                    'Wet bulb or dew point temperature did not converge for %d of %d states' % (np.sum(~converged), converged.size),
+                    RuntimeWarning,
+                )
+        self.dew_point_temperature = pd.Series(dew_point_temperature)
+        self.wet_bulb_temperature = pd.Series(wet_bulb_temperature)
+        self.specific_volume = pd.Series(calculate_specific_volume(temperature, humidity_ratio, pressure))
+        self.calculate_density()
+
+    def get_pressure(self):
+        """
+        Get the air pressure, or the standard pressure if it is not set.
+
+        Returns
+        -------
+        pressure : float or array
+        """
+        if self.pressure is None:
+            return self.standard_pressure
+        return np.asarray(self.pressure, dtype=float)
 
     def calculate_density(self):
         """
@@ -114,131 +1141,18 @@ class MoistAir: #(TimeSeriesComponent):
         Parameters
         ----------
         pressure : Series
+        dry_bulb_temperature : Series
+        humidity_ratio : Series
 
         Yields
         ----------
-        density : Series
+        moist_air_density : Series
 
         References
         --------
-        2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        """
-
-        pressure = self.pressure
-        temperature = self.dry_bulb_temperature
-        humidity_ratio = self.humidity_ratio
-        density = 1/(0.370486 * (temperature + 459.67) * (1 + 1.607858 * humidity_ratio) / (pressure))
-        self.density = pd.Series(density)
-
-
-    """
-    def calculate_standard_temperature(self):
-        #SOURCE: 2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        temperature = 59 - 0.00356620*elevation
-        return temperature
-
-    def calculate_water_vapor_saturation_pressure(self):
-        #Determine coefficients for IP units
-        if (temperature <= 32):
-            Coeff = [-1.0214165e4, -4.8932428e0, -5.3765794e-3, 1.9202377e-7, 3.5575832e-10, -9.0344688e-14 ,4.1635019e0]
-        elif (temperature > 32):
-            Coeff = [-1.0440397e4, -1.1294650e1, -2.7022355e-2, 1.2890360e-5, -2.4780681e-9, 0, 6.5459673e0]
-        Tabs = temperature + 459.67
-        #Calculate the water vapor saturation pressure [psia] from temperature [R]
-        water_vapor_saturation_partial_pressure = math.exp(Coeff[0]/Tabs + Coeff[1] + Coeff[2]*Tabs + Coeff[3]*Tabs**2 + Coeff[4]*Tabs**3 + Coeff[5]*Tabs**4 + Coeff[6]*math.log(Tabs))
-        return water_vapor_saturation_partial_pressure
-
-    def calculateWaterVaporPartialPressureFromRelativeHumidity(self, relative_humidity, water_vapor_saturation_partial_pressure):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        #Calculate water vapor partial pressure in psia
-        water_vapor_partial_pressure = relative_humidity*water_vapor_saturation_partial_pressure
-        return water_vapor_partial_pressure
-
-    def calculateSaturationHumidityRatio(self, pressure, water_vapor_saturation_partial_pressure):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        #Calculate humidity ratio of saturated air
-        humidity_ratio_saturation = 0.621945 * water_vapor_saturation_partial_pressure / (pressure - water_vapor_saturation_partial_pressure)
-        return humidity_ratio_saturation
-
-    def calculateHumidityRatio(self, pressure, water_vapor_partial_pressure):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        #Calculate the humidity ratio from pressures in psia
-        humidity_ratio = 0.621945 * water_vapor_partial_pressure / (pressure - water_vapor_partial_pressure)
-        #humidRat [lbw/lbda], self.water_vapor_partial_pressure [psia], p [psia]#End Function
-        return humidity_ratio
-
-    def calculateRelativeHumidity(self, pressure, water_vapor_partial_pressure, degree_of_saturation):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        relative_humidity = min(degree_of_saturation / (1 - (1 - degree_of_saturation) * (water_vapor_partial_pressure / pressure)), 1.0)
-        # relHum [], degSat [], self.water_vapor_partial_pressure [psia], p [psia]#End Function
-        return relative_humidity
-
-    def calculateDegreeOfSaturation(self, humidity_ratio, humidity_ratio_saturation):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        degree_of_saturation = humidity_ratio/humidity_ratio_saturation
-        return degree_of_saturation
-
-    def calculateSpecificVolume(self, pressure, temperature, humidity_ratio):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        #Label of in hg is incorrect in fundamentals.  Should be in psia
-        #pHg = self.units.convertPressure(pressure,'psi','inhg')
-        specific_volume = 0.370486 * (temperature + 459.67) * (1 + 1.607858 * humidity_ratio) / (pressure)
-        # specVolAir [ft3/lbda], T [F], W [lbw/lbda], p [in Hg]
-        return specific_volume
-
-    def calculateMixedAirDensity(self, pressure, temperature, humidity_ratio):
-        #pHg = self.units.convertPressure(pressure,'psi','inhg')
-        #Label of in hg is incorrect in fundamentals.  Should be in psia
-
-
-        # Check to see if value is in float or array format
-        if isinstance(pressure, ndarray):
-            max_pressure = max(pressure)
-            max_humidity = max(humidity_ratio)
-        else:
-            max_pressure = pressure
-            max_humidity = humidity_ratio
-
-        # Check to see if values exist in arrays
-        if max_pressure > 0 and max_humidity > 0:
-            mixed_air_density = 1/(0.370486 * (temperature + 459.67) * (1 + 1.607858 * humidity_ratio) / (pressure))
-            # mixAirDens [lbda/ft3], T [F], W [lbw/lbda], p [in Hg]
-        else:
-            mixed_air_density = zeros(len(pressure))
-
-        return mixed_air_density
-
-    def calculateDewPointTemperature(self, water_vapor_partial_pressure):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        temperature_dew_point = 100.45 + 33.193*math.log(water_vapor_partial_pressure) + 2.319*math.log(water_vapor_partial_pressure)**2 + 0.17074*math.log(water_vapor_partial_pressure)**3 + 1.2063*(water_vapor_partial_pressure)**0.1984
-        if (temperature_dew_point < 32):
-            temperature_dew_point = 90.12 + 26.142*math.log(water_vapor_partial_pressure) + 0.8927*math.log(water_vapor_partial_pressure)**2
-        return temperature_dew_point
-
-    def calculateWetBulbTemperature(self, temperature, relative_humidity):
-        #SOURCE: Stull, 2011.  "Wet-bulb temperature from relative humidity and air temperature". Journal of Applied Meteorology and Climatology.
-        #applicable to temperatures between -20 and 50 C and RH between 5% and 100%
-        relative_humidity = relative_humidity*100.0
-        temperature = self.units.convert_units('temperature', temperature, 'F', 'C')
-        temperature_wetbulb = temperature*math.atan(0.151977*(relative_humidity+8.313659)**0.5) + math.atan(temperature + relative_humidity) - math.atan(relative_humidity - 1.676331) + 0.00391838*(relative_humidity)**1.5*math.atan(0.023101*relative_humidity) - 4.686035
-        temperature_wetbulb = self.units.convert_units('temperature', temperature_wetbulb, 'C', 'F')
-        return temperature_wetbulb
-
-    def calculateDryAirSpecificEnthalpy(self, temperature):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        enthalpy = self.dry_air_specific_heat*temperature
-        return enthalpy
-
-    def calculateWaterVaporSpecificEnthalpy(self, temperature, humidity_ratio):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        enthalpy = humidity_ratio*(1061.0+self.water_vapor_specific_heat*temperature)
-        return enthalpy
-
-    def calculateMixedAirSpecificEnthalpy(self, temperature, humidity_ratio):
-        #SOURCE:  2009 ASHRAE Handbook of Fundamentals, Chapter 1
-        enthalpy =self.dry_air_specific_heat*temperature + humidity_ratio*(1061.0+self.water_vapor_specific_heat*temperature)
-        return enthalpy
-    """
+        2017 ASHRAE Handbook of Fundamentals, Chapter 1
+        """
+        self.moist_air_density = pd.Series(calculate_density(self.dry_bulb_temperature, self.humidity_ratio, self.get_pressure()))
 
     @property
     def site(self):
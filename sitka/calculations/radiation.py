@@ -3,7 +3,22 @@
 import numpy as np
 import pandas as pd
 
-from sitka.utils.time_series import TimeSeriesComponent
+from sitka.utils.time_series import TimeSeriesComponent, expand_compressed_values
+from sitka.calculations.solar import calculate_sun_surface_azimuth
+
+# Perez et al. (1990) sky clearness bin upper limits and brightness coefficients
+PEREZ_SKY_CLEARNESS_BINS = [1.065, 1.230, 1.500, 1.950, 2.800, 4.500, 6.200]
+PEREZ_COEFFICIENTS = np.array([
+    # F11, F12, F13, F21, F22, F23
+    [-0.0083117, 0.5877285, -0.0620636, -0.0596012, 0.0721249, -0.0220216],
+    [0.1299457, 0.6825954, -0.1513725, -0.0189325, 0.0659650, -0.0288748],
+    [0.3296958, 0.4868735, -0.2210958, 0.0554140, -0.0639588, -0.0260542],
+    [0.5682053, 0.1874525, -0.2951290, 0.1088631, -0.1519229, -0.0139754],
+    [0.8730280, -0.3920403, -0.3616149, 0.2255647, -0.4620442, 0.0012448],
+    [1.1326077, -1.2367284, -0.4118494, 0.2877813, -0.8230357, 0.0558651],
+    [1.0601591, -1.5999137, -0.3589221, 0.2642124, -1.1272340, 0.1310694],
+    [0.6777470, -0.3272588, -0.2504286, 0.1561313, -1.3765031, 0.2506212],
+])
 
 
 class ExternalShortwaveRadiation(TimeSeriesComponent):
@@ -17,12 +32,21 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
     weather : Weather
     surface : Surface
     surface_solar_angles : SurfaceSolarAngles
+    sky_model : PerezSkyModel
+        Optional anisotropic sky model used for the diffuse radiation. The
+        ASHRAE clear sky ratio is used when no sky model is given.
+    shading : ShadingMask
+        Optional exterior shading of the direct radiation, any object with a
+        calculate_sunlit_fraction(solar_azimuth, solar_altitude) method
+        (ShadingMask, SensorGroupShading).
 
     Attributes
     ----------
     ratio_of_clear_sky_diffuse_on_horizontal_to_tilted : Series
         Ratio of clear sky diffuse radiation on a horizontal surface to the
         clear sky diffuse radiation on a tilted surface [0-1].
+    sunlit_fraction : Series
+        Fraction of the surface exposed to direct radiation [0-1].
     incident_direct_radiation : Series
         Incident direct solar radiation on surface [W-m^2].
     incident_diffuse_radiation : Series
@@ -42,10 +66,13 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
     weather : Weather
     surface : Surface
     surface_solar_angles : SurfaceSolarAngles
+    sky_model : PerezSkyModel
+    shading : ShadingMask
     """
-    def __init__(self, time, solar_angles, weather, surface, surface_solar_angles):
+    def __init__(self, time, solar_angles, weather, surface, surface_solar_angles, sky_model=None, shading=None):
         # General properties
         self.ratio_of_clear_sky_diffuse_on_horizontal_to_tilted = None
+        self.sunlit_fraction = None
 
         # Incident solar radiation
         self.incident_direct_radiation = None
@@ -59,6 +86,8 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
         self._weather = weather
         self._surface = surface
         self._surface_solar_angles = surface_solar_angles
+        self._sky_model = sky_model
+        self._shading = shading
 
         # General Parameters
         self.ground_reflectance = 0.2  # Ground reflectance []
@@ -73,6 +102,7 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
     def update_calculated_values(self):
         print('Updating external shortwave radiation calculations.')
         self.calculate_ratio_of_clear_sky_diffuse_on_horizontal_to_tilted()
+        self.calculate_sunlit_fraction()
         self.calculate_incident_direct_radiation()
         self.calculate_incident_diffuse_radiation()
         self.calculate_incident_reflected_radiation()
@@ -82,7 +112,9 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
     def calculate_ratio_of_clear_sky_diffuse_on_horizontal_to_tilted(self):
         """
         Calculate the ratio of clear sky diffuse radiation on a horizontal
-        surface to a tilted surface for each item in the series.
+        surface to a tilted surface for each item in the series. Only the
+        daylight time steps are evaluated, the ratio is 0.55 when the sun is
+        down (incidence angle of 90 deg).
 
         Yields
         ----------
@@ -91,15 +123,41 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
         References
         --------
         """
-        cos_incidence_angle = np.cos(np.deg2rad(self.surface_solar_angles.incidence_angle))
+        index = self.solar_angles.daylight_index
+        cos_incidence_angle = np.cos(np.deg2rad(np.asarray(self.surface_solar_angles.incidence_angle)[index]))
         Y = 0.55+0.437*cos_incidence_angle+0.313*cos_incidence_angle**2
         Y[Y<0.45] = 0.45
+        Y = expand_compressed_values(Y, index, self.time.length, fill_value=0.55)
         self.ratio_of_clear_sky_diffuse_on_horizontal_to_tilted = pd.Series(Y)
 
+    def calculate_sunlit_fraction(self):
+        """
+        Calculate the fraction of the surface exposed to direct radiation
+        for each item in the series. Only the daylight time steps are
+        evaluated, the surface is fully sunlit when no shading is given.
+
+        Yields
+        ----------
+        sunlit_fraction : Series
+
+        References
+        --------
+        """
+        index = self.solar_angles.daylight_index
+        if self.shading is not None:
+            solar_azimuth = np.asarray(self.solar_angles.solar_azimuth, dtype=float)[index]
+            solar_altitude = np.asarray(self.solar_angles.solar_altitude, dtype=float)[index]
+            sunlit_fraction = self.shading.calculate_sunlit_fraction(solar_azimuth, solar_altitude)
+        else:
+            sunlit_fraction = np.ones(len(index))
+        sunlit_fraction = expand_compressed_values(sunlit_fraction, index, self.time.length)
+        self.sunlit_fraction = pd.Series(sunlit_fraction)
+
     def calculate_incident_direct_radiation(self):
         """
         Calculate the incident direct solar radiation on surface for each
-        item in the series.
+        item in the series, reduced by the sunlit fraction. Only the daylight
+        time steps are evaluated.
 
         Yields
         ----------
@@ -108,18 +166,21 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
         References
         --------
         """
-        sun_on_surface = self.surface_solar_angles.sun_on_surface.astype(float)
-        incidence_angle = np.deg2rad(self.surface_solar_angles.incidence_angle)
-        direct_normal_radiation = self.weather.direct_normal_radiation
-        incident_direct_radiation = direct_normal_radiation*np.cos(incidence_angle)
+        index = self.solar_angles.daylight_index
+        sun_on_surface = np.asarray(self.surface_solar_angles.sun_on_surface, dtype=float)[index]
+        cos_incidence_angle = np.cos(np.deg2rad(np.asarray(self.surface_solar_angles.incidence_angle)[index]))
+        direct_normal_radiation = np.asarray(self.weather.direct_normal_radiation, dtype=float)[index]
+        sunlit_fraction = np.asarray(self.sunlit_fraction)[index]
+        incident_direct_radiation = direct_normal_radiation*cos_incidence_angle*sunlit_fraction
         incident_direct_radiation[sun_on_surface == 0] = 0.0
-        incident_direct_radiation[np.cos(incidence_angle) < 0] = 0.0
+        incident_direct_radiation[cos_incidence_angle < 0] = 0.0
+        incident_direct_radiation = expand_compressed_values(incident_direct_radiation, index, self.time.length)
         self.incident_direct_radiation = pd.Series(incident_direct_radiation)
 
     def calculate_incident_diffuse_radiation(self):
         """
         Calculate the incident diffuse solar radiation on surface for each
-        item in the series.
+        item in the series, with the sky model if one is given.
 
         Yields
         ----------
@@ -128,21 +189,21 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
         References
         --------
         """
-        incidence_angle = np.deg2rad(self.surface_solar_angles.incidence_angle)
-        rad_surface_tilt = np.deg2rad(self.surface.tilt)
-        diffuse_horizontal_radiation = self.weather.diffuse_horizontal_radiation
-        Y = self.ratio_of_clear_sky_diffuse_on_horizontal_to_tilted
-        if self.surface.tilt<=90:
-            incident_diffuse_radiation = diffuse_horizontal_radiation*(Y*np.sin(rad_surface_tilt)+np.cos(rad_surface_tilt))
+        if self.sky_model is not None:
+            cos_incidence_angle = np.cos(np.deg2rad(np.asarray(self.surface_solar_angles.incidence_angle)))
+            incident_diffuse_radiation = self.sky_model.calculate_incident_diffuse_radiation(cos_incidence_angle, self.surface.tilt)
         else:
-            incident_diffuse_radiation = diffuse_horizontal_radiation*Y*np.sin(rad_surface_tilt)
+            diffuse_horizontal_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)
+            Y = np.asarray(self.ratio_of_clear_sky_diffuse_on_horizontal_to_tilted)
+            incident_diffuse_radiation = calculate_clear_sky_diffuse_radiation(diffuse_horizontal_radiation, Y, self.surface.tilt)
 
         self.incident_diffuse_radiation = pd.Series(incident_diffuse_radiation)
 
     def calculate_incident_reflected_radiation(self):
         """
         Calculate the incident reflected solar radiation on surface for each
-        item in the series.
+        item in the series. The direct component is only evaluated for the
+        daylight time steps.
 
         Yields
         ----------
@@ -151,12 +212,14 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
         References
         --------
         """
+        index = self.solar_angles.daylight_index
         ground_reflectance = self.ground_reflectance
-        direct_solar_radiation = self.weather.direct_normal_radiation
-        diffuse_solar_radiation = self.weather.diffuse_horizontal_radiation
-        rad_solar_altitude = np.deg2rad(self.solar_angles.solar_altitude)
-        rad_surface_tilt = np.deg2rad(self.surface.tilt)
-        incident_reflected_radiation = ground_reflectance*(direct_solar_radiation*np.sin(rad_solar_altitude)+diffuse_solar_radiation)*(1-np.cos(rad_surface_tilt))
+        direct_solar_radiation = np.asarray(self.weather.direct_normal_radiation, dtype=float)[index]
+        diffuse_solar_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)
+        rad_solar_altitude = np.deg2rad(np.asarray(self.solar_angles.solar_altitude)[index])
+        ground_view = ground_reflectance*(1-np.cos(np.deg2rad(self.surface.tilt)))
+        incident_reflected_radiation = ground_view*diffuse_solar_radiation
+        incident_reflected_radiation[index] += ground_view*direct_solar_radiation*np.sin(rad_solar_altitude)
         self.incident_reflected_radiation = pd.Series(incident_reflected_radiation)
 
     def calculate_incident_total_radiation(self):
@@ -230,6 +293,462 @@ class ExternalShortwaveRadiation(TimeSeriesComponent):
         self._surface_solar_angles= value
         self.update_calculated_values()
 
+    @property
+    def sky_model(self):
+        return self._sky_model
+
+    @sky_model.setter
+    def sky_model(self, value):
+        self._sky_model = value
+        self.update_calculated_values()
+
+    @property
+    def shading(self):
+        return self._shading
+
+    @shading.setter
+    def shading(self, value):
+        self._shading = value
+        self.update_calculated_values()
+
+
+class PerezSkyModel(TimeSeriesComponent):
+    """
+    Perez anisotropic sky model for diffuse radiation on tilted surfaces.
+
+    The sky clearness, sky brightness and brightness coefficients depend
+    only on the site and weather, so they are calculated once for the
+    daylight time steps and applied to any number of surfaces.
+
+    Parameters
+    ----------
+    time : Time
+    solar_angles : SolarAngles
+    weather : Weather
+
+    Attributes
+    ----------
+    solar_constant : float
+        Solar constant [W-m^2].
+    sky_clearness : Series
+        Sky clearness [1-inf].
+    sky_brightness : Series
+        Sky brightness [].
+    sky_clearness_bin : Series
+        Sky clearness bin [0-7].
+    circumsolar_coefficient : Series
+        Circumsolar brightening coefficient F1 [].
+    horizon_coefficient : Series
+        Horizon brightening coefficient F2 [].
+    circumsolar_cos_zenith : Series
+        Cosine of the solar zenith angle, limited to 85 deg [].
+    time : Time
+    solar_angles : SolarAngles
+    weather : Weather
+    """
+    def __init__(self, time, solar_angles, weather):
+        # General properties
+        self.solar_constant = 1367  # Solar constant [W-m^2]
+
+        # Sky state
+        self.sky_clearness = None
+        self.sky_brightness = None
+        self.sky_clearness_bin = None
+        self.circumsolar_coefficient = None
+        self.horizon_coefficient = None
+        self.circumsolar_cos_zenith = None
+
+        # Associated objects
+        self._solar_angles = solar_angles
+        self._weather = weather
+
+        # Add attributes from super class
+        super().__init__(time)
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        print('Updating Perez sky model calculations.')
+        self.calculate_sky_clearness()
+        self.calculate_sky_brightness()
+        self.calculate_brightness_coefficients()
+
+    def calculate_sky_clearness(self):
+        """
+        Calculate the sky clearness and clearness bin for the daylight time
+        steps.
+
+        Yields
+        ----------
+        sky_clearness : Series
+        sky_clearness_bin : Series
+
+        References
+        --------
+        Perez, R. et al. (1990). Modeling daylight availability and
+        irradiance components from direct and global irradiance. Solar Energy.
+        """
+        index = self.solar_angles.daylight_index
+        zenith = np.deg2rad(90 - np.asarray(self.solar_angles.solar_altitude, dtype=float)[index])
+        direct_normal_radiation = np.asarray(self.weather.direct_normal_radiation, dtype=float)[index]
+        diffuse_horizontal_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)[index]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = (diffuse_horizontal_radiation + direct_normal_radiation)/diffuse_horizontal_radiation
+        ratio = np.where(diffuse_horizontal_radiation > 0, ratio, 1.0)
+        sky_clearness = (ratio + 1.041*zenith**3)/(1 + 1.041*zenith**3)
+        sky_clearness_bin = np.digitize(sky_clearness, PEREZ_SKY_CLEARNESS_BINS)
+        length = self.time.length
+        self.sky_clearness = pd.Series(expand_compressed_values(sky_clearness, index, length, fill_value=1.0))
+        self.sky_clearness_bin = pd.Series(expand_compressed_values(sky_clearness_bin, index, length).astype(int))
+
+    def calculate_sky_brightness(self):
+        """
+        Calculate the sky brightness for the daylight time steps. The diffuse
+        horizontal radiation is taken as [W-m^2].
+
+        Yields
+        ----------
+        sky_brightness : Series
+
+        References
+        --------
+        Kasten, F. and Young, A. T. (1989). Revised optical air mass tables
+        and approximation formula. Applied Optics.
+        """
+        index = self.solar_angles.daylight_index
+        zenith = 90 - np.asarray(self.solar_angles.solar_altitude, dtype=float)[index]
+        diffuse_horizontal_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)[index]
+        day_of_year = np.asarray(self.time.julian_day)[index]
+        air_mass = 1/(np.cos(np.deg2rad(zenith)) + 0.50572*(96.07995 - zenith)**-1.6364)
+        extraterrestrial_radiation = self.solar_constant*(1 + 0.033*np.cos(2*np.pi*day_of_year/365))
+        sky_brightness = diffuse_horizontal_radiation*air_mass/extraterrestrial_radiation
+        self.sky_brightness = pd.Series(expand_compressed_values(sky_brightness, index, self.time.length))
+
+    def calculate_brightness_coefficients(self):
+        """
+        Calculate the circumsolar and horizon brightening coefficients for
+        the daylight time steps. Both are zero when the sun is down or there
+        is no diffuse radiation, which gives an isotropic sky.
+
+        Yields
+        ----------
+        circumsolar_coefficient : Series
+        horizon_coefficient : Series
+        circumsolar_cos_zenith : Series
+
+        References
+        --------
+        Perez, R. et al. (1990). Modeling daylight availability and
+        irradiance components from direct and global irradiance. Solar Energy.
+        """
+        index = self.solar_angles.daylight_index
+        zenith = np.deg2rad(90 - np.asarray(self.solar_angles.solar_altitude, dtype=float)[index])
+        diffuse_horizontal_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)[index]
+        brightness = np.asarray(self.sky_brightness)[index]
+        F = PEREZ_COEFFICIENTS[np.asarray(self.sky_clearness_bin)[index]]
+        F1 = np.maximum(0.0, F[:, 0] + F[:, 1]*brightness + F[:, 2]*zenith)
+        F2 = F[:, 3] + F[:, 4]*brightness + F[:, 5]*zenith
+        has_diffuse = diffuse_horizontal_radiation > 0
+        F1 = np.where(has_diffuse, F1, 0.0)
+        F2 = np.where(has_diffuse, F2, 0.0)
+        circumsolar_cos_zenith = np.maximum(np.cos(np.deg2rad(85)), np.cos(zenith))
+
+        length = self.time.length
+        self.circumsolar_coefficient = pd.Series(expand_compressed_values(F1, index, length))
+        self.horizon_coefficient = pd.Series(expand_compressed_values(F2, index, length))
+        self.circumsolar_cos_zenith = pd.Series(expand_compressed_values(circumsolar_cos_zenith, index, length, fill_value=1.0))
+
+    def calculate_incident_diffuse_radiation(self, cos_incidence_angle, tilt):
+        """
+        Calculate the incident diffuse solar radiation on surfaces.
+
+        Parameters
+        ----------
+        cos_incidence_angle : array
+            Cosine of the incidence angle of the sun on the surfaces, with
+            time as the last axis (surface, time) or (time).
+        tilt : array
+            Surface tilt angles [deg], one per surface.
+
+        Returns
+        -------
+        incident_diffuse_radiation : array
+            Incident diffuse solar radiation with the shape of
+            cos_incidence_angle [W-m^2].
+        """
+        cos_incidence_angle = np.asarray(cos_incidence_angle, dtype=float)
+        rad_tilt = np.deg2rad(np.asarray(tilt, dtype=float))
+        if cos_incidence_angle.ndim > 1:
+            rad_tilt = rad_tilt.reshape(-1, 1)
+        diffuse_horizontal_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)
+        F1 = np.asarray(self.circumsolar_coefficient)
+        F2 = np.asarray(self.horizon_coefficient)
+        b = np.asarray(self.circumsolar_cos_zenith)
+        return diffuse_horizontal_radiation*(
+            (1 - F1)*(1 + np.cos(rad_tilt))/2 +
+            F1*np.maximum(cos_incidence_angle, 0.0)/b +
+            F2*np.sin(rad_tilt)
+        )
+
+    @property
+    def solar_angles(self):
+        return self._solar_angles
+
+    @solar_angles.setter
+    def solar_angles(self, value):
+        self._solar_angles = value
+        self.update_calculated_values()
+
+    @property
+    def weather(self):
+        return self._weather
+
+    @weather.setter
+    def weather(self, value):
+        self._weather = value
+        self.update_calculated_values()
+
+
+class IrradiationMap(TimeSeriesComponent):
+    """
+    Integrated incident solar radiation over a grid of surface orientations.
+
+    The map uses the same models as ExternalShortwaveRadiation. Orientations
+    are evaluated in chunks as (orientation, daylight step) matrices and
+    integrated by month with a matrix product, reusing the site solar angles
+    and weather arrays for every chunk.
+
+    Parameters
+    ----------
+    time : Time
+    solar_angles : SolarAngles
+    weather : Weather
+    azimuth : array
+        Surface azimuth angles of the grid [deg].
+    tilt : array
+        Surface tilt angles of the grid [deg].
+    chunk_size : int
+        Number of orientations evaluated at once.
+    sky_model : PerezSkyModel
+        Optional anisotropic sky model used for the diffuse radiation.
+
+    Attributes
+    ----------
+    ground_reflectance : float
+        Ground reflectance [0-1] default 0.2.
+    monthly_direct_irradiation : array
+        Incident direct solar radiation summed over each month
+        (month, azimuth, tilt) [Wh/m^2].
+    monthly_diffuse_irradiation : array
+        Incident diffuse solar radiation summed over each month
+        (month, azimuth, tilt) [Wh/m^2].
+    monthly_reflected_irradiation : array
+        Incident reflected solar radiation summed over each month
+        (month, azimuth, tilt) [Wh/m^2].
+    annual_direct_irradiation : DataFrame
+        Incident direct solar radiation summed over the time series
+        (azimuth index, tilt columns) [Wh/m^2].
+    annual_diffuse_irradiation : DataFrame
+        Incident diffuse solar radiation summed over the time series [Wh/m^2].
+    annual_reflected_irradiation : DataFrame
+        Incident reflected solar radiation summed over the time series [Wh/m^2].
+    annual_total_irradiation : DataFrame
+        Incident total solar radiation summed over the time series [Wh/m^2].
+    """
+    def __init__(self, time, solar_angles, weather, azimuth=np.arange(-180, 180), tilt=np.arange(0, 91), chunk_size=128, sky_model=None):
+        # General properties
+        self.ground_reflectance = 0.2  # Ground reflectance []
+        self.chunk_size = chunk_size
+
+        # Integrated solar radiation
+        self.monthly_direct_irradiation = None
+        self.monthly_diffuse_irradiation = None
+        self.monthly_reflected_irradiation = None
+        self.annual_direct_irradiation = None
+        self.annual_diffuse_irradiation = None
+        self.annual_reflected_irradiation = None
+        self.annual_total_irradiation = None
+
+        # Grid
+        self._azimuth = np.asarray(azimuth, dtype=float)
+        self._tilt = np.asarray(tilt, dtype=float)
+
+        # Associated objects
+        self._solar_angles = solar_angles
+        self._weather = weather
+        self._sky_model = sky_model
+
+        # Add attributes from super class
+        super().__init__(time)
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        print('Updating irradiation map calculations.')
+        self.calculate_monthly_irradiation()
+        self.calculate_annual_irradiation()
+
+    def calculate_monthly_irradiation(self):
+        """
+        Calculate the incident direct, diffuse and reflected solar radiation
+        summed over each month for every orientation in the grid.
+
+        Yields
+        ----------
+        monthly_direct_irradiation : array
+        monthly_diffuse_irradiation : array
+        monthly_reflected_irradiation : array
+
+        References
+        --------
+        """
+        index = self.solar_angles.daylight_index
+        length = self.time.length
+        month = np.asarray(self.time.datetime_range.month)[:length] - 1
+        direct_normal_radiation = np.asarray(self.weather.direct_normal_radiation, dtype=float)
+        diffuse_horizontal_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)
+        solar_altitude = np.asarray(self.solar_angles.solar_altitude, dtype=float)[index]
+        solar_azimuth = np.asarray(self.solar_angles.solar_azimuth, dtype=float)[index]
+        rad_solar_altitude = np.deg2rad(solar_altitude)
+
+        # Monthly weights of the daylight steps (daylight step, month)
+        month_weights = np.zeros((len(index), 12))
+        month_weights[np.arange(len(index)), month[index]] = 1.0
+        direct_weights = direct_normal_radiation[index, np.newaxis]*month_weights
+        diffuse_weights = diffuse_horizontal_radiation[index, np.newaxis]*month_weights
+
+        # Monthly sums of the horizontal radiation (month)
+        night = np.ones(length, dtype=bool)
+        night[index] = False
+        diffuse_total = np.bincount(month, weights=diffuse_horizontal_radiation, minlength=12)
+        diffuse_night = np.bincount(month[night], weights=diffuse_horizontal_radiation[night], minlength=12)
+        direct_horizontal = direct_weights.T @ np.sin(rad_solar_altitude)
+
+        # Perez sky weights (daylight step, month) and monthly sums (month)
+        if self.sky_model is not None:
+            F1 = np.asarray(self.sky_model.circumsolar_coefficient)
+            F2 = np.asarray(self.sky_model.horizon_coefficient)
+            b = np.asarray(self.sky_model.circumsolar_cos_zenith)[index]
+            circumsolar_weights = (F1[index]/b)[:, np.newaxis]*diffuse_weights
+            isotropic_total = np.bincount(month, weights=(1 - F1)*diffuse_horizontal_radiation, minlength=12)
+            horizon_total = np.bincount(month, weights=F2*diffuse_horizontal_radiation, minlength=12)
+
+        # Orientations of the grid
+        azimuth, tilt = np.meshgrid(self.azimuth, self.tilt, indexing='ij')
+        azimuth = azimuth.ravel()
+        tilt = tilt.ravel()
+        monthly_direct = np.zeros((len(azimuth), 12))
+        monthly_diffuse = np.zeros((len(azimuth), 12))
+
+        for start in range(0, len(azimuth), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            rad_tilt = np.deg2rad(tilt[chunk, np.newaxis])
+            sun_surface_azimuth = calculate_sun_surface_azimuth(azimuth[chunk, np.newaxis], solar_azimuth)
+            cos_incidence_angle = (
+                np.cos(rad_solar_altitude)*np.cos(np.deg2rad(sun_surface_azimuth))*np.sin(rad_tilt) +
+                np.sin(rad_solar_altitude)*np.cos(rad_tilt)
+            )
+
+            # Direct radiation
+            sunlit = (solar_altitude > 0) & (sun_surface_azimuth < 90) & (cos_incidence_angle >= 0)
+            monthly_direct[chunk] = np.where(sunlit, cos_incidence_angle, 0.0) @ direct_weights
+
+            # Diffuse radiation
+            if self.sky_model is not None:
+                monthly_diffuse[chunk] = (
+                    isotropic_total*(1 + np.cos(rad_tilt))/2 +
+                    np.maximum(cos_incidence_angle, 0.0) @ circumsolar_weights +
+                    horizon_total*np.sin(rad_tilt)
+                )
+            else:
+                Y = np.maximum(0.55 + 0.437*cos_incidence_angle + 0.313*cos_incidence_angle**2, 0.45)
+                diffuse_ratio = Y @ diffuse_weights + 0.55*diffuse_night
+                horizontal_view = np.where(rad_tilt <= np.pi/2, np.cos(rad_tilt), 0.0)
+                monthly_diffuse[chunk] = diffuse_ratio*np.sin(rad_tilt) + horizontal_view*diffuse_total
+
+        # Reflected radiation
+        ground_view = self.ground_reflectance*(1 - np.cos(np.deg2rad(tilt)))
+        monthly_reflected = ground_view[:, np.newaxis]*(direct_horizontal + diffuse_total)
+
+        # Sums of the irradiance of each time step to irradiation [Wh/m^2]
+        hours = self.time.time_step/3600
+        shape = (len(self.azimuth), len(self.tilt), 12)
+        self.monthly_direct_irradiation = hours*np.moveaxis(monthly_direct.reshape(shape), -1, 0)
+        self.monthly_diffuse_irradiation = hours*np.moveaxis(monthly_diffuse.reshape(shape), -1, 0)
+        self.monthly_reflected_irradiation = hours*np.moveaxis(monthly_reflected.reshape(shape), -1, 0)
+
+    def calculate_annual_irradiation(self):
+        """
+        Calculate the incident solar radiation summed over the time series
+        for every orientation in the grid.
+
+        Yields
+        ----------
+        annual_direct_irradiation : DataFrame
+        annual_diffuse_irradiation : DataFrame
+        annual_reflected_irradiation : DataFrame
+        annual_total_irradiation : DataFrame
+
+        References
+        --------
+        """
+        index = pd.Index(self.azimuth, name='azimuth')
+        columns = pd.Index(self.tilt, name='tilt')
+        direct = self.monthly_direct_irradiation.sum(axis=0)
+        diffuse = self.monthly_diffuse_irradiation.sum(axis=0)
+        reflected = self.monthly_reflected_irradiation.sum(axis=0)
+        self.annual_direct_irradiation = pd.DataFrame(direct, index=index, columns=columns)
+        self.annual_diffuse_irradiation = pd.DataFrame(diffuse, index=index, columns=columns)
+        self.annual_reflected_irradiation = pd.DataFrame(reflected, index=index, columns=columns)
+        self.annual_total_irradiation = pd.DataFrame(direct + diffuse + reflected, index=index, columns=columns)
+
+    @property
+    def azimuth(self):
+        return self._azimuth
+
+    @azimuth.setter
+    def azimuth(self, value):
+        self._azimuth = np.asarray(value, dtype=float)
+        self.update_calculated_values()
+
+    @property
+    def tilt(self):
+        return self._tilt
+
+    @tilt.setter
+    def tilt(self, value):
+        self._tilt = np.asarray(value, dtype=float)
+        self.update_calculated_values()
+
+    @property
+    def solar_angles(self):
+        return self._solar_angles
+
+    @solar_angles.setter
+    def solar_angles(self, value):
+        self._solar_angles = value
+        self.update_calculated_values()
+
+    @property
+    def weather(self):
+        return self._weather
+
+    @weather.setter
+    def weather(self, value):
+        self._weather = value
+        self.update_calculated_values()
+
+    @property
+    def sky_model(self):
+        return self._sky_model
+
+    @sky_model.setter
+    def sky_model(self, value):
+        self._sky_model = value
+        self.update_calculated_values()
+
 
 class ExternalLongwaveRadiation(TimeSeriesComponent):
     """
@@ -255,10 +774,14 @@ class ExternalLongwaveRadiation(TimeSeriesComponent):
     ground_view_factor : float
     sky_view_factor : float
     air_view_factor : float
-    ground_radiative_heat_transfer : Series
-    sky_radiative_heat_transfer : Series
-    air_radiative_heat_transfer : Series
-    total_radiative_heat_transfer : Series
+    ground_radiation : Series
+        Linearized radiation coefficient to the ground [W-m^-2-K^-1].
+    sky_radiation : Series
+        Linearized radiation coefficient to the sky [W-m^-2-K^-1].
+    air_radiation : Series
+        Linearized radiation coefficient to the air [W-m^-2-K^-1].
+    total_radiation : Series
+        Sum of the radiation coefficients [W-m^-2-K^-1].
     time : Time
     weather : Weather
     surface : Surface
@@ -281,6 +804,11 @@ class ExternalLongwaveRadiation(TimeSeriesComponent):
         self.sky_radiation = None
         self.air_radiation = None
         self.total_radiation = None
+        self._coefficients = None
+        self._work = None
+        self._surface_temperature = None
+        self._ambient_temperature = None
+        self._sky_temperature = None
 
         # Associated objects
         self._weather = weather
@@ -297,10 +825,7 @@ class ExternalLongwaveRadiation(TimeSeriesComponent):
         self.calculate_ground_view_factor()
         self.calculate_sky_view_factor()
         self.calculate_air_view_factor()
-        self.calculate_ground_long_wave_radiation()
-        self.calculate_sky_long_wave_radiation()
-        self.calculate_air_long_wave_radiation()
-        self.calculate_total_long_wave_radiation()
+        self.calculate_long_wave_radiation()
 
     def calculate_ground_view_factor(self):
         """
@@ -345,92 +870,95 @@ class ExternalLongwaveRadiation(TimeSeriesComponent):
         """
         self.air_view_factor = 1
 
-    def calculate_ground_long_wave_radiation(self):
-        """
-        Calculate the long wave radiation from the surface to the ground for
-        each item in the series.
-
-        Yields
-        ----------
-        ground_radiative_heat_transfer : Series
-
-        References
-        --------
+    def calculate_long_wave_radiation(self):
         """
+        Calculate the linearized long wave radiation coefficients from the
+        surface to the ground, sky and air for each item in the series.
 
-        if self.weather.dry_bulb_temperature is not None:
-            amb_temp = self.weather.dry_bulb_temperature
-            abs_amb_temp = amb_temp+273
-            surf_temp = self.surface_temperature
-            abs_surf_temp = self.surface_temperature+273
-
-            # initialize array
-            hrgnd = pd.Series(np.zeros(self.time.length))
-            hrgnd[amb_temp != surf_temp] = self.absorptivity*self.sigma*self.ground_view_factor*((abs_amb_temp)**4-(abs_surf_temp)**4)/(amb_temp-surf_temp)
-            self.ground_radiation = pd.Series(hrgnd)
-
-    def calculate_sky_long_wave_radiation(self):
-        """
-        Calculate the long wave radiation from the surface to the sky for
-        each item in the series.
+        The three coefficients are calculated together by
+        calculate_radiative_heat_transfer_coefficients into preallocated
+        arrays, which are reused when the coefficients are recalculated or
+        updated step by step with update_surface_temperature.
 
         Yields
         ----------
-        sky_long_wave_radiation : Series
+        surface_temperature : Series
+        ground_radiation : Series
+        sky_radiation : Series
+        air_radiation : Series
+        total_radiation : Series
 
         References
         --------
         """
-        if self.weather.sky_temperature is not None:
-            sky_temp = self.weather.sky_temperature
-            abs_sky_temp = self.weather.sky_temperature+273
-            surf_temp = self.surface_temperature
-            abs_surf_temp = self.surface_temperature+273
-
-            # initialize array
-            hrsky = pd.Series(np.zeros(self.time.length))
-            hrsky[sky_temp != surf_temp] = self.absorptivity*self.sigma*self.sky_view_factor*((abs_sky_temp)**4-(abs_surf_temp)**4)/(sky_temp-surf_temp)
-            self.sky_radiation = pd.Series(hrsky)
-
-    def calculate_air_long_wave_radiation(self):
+        ambient_temperature = self.weather.dry_bulb_temperature
+        sky_temperature = self.weather.sky_temperature
+        if (ambient_temperature is not None) or (sky_temperature is not None):
+            if (self._coefficients is None) or (self._coefficients.shape[1] != self.time.length):
+                self._coefficients = np.empty((4, self.time.length))
+                self._work = np.empty((3, self.time.length))
+
+            # Own copies of the temperatures so that steps can be updated in place,
+            # a missing temperature leaves its coefficients undefined
+            self._surface_temperature = np.array(self.surface_temperature, dtype=float)
+            self.surface_temperature = pd.Series(self._surface_temperature, copy=False)
+            if ambient_temperature is not None:
+                self._ambient_temperature = np.asarray(ambient_temperature, dtype=float)
+            else:
+                self._ambient_temperature = np.full(self.time.length, np.nan)
+            if sky_temperature is not None:
+                self._sky_temperature = np.asarray(sky_temperature, dtype=float)
+            else:
+                self._sky_temperature = np.full(self.time.length, np.nan)
+            self.update_surface_temperature(self._surface_temperature, 0, self.time.length)
+
+            # Coefficients of the available temperatures, the total needs both
+            self.ground_radiation = None
+            self.sky_radiation = None
+            self.air_radiation = None
+            self.total_radiation = None
+            if ambient_temperature is not None:
+                self.ground_radiation = pd.Series(self._coefficients[0], copy=False)
+                self.air_radiation = pd.Series(self._coefficients[2], copy=False)
+            if sky_temperature is not None:
+                self.sky_radiation = pd.Series(self._coefficients[1], copy=False)
+            if (ambient_temperature is not None) and (sky_temperature is not None):
+                self.total_radiation = pd.Series(self._coefficients[3], copy=False)
+
+    def update_surface_temperature(self, surface_temperature, start, stop=None):
         """
-        Calculate the long wave radiation from the surface to the air for
-        each item in the series.
+        Update the surface temperature and the radiation coefficients for one
+        time step or a block of time steps, in place.
 
-        Yields
+        Parameters
         ----------
-        air_long_wave_radiation : Series
-
-        References
-        --------
-        """
-        if self.weather.dry_bulb_temperature is not None:
-            amb_temp = self.weather.dry_bulb_temperature
-            abs_amb_temp = self.weather.dry_bulb_temperature+273
-            surf_temp = self.surface_temperature
-            abs_surf_temp = self.surface_temperature+273
-
-            # initialize array
-            hrair = pd.Series(np.zeros(self.time.length))
-            hrair[amb_temp != surf_temp] = self.absorptivity*self.sigma*self.air_view_factor*((abs_amb_temp)**4-(abs_surf_temp)**4)/(amb_temp-surf_temp)
-            self.air_radiation = pd.Series(hrair)
-
-    def calculate_total_long_wave_radiation(self):
-        """
-        Calculate the total long wave radiation from the surface for
-        each item in the series.
+        surface_temperature : float or array
+            Surface temperature for the time steps [C].
+        start : int
+            Position of the first time step.
+        stop : int
+            Position after the last time step, default start + 1.
 
         Yields
         ----------
+        surface_temperature : Series
+        ground_radiation : Series
+        sky_radiation : Series
+        air_radiation : Series
         total_radiation : Series
-
-        References
-        --------
         """
-        if (self.ground_radiation is not None) and (self.sky_radiation is not None) and (self.air_radiation is not None):
-            total_radiation = self.ground_radiation + self.sky_radiation + self.air_radiation
-            self.total_radiation = pd.Series(total_radiation)
-
+        window = slice(start, start + 1 if stop is None else stop)
+        self._surface_temperature[window] = surface_temperature
+        calculate_radiative_heat_transfer_coefficients(
+            self._surface_temperature[window],
+            self._ambient_temperature[window],
+            self._sky_temperature[window],
+            self.absorptivity*self.sigma*self.ground_view_factor,
+            self.absorptivity*self.sigma*self.sky_view_factor,
+            self.absorptivity*self.sigma*self.air_view_factor,
+            self._coefficients[:, window],
+            self._work[:, window],
+        )
 
     @property
     def weather(self):
@@ -449,3 +977,95 @@ class ExternalLongwaveRadiation(TimeSeriesComponent):
     def surface(self, value):
         self._surface= value
         self.update_calculated_values()
+
+
+def calculate_clear_sky_diffuse_radiation(diffuse_horizontal_radiation, Y, tilt):
+    """
+    Calculate the incident diffuse solar radiation on surfaces with the
+    ASHRAE clear sky ratio.
+
+    Parameters
+    ----------
+    diffuse_horizontal_radiation : array
+        Diffuse horizontal solar radiation (time) [W-m^2].
+    Y : array
+        Ratio of clear sky diffuse radiation on a vertical surface to a
+        horizontal surface, (surface, time) or (time).
+    tilt : array
+        Surface tilt angles [deg], one per surface.
+
+    Returns
+    -------
+    incident_diffuse_radiation : array
+        Incident diffuse solar radiation with the shape of Y [W-m^2].
+    """
+    Y = np.asarray(Y, dtype=float)
+    rad_tilt = np.deg2rad(np.asarray(tilt, dtype=float))
+    if Y.ndim > 1:
+        rad_tilt = rad_tilt.reshape(-1, 1)
+    horizontal_view = np.where(rad_tilt <= np.pi/2, np.cos(rad_tilt), 0.0)
+    return diffuse_horizontal_radiation*(Y*np.sin(rad_tilt) + horizontal_view)
+
+
+def calculate_radiative_heat_transfer_coefficients(surface_temperature, ambient_temperature, sky_temperature,
+                                                   ground_factor, sky_factor, air_factor, out, work):
+    """
+    Calculate the linearized long wave radiation coefficients to the ground,
+    sky and air in one pass, writing into preallocated arrays.
+
+    The linearized coefficient eps*sigma*F*(T1^4 - T2^4)/(T1 - T2) is
+    evaluated as eps*sigma*F*(T1^2 + T2^2)*(T1 + T2) with absolute
+    temperatures, which is exact and tends to 4*eps*sigma*F*T^3 as the
+    temperature difference goes to zero, so no masking is needed. The ground
+    and air coefficients share the ambient temperature term.
+
+    Parameters
+    ----------
+    surface_temperature : array
+        Surface temperatures [C].
+    ambient_temperature : array
+        Ambient dry bulb temperatures [C].
+    sky_temperature : array
+        Sky temperatures [C].
+    ground_factor : float or array
+        Absorptivity x Stefan-Boltzmann constant x ground view factor.
+    sky_factor : float or array
+        Absorptivity x Stefan-Boltzmann constant x sky view factor.
+    air_factor : float or array
+        Absorptivity x Stefan-Boltzmann constant x air view factor.
+    out : array
+        Output array (4, ...) for the ground, sky, air and total
+        coefficients [W-m^-2-K^-1].
+    work : array
+        Work array (3, ...) with the shape of the temperatures.
+
+    Returns
+    -------
+    out : array
+    """
+    ground, sky, air, total = out
+    absolute_surface, absolute_other, surface_squared = work
+
+    np.add(surface_temperature, 273, out=absolute_surface)
+    np.multiply(absolute_surface, absolute_surface, out=surface_squared)
+
+    # Ambient temperature term, shared by the ground and air coefficients
+    np.add(ambient_temperature, 273, out=absolute_other)
+    np.multiply(absolute_other, absolute_other, out=ground)
+    np.add(ground, surface_squared, out=ground)
+    np.add(absolute_other, absolute_surface, out=air)
+    np.multiply(ground, air, out=ground)
+    np.multiply(ground, air_factor, out=air)
+    np.multiply(ground, ground_factor, out=ground)
+
+    # Sky temperature term
+    np.add(sky_temperature, 273, out=absolute_other)
+    np.multiply(absolute_other, absolute_other, out=sky)
+    np.add(sky, surface_squared, out=sky)
+    np.add(absolute_other, absolute_surface, out=absolute_other)
+    np.multiply(sky, absolute_other, out=sky)
+    np.multiply(sky, sky_factor, out=sky)
+
+    np.add(ground, sky, out=total)
+    np.add(total, air, out=total)
+    return out
@@ -0,0 +1,463 @@
+"""Exterior shading of surfaces by obstructions.
+"""
+import numpy as np
+
+from sitka.calculations.sky import calculate_direction
+
+
+class Overhang:
+    """
+    Horizontal overhang above a surface, extending past both sides.
+
+    Parameters
+    ----------
+    depth : float
+        Projection of the overhang from the surface [m].
+    gap : float
+        Vertical distance from the top of the surface to the overhang [m].
+    """
+    def __init__(self, depth, gap=0.0):
+        self.depth = depth
+        self.gap = gap
+
+    def calculate_sunlit_fraction(self, surface, solar_azimuth, solar_altitude):
+        """
+        Calculate the fraction of the surface not shaded by the overhang.
+
+        Parameters
+        ----------
+        surface : Surface
+        solar_azimuth : array
+            Solar azimuth angles [deg].
+        solar_altitude : array
+            Solar altitude angles [deg].
+
+        Returns
+        -------
+        sunlit_fraction : array
+        """
+        sun_surface_azimuth = np.deg2rad(solar_azimuth - surface.azimuth)
+        cos_sun_surface_azimuth = np.maximum(np.cos(sun_surface_azimuth), 1e-6)
+        tan_profile_angle = np.tan(np.deg2rad(solar_altitude))/cos_sun_surface_azimuth
+        shadow_height = np.clip(self.depth*tan_profile_angle - self.gap, 0, surface.height)
+        return 1 - shadow_height/surface.height
+
+
+class Fin:
+    """
+    Vertical fin at the side of a surface, extending above and below it.
+
+    Parameters
+    ----------
+    depth : float
+        Projection of the fin from the surface [m].
+    gap : float
+        Horizontal distance from the edge of the surface to the fin [m].
+    side : string
+        Side of the surface, looking out from the surface ('left', 'right'
+        or 'both').
+    """
+    def __init__(self, depth, gap=0.0, side='both'):
+        self.depth = depth
+        self.gap = gap
+        self.side = side
+
+    def calculate_sunlit_fraction(self, surface, solar_azimuth, solar_altitude):
+        """
+        Calculate the fraction of the surface not shaded by the fin.
+
+        Parameters
+        ----------
+        surface : Surface
+        solar_azimuth : array
+            Solar azimuth angles [deg].
+        solar_altitude : array
+            Solar altitude angles [deg].
+
+        Returns
+        -------
+        sunlit_fraction : array
+        """
+        sun_surface_azimuth = np.deg2rad(solar_azimuth - surface.azimuth)
+        cos_sun_surface_azimuth = np.maximum(np.cos(sun_surface_azimuth), 1e-6)
+        tan_sun_surface_azimuth = np.sin(sun_surface_azimuth)/cos_sun_surface_azimuth
+
+        # Azimuth is positive to the west, which is to the right looking out
+        if self.side == 'right':
+            tan_sun_surface_azimuth = np.maximum(tan_sun_surface_azimuth, 0)
+        elif self.side == 'left':
+            tan_sun_surface_azimuth = np.minimum(tan_sun_surface_azimuth, 0)
+
+        shadow_width = np.clip(self.depth*np.abs(tan_sun_surface_azimuth) - self.gap, 0, surface.width)
+        return 1 - shadow_width/surface.width
+
+
+class HorizonProfile:
+    """
+    Horizon seen from a surface, such as neighbouring buildings or terrain.
+
+    Parameters
+    ----------
+    azimuth : array
+        Azimuth angles of the horizon profile (0 = south, west positive) [deg].
+    altitude : array
+        Altitude angles of the horizon at each azimuth [deg].
+    """
+    def __init__(self, azimuth, altitude):
+        self.azimuth = np.asarray(azimuth, dtype=float)
+        self.altitude = np.asarray(altitude, dtype=float)
+
+    def calculate_sunlit_fraction(self, surface, solar_azimuth, solar_altitude):
+        """
+        Calculate whether the sun is above the horizon profile.
+
+        Parameters
+        ----------
+        surface : Surface
+        solar_azimuth : array
+            Solar azimuth angles [deg].
+        solar_altitude : array
+            Solar altitude angles [deg].
+
+        Returns
+        -------
+        sunlit_fraction : array
+        """
+        horizon_altitude = np.interp(solar_azimuth, self.azimuth, self.altitude, period=360)
+        return (solar_altitude > horizon_altitude).astype(float)
+
+
+class ShadingMask:
+    """
+    Precomputed sunlit fraction of a surface on an azimuth x altitude grid
+    of sun positions.
+
+    The obstructions are evaluated once for every grid point so the sunlit
+    fraction for a time step is a table lookup of the nearest grid point.
+
+    Parameters
+    ----------
+    surface : Surface
+    obstructions : list
+        Obstructions with a calculate_sunlit_fraction method (Overhang, Fin,
+        HorizonProfile).
+    resolution : float
+        Angle resolution of the grid [deg].
+
+    Attributes
+    ----------
+    azimuth : array
+        Solar azimuth angles of the grid [deg].
+    altitude : array
+        Solar altitude angles of the grid [deg].
+    sunlit_fraction : array
+        Sunlit fraction of the surface (azimuth, altitude) [0-1].
+    """
+    def __init__(self, surface, obstructions, resolution=1.0):
+        self.azimuth = None
+        self.altitude = None
+        self.sunlit_fraction = None
+        self._surface = surface
+        self._obstructions = obstructions
+        self._resolution = resolution
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_sunlit_fraction_grid()
+
+    def calculate_sunlit_fraction_grid(self):
+        """
+        Calculate the sunlit fraction for every sun position on the grid.
+
+        Yields
+        ----------
+        azimuth : array
+        altitude : array
+        sunlit_fraction : array
+        """
+        resolution = self.resolution
+        self.azimuth = -180 + resolution*np.arange(int(round(360/resolution)))
+        self.altitude = resolution*np.arange(int(round(90/resolution)) + 1)
+        solar_azimuth, solar_altitude = np.meshgrid(self.azimuth, self.altitude, indexing='ij')
+        sunlit_fraction = np.ones(solar_azimuth.shape)
+        for obstruction in self.obstructions:
+            sunlit_fraction *= obstruction.calculate_sunlit_fraction(self.surface, solar_azimuth, solar_altitude)
+        self.sunlit_fraction = sunlit_fraction
+
+    def calculate_sunlit_fraction(self, solar_azimuth, solar_altitude):
+        """
+        Look up the sunlit fraction of the surface for sun positions.
+
+        Parameters
+        ----------
+        solar_azimuth : array
+            Solar azimuth angles [deg].
+        solar_altitude : array
+            Solar altitude angles [deg].
+
+        Returns
+        -------
+        sunlit_fraction : array
+        """
+        resolution = self.resolution
+        azimuth_index = np.round((np.asarray(solar_azimuth, dtype=float) + 180)/resolution).astype(int) % len(self.azimuth)
+        altitude_index = np.clip(np.round(np.asarray(solar_altitude, dtype=float)/resolution).astype(int), 0, len(self.altitude) - 1)
+        return self.sunlit_fraction[azimuth_index, altitude_index]
+
+    @property
+    def surface(self):
+        return self._surface
+
+    @surface.setter
+    def surface(self, value):
+        self._surface = value
+        self.update_calculated_values()
+
+    @property
+    def obstructions(self):
+        return self._obstructions
+
+    @obstructions.setter
+    def obstructions(self, value):
+        self._obstructions = value
+        self.update_calculated_values()
+
+    @property
+    def resolution(self):
+        return self._resolution
+
+    @resolution.setter
+    def resolution(self, value):
+        self._resolution = value
+        self.update_calculated_values()
+
+
+class RayCastShading:
+    """
+    Sunlit state of sensor points shaded by context geometry, found by ray
+    casting towards the sun through a bounding volume hierarchy.
+
+    Sun positions are binned on an azimuth x altitude grid and the rays for
+    all the points are cast once per bin, so repeated sun positions reuse
+    the cached occlusion. The sunlit fraction of a surface is the mean over
+    its sensor points.
+
+    Parameters
+    ----------
+    bvh : BoundingVolumeHierarchy
+        Context geometry.
+    points : array
+        Sensor points (point, xyz) [m], x east, y north, z up.
+    normals : array
+        Unit normal vectors of the sensor points (point, xyz). Points facing
+        away from the sun are not sunlit. Optional.
+    resolution : float
+        Angle resolution of the sun position bins [deg].
+    offset : float
+        Distance the ray origins are moved towards the sun, to avoid hitting
+        the surface the points are on [m].
+
+    Attributes
+    ----------
+    cache : dict
+        Sunlit state of the points, keyed by sun position bin.
+    """
+    def __init__(self, bvh, points, normals=None, resolution=1.0, offset=1e-3):
+        self.cache = {}
+        self.offset = offset
+        self._bvh = bvh
+        self._points = np.atleast_2d(np.asarray(points, dtype=float))
+        self._normals = None if normals is None else np.atleast_2d(np.asarray(normals, dtype=float))
+        self._resolution = resolution
+
+    def calculate_bins(self, solar_azimuth, solar_altitude):
+        """
+        Find the sun position bin of each time step.
+
+        Parameters
+        ----------
+        solar_azimuth : array
+            Solar azimuth angles [deg].
+        solar_altitude : array
+            Solar altitude angles [deg].
+
+        Returns
+        -------
+        bins : array of int
+            Unique sun position bins (bin, azimuth and altitude index).
+        bin_index : array of int
+            Bin of each time step.
+        """
+        resolution = self.resolution
+        azimuth_index = np.round(np.asarray(solar_azimuth, dtype=float)/resolution).astype(int)
+        azimuth_index = np.mod(azimuth_index, int(round(360/resolution)))
+        altitude_index = np.round(np.asarray(solar_altitude, dtype=float)/resolution).astype(int)
+        bins, bin_index = np.unique(np.stack([azimuth_index, altitude_index], axis=-1).reshape(-1, 2), axis=0, return_inverse=True)
+        return bins, bin_index.reshape(np.shape(solar_azimuth))
+
+    def calculate_bin_sunlit(self, azimuth_index, altitude_index):
+        """
+        Cast the rays of all points towards the centre of a sun position bin.
+
+        Parameters
+        ----------
+        azimuth_index : int
+        altitude_index : int
+
+        Returns
+        -------
+        sunlit : array of bool
+            Sunlit state of the points.
+        """
+        key = (int(azimuth_index), int(altitude_index))
+        if key not in self.cache:
+            altitude = altitude_index*self.resolution
+            if altitude < 0:
+                sunlit = np.zeros(len(self.points), dtype=bool)
+            else:
+                # The bin at the horizon holds sun positions just above it
+                altitude = max(altitude, self.resolution/4)
+                direction = calculate_direction(altitude, azimuth_index*self.resolution)[0]
+                if self.normals is None:
+                    facing = np.ones(len(self.points), dtype=bool)
+                else:
+                    facing = self.normals @ direction > 0
+                sunlit = facing.copy()
+                origins = self.points[facing] + self.offset*direction
+                sunlit[facing] = ~self.bvh.intersects(origins, direction)
+            self.cache[key] = sunlit
+        return self.cache[key]
+
+    def calculate_point_sunlit(self, solar_azimuth, solar_altitude, index=None):
+        """
+        Calculate the sunlit state of the sensor points.
+
+        Parameters
+        ----------
+        solar_azimuth : array
+            Solar azimuth angles [deg].
+        solar_altitude : array
+            Solar altitude angles [deg].
+        index : array of int
+            Points to return, default all.
+
+        Returns
+        -------
+        sunlit : array of bool
+            Sunlit state (point, time).
+        """
+        bins, bin_index = self.calculate_bins(solar_azimuth, solar_altitude)
+        index = slice(None) if index is None else index
+        bin_sunlit = np.stack([self.calculate_bin_sunlit(*b)[index] for b in bins], axis=-1)
+        return bin_sunlit[:, bin_index]
+
+    def calculate_sunlit_fraction(self, solar_azimuth, solar_altitude, index=None):
+        """
+        Calculate the sunlit fraction of a group of sensor points.
+
+        Parameters
+        ----------
+        solar_azimuth : array
+            Solar azimuth angles [deg].
+        solar_altitude : array
+            Solar altitude angles [deg].
+        index : array of int
+            Points of the group, default all.
+
+        Returns
+        -------
+        sunlit_fraction : array
+        """
+        bins, bin_index = self.calculate_bins(solar_azimuth, solar_altitude)
+        index = slice(None) if index is None else index
+        bin_fraction = np.array([self.calculate_bin_sunlit(*b)[index].mean() for b in bins])
+        return bin_fraction[bin_index]
+
+    def get_surface_shading(self, index):
+        """
+        Get the shading of a surface from its sensor points, to pass to
+        ExternalShortwaveRadiation.
+
+        Parameters
+        ----------
+        index : array of int
+            Sensor points on the surface.
+
+        Returns
+        -------
+        shading : SensorGroupShading
+        """
+        return SensorGroupShading(self, index)
+
+    def clear(self):
+        self.cache = {}
+
+    @property
+    def bvh(self):
+        return self._bvh
+
+    @bvh.setter
+    def bvh(self, value):
+        self._bvh = value
+        self.clear()
+
+    @property
+    def points(self):
+        return self._points
+
+    @points.setter
+    def points(self, value):
+        self._points = np.atleast_2d(np.asarray(value, dtype=float))
+        self.clear()
+
+    @property
+    def normals(self):
+        return self._normals
+
+    @normals.setter
+    def normals(self, value):
+        self._normals = None if value is None else np.atleast_2d(np.asarray(value, dtype=float))
+        self.clear()
+
+    @property
+    def resolution(self):
+        return self._resolution
+
+    @resolution.setter
+    def resolution(self, value):
+        self._resolution = value
+        self.clear()
+
+
+class SensorGroupShading:
+    """
+    Sunlit fraction of a group of sensor points of a RayCastShading.
+
+    Parameters
+    ----------
+    ray_cast_shading : RayCastShading
+    index : array of int
+        Sensor points of the group.
+    """
+    def __init__(self, ray_cast_shading, index):
+        self.ray_cast_shading = ray_cast_shading
+        self.index = index
+
+    def calculate_sunlit_fraction(self, solar_azimuth, solar_altitude):
+        """
+        Calculate the sunlit fraction of the group of sensor points.
+
+        Parameters
+        ----------
+        solar_azimuth : array
+            Solar azimuth angles [deg].
+        solar_altitude : array
+            Solar altitude angles [deg].
+
+        Returns
+        -------
+        sunlit_fraction : array
+        """
+        return self.ray_cast_shading.calculate_sunlit_fraction(solar_azimuth, solar_altitude, self.index)
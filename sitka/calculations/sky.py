@@ -0,0 +1,371 @@
+"""Sky discretization and daylight coefficient irradiance.
+"""
+import numpy as np
+
+from sitka.utils.time_series import TimeSeriesComponent, expand_compressed_values
+
+TREGENZA_BAND_PATCHES = [30, 30, 24, 24, 18, 12, 6]
+
+
+class SkyPatches:
+    """
+    Discretization of the sky hemisphere into Tregenza patches, with the
+    Reinhart subdivision.
+
+    The Tregenza sky has 145 patches in 7 altitude bands of 12 deg and a
+    zenith cap. Each band and patch is subdivided by the subdivision factor
+    (Reinhart MF), which gives 144*MF^2 + 1 patches.
+
+    Parameters
+    ----------
+    subdivision : int
+        Reinhart subdivision factor (1 = Tregenza sky).
+
+    Attributes
+    ----------
+    number_of_patches : int
+        Number of sky patches.
+    altitude : array
+        Altitude angle of the patch centres [deg].
+    azimuth : array
+        Azimuth angle of the patch centres (0 = south, west positive) [deg].
+    solid_angle : array
+        Solid angle of the patches [sr].
+    direction : array
+        Unit vectors to the patch centres (patch, xyz), x east, y north, z up.
+    row_altitude : array
+        Lower altitude of each row of patches [deg].
+    row_patches : array
+        Number of patches in each row.
+    row_offset : array
+        Index of the first patch in each row.
+    """
+    def __init__(self, subdivision=1):
+        self.number_of_patches = None
+        self.altitude = None
+        self.azimuth = None
+        self.solid_angle = None
+        self.direction = None
+        self.row_altitude = None
+        self.row_patches = None
+        self.row_offset = None
+        self._subdivision = subdivision
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_patches()
+        self.calculate_direction()
+
+    def calculate_patches(self):
+        """
+        Calculate the position and solid angle of the sky patches.
+
+        Yields
+        ----------
+        number_of_patches : int
+        altitude : array
+        azimuth : array
+        solid_angle : array
+        row_altitude : array
+        row_patches : array
+        row_offset : array
+
+        References
+        --------
+        Tregenza, P. R. (1987). Subdivision of the sky hemisphere for
+        luminance measurements. Lighting Research and Technology.
+        Reinhart, C. F. and Walkenhorst, O. (2001). Validation of dynamic
+        RADIANCE-based daylight simulations. Energy and Buildings.
+        """
+        subdivision = self.subdivision
+        row_width = 12/subdivision
+        row_patches = np.repeat(TREGENZA_BAND_PATCHES, subdivision)*subdivision
+        row_altitude = np.arange(len(row_patches))*row_width
+
+        altitude = []
+        azimuth = []
+        solid_angle = []
+        for lower, patches in zip(row_altitude, row_patches):
+            upper = lower + row_width
+            width = 360/patches
+            altitude.append(np.full(patches, lower + row_width/2))
+            azimuth.append(-180 + width*(np.arange(patches) + 0.5))
+            solid_angle.append(np.full(patches, np.deg2rad(width)*(np.sin(np.deg2rad(upper)) - np.sin(np.deg2rad(lower)))))
+
+        # Zenith cap
+        cap_altitude = row_altitude[-1] + row_width
+        altitude.append([90.0])
+        azimuth.append([0.0])
+        solid_angle.append([2*np.pi*(1 - np.sin(np.deg2rad(cap_altitude)))])
+
+        self.altitude = np.concatenate(altitude)
+        self.azimuth = np.concatenate(azimuth)
+        self.solid_angle = np.concatenate(solid_angle)
+        self.number_of_patches = len(self.altitude)
+        self.row_altitude = np.append(row_altitude, cap_altitude)
+        self.row_patches = np.append(row_patches, 1)
+        self.row_offset = np.concatenate([[0], np.cumsum(self.row_patches)[:-1]])
+
+    def calculate_direction(self):
+        """
+        Calculate the unit vectors to the patch centres.
+
+        Yields
+        ----------
+        direction : array
+        """
+        self.direction = calculate_direction(self.altitude, self.azimuth)
+
+    def calculate_patch_index(self, altitude, azimuth):
+        """
+        Find the sky patch containing each direction.
+
+        Parameters
+        ----------
+        altitude : array
+            Altitude angles above the horizon [deg].
+        azimuth : array
+            Azimuth angles (0 = south, west positive) [deg].
+
+        Returns
+        -------
+        patch_index : array of int
+        """
+        altitude = np.asarray(altitude, dtype=float)
+        azimuth = np.asarray(azimuth, dtype=float)
+        row = np.searchsorted(self.row_altitude, altitude, side='right') - 1
+        row = np.clip(row, 0, len(self.row_patches) - 1)
+        patches = self.row_patches[row]
+        column = np.floor(np.mod(azimuth + 180, 360)*patches/360).astype(int)
+        column = np.minimum(column, patches - 1)
+        return self.row_offset[row] + column
+
+    @property
+    def subdivision(self):
+        return self._subdivision
+
+    @subdivision.setter
+    def subdivision(self, value):
+        self._subdivision = value
+        self.update_calculated_values()
+
+
+class SkyMatrix(TimeSeriesComponent):
+    """
+    Annual sky matrix and daylight coefficient irradiance.
+
+    The sky matrix holds the radiation arriving from each sky patch and from
+    the ground for each time step, so that the incident radiation on any
+    number of surfaces or sensor points is a matrix product of their
+    daylight coefficients with the sky matrix. Diffuse radiation is
+    distributed over the patches as an isotropic sky, direct radiation is
+    assigned to the patch containing the sun, and the ground is one patch
+    with the reflected global horizontal radiation.
+
+    Only the time steps with the sun up or with solar radiation are stored.
+
+    Parameters
+    ----------
+    time : Time
+    solar_angles : SolarAngles
+    weather : Weather
+    sky_patches : SkyPatches
+        Sky discretization, default is the Tregenza sky.
+
+    Attributes
+    ----------
+    ground_reflectance : float
+        Ground reflectance [0-1] default 0.2.
+    step_index : array of int
+        Positions of the time steps stored in the sky matrix.
+    patch_radiation : array
+        Radiation from each sky patch, normal to the patch direction, and
+        the ground reflected radiation in the last row (patch + 1, step).
+    time : Time
+    solar_angles : SolarAngles
+    weather : Weather
+    sky_patches : SkyPatches
+    """
+    def __init__(self, time, solar_angles, weather, sky_patches=None):
+        # General properties
+        self.ground_reflectance = 0.2  # Ground reflectance []
+        self.step_index = None
+        self.patch_radiation = None
+
+        # Associated objects
+        self._solar_angles = solar_angles
+        self._weather = weather
+        self._sky_patches = sky_patches if sky_patches is not None else SkyPatches()
+
+        # Add attributes from super class
+        super().__init__(time)
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        print('Updating sky matrix calculations.')
+        self.calculate_step_index()
+        self.calculate_patch_radiation()
+
+    def calculate_step_index(self):
+        """
+        Find the time steps with the sun up or with diffuse solar radiation.
+        Direct radiation only reaches the sky patches with the sun up.
+
+        Yields
+        ----------
+        step_index : array of int
+        """
+        sun_up = np.asarray(self.solar_angles.sun_up) > 0
+        diffuse_horizontal_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)
+        self.step_index = np.flatnonzero(sun_up | (diffuse_horizontal_radiation > 0))
+
+    def calculate_patch_radiation(self):
+        """
+        Calculate the radiation from each sky patch and the ground for the
+        stored time steps.
+
+        Yields
+        ----------
+        patch_radiation : array
+
+        References
+        --------
+        """
+        index = self.step_index
+        sky_patches = self.sky_patches
+        solar_altitude = np.asarray(self.solar_angles.solar_altitude, dtype=float)[index]
+        solar_azimuth = np.asarray(self.solar_angles.solar_azimuth, dtype=float)[index]
+        direct_normal_radiation = np.asarray(self.weather.direct_normal_radiation, dtype=float)[index]
+        diffuse_horizontal_radiation = np.asarray(self.weather.diffuse_horizontal_radiation, dtype=float)[index]
+        sun_up = solar_altitude > 0
+        direct_normal_radiation = np.where(sun_up, direct_normal_radiation, 0.0)
+
+        # Isotropic diffuse sky, normalized to the diffuse horizontal radiation
+        horizontal_weight = sky_patches.solid_angle*np.sin(np.deg2rad(sky_patches.altitude))
+        diffuse_weight = sky_patches.solid_angle/horizontal_weight.sum()
+        patch_radiation = np.zeros((sky_patches.number_of_patches + 1, len(index)))
+        patch_radiation[:-1] = np.outer(diffuse_weight, diffuse_horizontal_radiation)
+
+        # Direct radiation in the patch containing the sun
+        sun_patch = sky_patches.calculate_patch_index(solar_altitude, solar_azimuth)
+        patch_radiation[sun_patch[sun_up], np.flatnonzero(sun_up)] += direct_normal_radiation[sun_up]
+
+        # Ground reflected radiation
+        global_horizontal_radiation = direct_normal_radiation*np.sin(np.deg2rad(solar_altitude)) + diffuse_horizontal_radiation
+        patch_radiation[-1] = self.ground_reflectance*global_horizontal_radiation
+
+        self.patch_radiation = patch_radiation
+
+    def calculate_daylight_coefficients(self, azimuth, tilt):
+        """
+        Calculate the daylight coefficients for surfaces.
+
+        Parameters
+        ----------
+        azimuth : array
+            Surface azimuth angles [deg].
+        tilt : array
+            Surface tilt angles [deg].
+
+        Returns
+        -------
+        daylight_coefficients : array
+            Coefficients of the sky patches and the ground (surface, patch + 1).
+        """
+        normal = calculate_direction(90 - np.asarray(tilt, dtype=float), azimuth)
+        return self.calculate_daylight_coefficients_from_normals(normal)
+
+    def calculate_daylight_coefficients_from_normals(self, normal):
+        """
+        Calculate the daylight coefficients for surfaces or sensor points
+        from their unit normal vectors.
+
+        Parameters
+        ----------
+        normal : array
+            Unit normal vectors (point, xyz), x east, y north, z up.
+
+        Returns
+        -------
+        daylight_coefficients : array
+            Coefficients of the sky patches and the ground (point, patch + 1).
+        """
+        normal = np.atleast_2d(np.asarray(normal, dtype=float))
+        daylight_coefficients = np.empty((len(normal), self.sky_patches.number_of_patches + 1))
+        daylight_coefficients[:, :-1] = np.maximum(normal @ self.sky_patches.direction.T, 0.0)
+        daylight_coefficients[:, -1] = 0.5*(1 - normal[:, 2])
+        return daylight_coefficients
+
+    def calculate_incident_radiation(self, daylight_coefficients):
+        """
+        Calculate the incident solar radiation from daylight coefficients.
+
+        Parameters
+        ----------
+        daylight_coefficients : array
+            Coefficients of the sky patches and the ground (point, patch + 1).
+
+        Returns
+        -------
+        incident_radiation : array
+            Incident total solar radiation (point, time) [W-m^2].
+        """
+        incident_radiation = np.atleast_2d(daylight_coefficients) @ self.patch_radiation
+        return expand_compressed_values(incident_radiation, self.step_index, self.time.length)
+
+    @property
+    def solar_angles(self):
+        return self._solar_angles
+
+    @solar_angles.setter
+    def solar_angles(self, value):
+        self._solar_angles = value
+        self.update_calculated_values()
+
+    @property
+    def weather(self):
+        return self._weather
+
+    @weather.setter
+    def weather(self, value):
+        self._weather = value
+        self.update_calculated_values()
+
+    @property
+    def sky_patches(self):
+        return self._sky_patches
+
+    @sky_patches.setter
+    def sky_patches(self, value):
+        self._sky_patches = value
+        self.update_calculated_values()
+
+
+def calculate_direction(altitude, azimuth):
+    """
+    Calculate unit vectors from altitude and azimuth angles.
+
+    Parameters
+    ----------
+    altitude : array
+        Altitude angles above the horizon [deg].
+    azimuth : array
+        Azimuth angles (0 = south, west positive) [deg].
+
+    Returns
+    -------
+    direction : array
+        Unit vectors (direction, xyz), x east, y north, z up.
+    """
+    altitude = np.deg2rad(np.asarray(altitude, dtype=float))
+    azimuth = np.deg2rad(np.asarray(azimuth, dtype=float))
+    altitude, azimuth = np.broadcast_arrays(np.atleast_1d(altitude), np.atleast_1d(azimuth))
+    return np.stack([
+        -np.cos(altitude)*np.sin(azimuth),
+        -np.cos(altitude)*np.cos(azimuth),
+        np.sin(altitude),
+    ], axis=-1)
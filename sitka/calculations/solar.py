@@ -3,7 +3,29 @@
 import numpy as np
 import pandas as pd
 
-from sitka.utils.time_series import TimeSeriesComponent
+from sitka.utils.time_series import TimeSeriesComponent, expand_compressed_values
+
+SOLAR_POSITION_ALGORITHMS = ('fast', 'noaa')
+
+
+def calculate_sun_surface_azimuth(surface_azimuth, solar_azimuth):
+    """
+    Calculate the absolute sun to surface azimuth angle, wrapped so the
+    difference of azimuths on either side of north is 0-180 deg.
+
+    Parameters
+    ----------
+    surface_azimuth : float or array
+        Surface azimuth angle [deg].
+    solar_azimuth : float or array
+        Solar azimuth angle [deg].
+
+    Returns
+    -------
+    sun_surface_azimuth : array
+        Sun to surface azimuth angle [deg].
+    """
+    return np.abs((np.asarray(surface_azimuth) - np.asarray(solar_azimuth) + 180) % 360 - 180)
 
 
 class SolarAngles(TimeSeriesComponent):
@@ -14,9 +36,17 @@ class SolarAngles(TimeSeriesComponent):
     ----------
     time
     site
+    algorithm : string
+        Solar position algorithm. 'fast' uses the Cooper declination and
+        Spencer equation of time evaluated at the start of each hour. 'noaa'
+        uses the NOAA (Meeus) solar position algorithm evaluated at the
+        midpoint of each time step (accuracy better than 0.02 deg between
+        1800 and 2100).
 
     Attributes
     ----------
+    algorithm : string
+        Solar position algorithm ('fast' or 'noaa').
     gamma : Series
         Gamma angle.
     equation_of_time: Series
@@ -32,6 +62,9 @@ class SolarAngles(TimeSeriesComponent):
     sun_up: Series
         Flag to define when the sun is above the
         horizon (1 = sun up, 0 = sun is down).
+    daylight_index: array of int
+        Positions of the time steps where the sun is up. Used by the
+        shortwave calculations to skip night-time steps.
     solar_zenith: Series
         Solar zenith angle.
     solar_altitude: Series
@@ -39,7 +72,7 @@ class SolarAngles(TimeSeriesComponent):
     solar_azimuth: Series
         Solar azimuth angle.
     """
-    def __init__(self, time, site):
+    def __init__(self, time, site, algorithm='fast'):
         # Solar angles
         self.gamma = None
         self.equation_of_time = None
@@ -50,12 +83,14 @@ class SolarAngles(TimeSeriesComponent):
         self.sunset_hour_angle = None
         self.number_of_sunlight_hours = None
         self.sun_up = None
+        self.daylight_index = None
         self.solar_zenith = None
         self.solar_altitude = None
         self.solar_azimuth = None
 
         # General Properties
         self._site = site
+        self._algorithm = algorithm
 
         # Add attributes from super class
         super().__init__(time)
@@ -68,6 +103,17 @@ class SolarAngles(TimeSeriesComponent):
 
         """
         print('Updating solar angles')
+        if self.algorithm not in SOLAR_POSITION_ALGORITHMS:
+            raise ValueError('Unknown solar position algorithm: %s' % self.algorithm)
+
+        if self.algorithm == 'noaa':
+            self.calculate_midpoint_solar_position()
+            self.calculate_sunrise_hour_angle()
+            self.calculate_sunset_hour_angle()
+            self.calculate_number_of_sunlight_hours()
+            self.calculate_daylight_index()
+            return
+
         self.calculate_gamma()
         self.calculate_equation_of_time()
         self.calculate_apparent_solar_time()
@@ -80,6 +126,7 @@ class SolarAngles(TimeSeriesComponent):
         self.calculate_solar_zenith()
         self.calculate_solar_altitude()
         self.calculate_solar_azimuth()
+        self.calculate_daylight_index()
 
     def calculate_gamma(self):
         """
@@ -263,6 +310,23 @@ class SolarAngles(TimeSeriesComponent):
 
         self.sun_up = pd.Series(sun_up)
 
+    def calculate_daylight_index(self):
+        """
+        Find the positions of the time steps where the sun is up.
+
+        Parameters
+        ----------
+        sun_up : Series
+
+        Yields
+        ----------
+        daylight_index : array of int
+
+        References
+        --------
+        """
+        self.daylight_index = np.flatnonzero(np.asarray(self.sun_up) > 0)
+
     def calculate_solar_zenith(self):
         """
         Calculate the solar zenith angle for each item in the series.
@@ -335,6 +399,112 @@ class SolarAngles(TimeSeriesComponent):
         solar_azimuth = np.rad2deg(rad_solar_azimuth)
         self.solar_azimuth = pd.Series(solar_azimuth)
 
+    def calculate_midpoint_solar_position(self):
+        """
+        Calculate the sun position at the midpoint of each time step using
+        the NOAA solar position algorithm.
+
+        Parameters
+        ----------
+        datetime_range : DatetimeIndex
+        time_step : float
+        latitude : float
+        longitude : float
+        local_standard_meridian : float
+
+        Yields
+        ----------
+        gamma : Series
+        equation_of_time : Series
+        apparent_solar_time : Series
+        declination : Series
+        hour_angle : Series
+        sun_up : Series
+        solar_zenith : Series
+        solar_altitude : Series
+        solar_azimuth : Series
+
+        References
+        --------
+        Meeus, J. (1998). Astronomical Algorithms, 2nd ed.
+        NOAA Global Monitoring Laboratory, Solar Calculation Details.
+        """
+        latitude = np.deg2rad(self.site.latitude)
+        time_zone = self.site.local_standard_meridian/15
+
+        # Local standard time and Julian century at the step midpoint (UTC)
+        midpoint = self.time.datetime_range + pd.Timedelta(seconds=self.time.time_step/2)
+        local_days = (midpoint - pd.Timestamp('1970-01-01')) / pd.Timedelta(days=1)
+        local_days = np.asarray(local_days, dtype=float)
+        local_minutes = 1440*(local_days - np.floor(local_days))
+        julian_day = local_days - time_zone/24 + 2440587.5
+        julian_century = (julian_day - 2451545)/36525
+
+        # Geometric position of the sun
+        mean_longitude = np.mod(280.46646 + julian_century*(36000.76983 + 0.0003032*julian_century), 360)
+        mean_anomaly = np.deg2rad(357.52911 + julian_century*(35999.05029 - 0.0001537*julian_century))
+        eccentricity = 0.016708634 - julian_century*(0.000042037 + 0.0000001267*julian_century)
+        equation_of_center = (
+            np.sin(mean_anomaly)*(1.914602 - julian_century*(0.004817 + 0.000014*julian_century)) +
+            np.sin(2*mean_anomaly)*(0.019993 - 0.000101*julian_century) +
+            np.sin(3*mean_anomaly)*0.000289
+        )
+        omega = np.deg2rad(125.04 - 1934.136*julian_century)
+        apparent_longitude = np.deg2rad(mean_longitude + equation_of_center - 0.00569 - 0.00478*np.sin(omega))
+        mean_obliquity = 23 + (26 + (21.448 - julian_century*(46.815 + julian_century*(0.00059 - julian_century*0.001813)))/60)/60
+        obliquity = np.deg2rad(mean_obliquity + 0.00256*np.cos(omega))
+        declination = np.arcsin(np.sin(obliquity)*np.sin(apparent_longitude))
+
+        # Equation of time [min]
+        y = np.tan(obliquity/2)**2
+        rad_mean_longitude = np.deg2rad(mean_longitude)
+        equation_of_time = 4*np.rad2deg(
+            y*np.sin(2*rad_mean_longitude) -
+            2*eccentricity*np.sin(mean_anomaly) +
+            4*eccentricity*y*np.sin(mean_anomaly)*np.cos(2*rad_mean_longitude) -
+            0.5*y**2*np.sin(4*rad_mean_longitude) -
+            1.25*eccentricity**2*np.sin(2*mean_anomaly)
+        )
+
+        # Apparent solar time [hr] and hour angle [deg]
+        true_solar_time = np.mod(local_minutes + equation_of_time + 4*self.site.longitude - 60*time_zone, 1440)
+        hour_angle = true_solar_time/4 - 180
+        rad_hour_angle = np.deg2rad(hour_angle)
+
+        # Zenith and azimuth (azimuth = 0 is due south, west positive)
+        cos_zenith = np.sin(latitude)*np.sin(declination) + np.cos(latitude)*np.cos(declination)*np.cos(rad_hour_angle)
+        zenith = np.rad2deg(np.arccos(np.clip(cos_zenith, -1, 1)))
+        solar_azimuth = np.rad2deg(np.arctan2(
+            np.sin(rad_hour_angle),
+            np.cos(rad_hour_angle)*np.sin(latitude) - np.tan(declination)*np.cos(latitude)
+        ))
+
+        # Atmospheric refraction correction [deg]
+        elevation = 90 - zenith
+        tan_elevation = np.tan(np.deg2rad(elevation))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            refraction = np.select(
+                [elevation > 85, elevation > 5, elevation > -0.575],
+                [
+                    0.0,
+                    58.1/tan_elevation - 0.07/tan_elevation**3 + 0.000086/tan_elevation**5,
+                    1735 + elevation*(-518.2 + elevation*(103.4 + elevation*(-12.79 + elevation*0.711))),
+                ],
+                -20.772/tan_elevation,
+            )/3600
+        solar_altitude = elevation + refraction
+        sun_up = (solar_altitude > 0).astype(float)
+
+        self.gamma = pd.Series(360*(midpoint.dayofyear - 1 + local_minutes/1440)/365)
+        self.equation_of_time = pd.Series(equation_of_time)
+        self.apparent_solar_time = pd.Series(true_solar_time/60)
+        self.declination = pd.Series(np.rad2deg(declination))
+        self.hour_angle = pd.Series(hour_angle)
+        self.sun_up = pd.Series(sun_up)
+        self.solar_zenith = pd.Series(sun_up*(90 - solar_altitude))
+        self.solar_altitude = pd.Series(sun_up*solar_altitude)
+        self.solar_azimuth = pd.Series(solar_azimuth)
+
     @property
     def site(self):
         return self._site
@@ -344,6 +514,15 @@ class SolarAngles(TimeSeriesComponent):
         self._site= value
         self.update_calculated_values()
 
+    @property
+    def algorithm(self):
+        return self._algorithm
+
+    @algorithm.setter
+    def algorithm(self, value):
+        self._algorithm = value
+        self.update_calculated_values()
+
 class SurfaceSolarAngles(TimeSeriesComponent):
     """
     Solar angles on a surface.
@@ -393,11 +572,12 @@ class SurfaceSolarAngles(TimeSeriesComponent):
 
     def calculate_sun_surface_azimuth(self):
         """
-        Calculate the sun to surface azimuth angle for each item in the series.
+        Calculate the sun to surface azimuth angle for each item in the series,
+        wrapped to 0-180 deg.
 
         Parameters
         ----------
-        surface.azimuth : Series
+        surface.azimuth : float
         solar_azimuth : Series
 
         Yields
@@ -407,19 +587,20 @@ class SurfaceSolarAngles(TimeSeriesComponent):
         References
         --------
         """
-        surface_azimuth = np.ones(self.time.length)*self.surface.azimuth
-        solar_azimuth = self.solar_angles.solar_azimuth
-        sun_surface_azimuth = np.abs(surface_azimuth - solar_azimuth)
+        solar_azimuth = np.asarray(self.solar_angles.solar_azimuth)
+        sun_surface_azimuth = calculate_sun_surface_azimuth(self.surface.azimuth, solar_azimuth)
         self.sun_surface_azimuth = pd.Series(sun_surface_azimuth)
 
     def calculate_sun_on_surface(self):
         """
         Calculate whether the sun is incident on the surface for each item in the series.
+        Only the daylight time steps are evaluated.
 
         Parameters
         ----------
         solar_altitude : Series
         sun_surface_azimuth : Series
+        daylight_index : array of int
 
         Yields
         ----------
@@ -428,28 +609,29 @@ class SurfaceSolarAngles(TimeSeriesComponent):
         References
         --------
         """
-        sun_on_surface = False*np.ones(self.time.length)
-        sun_on_surface[
-            (self.solar_angles.solar_altitude > 0) &
-            (self.sun_surface_azimuth < 90) &
-            (self.sun_surface_azimuth > -90)
-        ] = True
+        index = self.solar_angles.daylight_index
+        solar_altitude = np.asarray(self.solar_angles.solar_altitude)[index]
+        sun_surface_azimuth = np.asarray(self.sun_surface_azimuth)[index]
+        sun_on_surface = (
+            (solar_altitude > 0) &
+            (sun_surface_azimuth < 90) &
+            (sun_surface_azimuth > -90)
+        )
+        sun_on_surface = expand_compressed_values(sun_on_surface, index, len(self.sun_surface_azimuth))
         self.sun_on_surface = pd.Series(sun_on_surface)
 
     def calculate_incidence_angle(self):
         """
         Calculate the incidence angle of the sun on the surface for each item in the series.
+        Only the daylight time steps are evaluated, the incidence angle is
+        set to 90 deg when the sun is down.
 
         Parameters
         ----------
-        sun_on_surface : Series
-        latitude : float
-        declination : Series
-        hour_angle : Series
         solar_altitude : Series
-        surface_tilt : Series
-        surface_azimuth : Series
+        surface_tilt : float
         sun_surface_azimuth : Series
+        daylight_index : array of int
 
         Yields
         ----------
@@ -458,26 +640,25 @@ class SurfaceSolarAngles(TimeSeriesComponent):
         References
         --------
         """
-        sun_on_surface = self.sun_on_surface
-        latitude = np.deg2rad(self.solar_angles.site.latitude)
-        declination = np.deg2rad(self.solar_angles.declination)
-        hour_angle = np.deg2rad(self.solar_angles.hour_angle)
-        solar_altitude = np.deg2rad(self.solar_angles.solar_altitude)
+        index = self.solar_angles.daylight_index
+        solar_altitude = np.deg2rad(np.asarray(self.solar_angles.solar_altitude)[index])
+        sun_surface_azimuth = np.deg2rad(np.asarray(self.sun_surface_azimuth)[index])
         surface_tilt = np.deg2rad(self.surface.tilt)
-        surface_azimuth = np.deg2rad(self.surface.azimuth)
-        sun_surface_azimuth = np.deg2rad(self.sun_surface_azimuth)
         incidence_angle = np.rad2deg(np.arccos(np.cos(solar_altitude)*np.cos(sun_surface_azimuth)*np.sin(surface_tilt)+np.sin(solar_altitude)*np.cos(surface_tilt)))
+        incidence_angle = expand_compressed_values(incidence_angle, index, len(self.sun_surface_azimuth), fill_value=90.0)
         self.incidence_angle = pd.Series(incidence_angle)
 
     def calculate_profile_angle(self):
         """
         Calculate the profile angle of the sun on the surface for each item in the series.
+        Only the daylight time steps are evaluated, the profile angle is set
+        to 0 deg when the sun is down.
 
         Parameters
         ----------
-        sun_on_surface : Series
         solar_altitude : Series
         sun_surface_azimuth : Series
+        daylight_index : array of int
 
         Yields
         ----------
@@ -486,10 +667,11 @@ class SurfaceSolarAngles(TimeSeriesComponent):
         References
         --------
         """
-        sun_on_surface = self.sun_on_surface
-        solar_altitude = np.deg2rad(self.solar_angles.solar_altitude)
-        sun_surface_azimuth = np.deg2rad(self.sun_surface_azimuth)
+        index = self.solar_angles.daylight_index
+        solar_altitude = np.deg2rad(np.asarray(self.solar_angles.solar_altitude)[index])
+        sun_surface_azimuth = np.deg2rad(np.asarray(self.sun_surface_azimuth)[index])
         profile_angle = np.rad2deg(np.arctan(np.tan(solar_altitude)/(np.cos(sun_surface_azimuth))))
+        profile_angle = expand_compressed_values(profile_angle, index, len(self.sun_surface_azimuth))
         self.profile_angle = pd.Series(profile_angle)
 
     @property
@@ -509,3 +691,143 @@ class SurfaceSolarAngles(TimeSeriesComponent):
     def solar_angles(self, value):
         self._solar_angles = value
         self.update_calculated_values()
+
+
+class BatchSurfaceSolarAngles(TimeSeriesComponent):
+    """
+    Solar angles on many surfaces at once.
+
+    The angles are calculated for all surfaces in one broadcast over
+    (surface, time) and only for the daylight time steps.
+
+    Parameters
+    ----------
+    time
+    solar_angles
+    azimuth : array
+        Surface azimuth angles [deg].
+    tilt : array
+        Surface tilt angles [deg].
+    compress : bool
+        If True, the results only contain the daylight time steps, in the
+        order of solar_angles.daylight_index.
+
+    Attributes
+    ----------
+    incidence_angle: array
+        Incidence angle of the sun on each surface (surface, time) [deg].
+    sun_on_surface: array
+        Flag defining whether the sun is incident on each surface (surface, time).
+    profile_angle: array
+        The profile angle of the sun on each surface (surface, time) [deg].
+    """
+    def __init__(self, time, solar_angles, azimuth, tilt, compress=False):
+        # General properties
+        self.incidence_angle = None
+        self.sun_on_surface = None
+        self.profile_angle = None
+        self.compress = compress
+
+        # Surface orientations
+        self._azimuth = azimuth
+        self._tilt = tilt
+
+        # Associated objects
+        self._solar_angles = solar_angles
+
+        # Add attributes from super class
+        super().__init__(time)
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    @classmethod
+    def from_surfaces(cls, time, solar_angles, surfaces, compress=False):
+        """
+        Create batched surface solar angles from a list of surfaces.
+        """
+        azimuth = [surface.azimuth for surface in surfaces]
+        tilt = [surface.tilt for surface in surfaces]
+        return cls(time, solar_angles, azimuth, tilt, compress=compress)
+
+    def update_calculated_values(self):
+        print('Updating batch surface solar calculations.')
+        self.calculate_surface_solar_angles()
+
+    def calculate_surface_solar_angles(self):
+        """
+        Calculate the incidence angle, sun on surface flag and profile angle
+        for all surfaces and daylight time steps.
+
+        Parameters
+        ----------
+        azimuth : array
+        tilt : array
+        solar_altitude : Series
+        solar_azimuth : Series
+        daylight_index : array of int
+
+        Yields
+        ----------
+        incidence_angle : array
+        sun_on_surface : array
+        profile_angle : array
+
+        References
+        --------
+        """
+        index = self.solar_angles.daylight_index
+        surface_azimuth = np.asarray(self.azimuth, dtype=float).reshape(-1, 1)
+        surface_tilt = np.deg2rad(np.asarray(self.tilt, dtype=float).reshape(-1, 1))
+        solar_altitude = np.asarray(self.solar_angles.solar_altitude)[index]
+        solar_azimuth = np.asarray(self.solar_angles.solar_azimuth)[index]
+
+        sun_surface_azimuth = calculate_sun_surface_azimuth(surface_azimuth, solar_azimuth)
+        sun_on_surface = (solar_altitude > 0) & (sun_surface_azimuth < 90)
+
+        rad_solar_altitude = np.deg2rad(solar_altitude)
+        rad_sun_surface_azimuth = np.deg2rad(sun_surface_azimuth)
+        cos_sun_surface_azimuth = np.cos(rad_sun_surface_azimuth)
+        cos_incidence_angle = (
+            np.cos(rad_solar_altitude)*cos_sun_surface_azimuth*np.sin(surface_tilt) +
+            np.sin(rad_solar_altitude)*np.cos(surface_tilt)
+        )
+        incidence_angle = np.rad2deg(np.arccos(cos_incidence_angle))
+        profile_angle = np.rad2deg(np.arctan(np.tan(rad_solar_altitude)/cos_sun_surface_azimuth))
+
+        if not self.compress:
+            length = len(self.solar_angles.solar_altitude)
+            incidence_angle = expand_compressed_values(incidence_angle, index, length, fill_value=90.0)
+            sun_on_surface = expand_compressed_values(sun_on_surface, index, length).astype(bool)
+            profile_angle = expand_compressed_values(profile_angle, index, length)
+
+        self.incidence_angle = incidence_angle
+        self.sun_on_surface = sun_on_surface
+        self.profile_angle = profile_angle
+
+    @property
+    def azimuth(self):
+        return self._azimuth
+
+    @azimuth.setter
+    def azimuth(self, value):
+        self._azimuth = value
+        self.update_calculated_values()
+
+    @property
+    def tilt(self):
+        return self._tilt
+
+    @tilt.setter
+    def tilt(self, value):
+        self._tilt = value
+        self.update_calculated_values()
+
+    @property
+    def solar_angles(self):
+        return self._solar_angles
+
+    @solar_angles.setter
+    def solar_angles(self, value):
+        self._solar_angles = value
+        self.update_calculated_values()
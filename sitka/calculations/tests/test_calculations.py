@@ -35,3 +35,20 @@ def test_declination():
 
     assert round(solar_angles.declination.max(),2) == 23.45
     assert round(solar_angles.declination.min(),2) == -23.45
+
+def test_noaa_solar_position():
+    # Reference case from the NREL SPA report (Reda and Andreas, 2008)
+    site = Site(latitude=39.742476, longitude=-105.1786, elevation=1830.14)
+    time = Time(year=2003, time_steps_per_hour=60)
+    solar_angles = SolarAngles(time=time, site=site, algorithm='noaa')
+    index = 289*1440 + 12*60 + 30  # 2003-10-17 12:30 (midpoint 12:30:30)
+
+    assert abs(solar_angles.solar_zenith[index] - 50.11162) < 0.02
+    assert abs(solar_angles.solar_azimuth[index] - (194.34024-180)) < 0.02
+
+def test_unknown_solar_position_algorithm():
+    site = Site()
+    time = Time()
+
+    with pytest.raises(ValueError):
+        SolarAngles(time=time, site=site, algorithm='unknown')
@@ -0,0 +1,303 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from sitka.io.time import Time
+from sitka.calculations.conduction import (
+    FiniteDifferenceMethod1D, BatchFiniteDifferenceMethod1D, ConductionTransferFunction, factor_tridiagonal, solve_tridiagonal,
+    FrequencyDomainConduction, get_conduction_transfer_function, AdaptiveFiniteDifferenceMethod1D,
+    get_finite_difference_operator, clear_conduction_transfer_function_cache,
+)
+from sitka.utils.time_stepping import StepDoublingController, interpolate_states
+
+
+def test_finite_difference_method_explicit_steps(build_wall):
+    time = Time(time_steps_per_hour=4)
+    surface, zone_air = build_wall(time)
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air)
+    for time_index in range(100):
+        fdm.run_solver(0, time_index)
+
+    expected = np.full(5, 21.0)
+    for time_index in range(100):
+        b = np.concatenate([[surface.weather.dry_bulb_temperature[time_index]], expected, [21.0]])
+        expected = fdm.A @ b
+
+    assert fdm.temperature_array.shape == (time.length, 5)
+    np.testing.assert_allclose(fdm.temperature_array[99], expected)
+    assert (fdm.temperature_array[100:] == 21).all()
+    assert list(fdm.get_temperature_dataframe().columns) == [str(x) for x in fdm.x]
+
+
+def test_finite_difference_stencil_matches_dense_matrix(build_wall):
+    time = Time(end_hour=1, time_steps_per_hour=60)
+    surface, zone_air = build_wall(time, number_of_nodes=300)
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air, scheme='explicit')
+    previous = np.linspace(5, 21, 300)
+    fdm.solve_timestep(0, previous, 0.0, 21.0)
+    A = fdm.A
+
+    assert A.shape == (300, 302)
+    assert np.count_nonzero(A) == 900
+    np.testing.assert_allclose(fdm.temperature_array[0], A @ np.concatenate([[0.0], previous, [21.0]]))
+
+
+def test_thomas_algorithm_matches_dense_solve():
+    rng = np.random.default_rng(0)
+    lower = -rng.uniform(0, 1, (3, 8))
+    upper = -rng.uniform(0, 1, (3, 8))
+    diagonal = 1 - lower - upper
+    rhs = rng.normal(size=(3, 8))
+    multiplier, inverse_pivot = factor_tridiagonal(lower, diagonal, upper)
+    solution = solve_tridiagonal(multiplier, inverse_pivot, upper, rhs)
+
+    for i in range(3):
+        matrix = np.diag(diagonal[i]) + np.diag(lower[i, 1:], -1) + np.diag(upper[i, :-1], 1)
+        np.testing.assert_allclose(solution[i], np.linalg.solve(matrix, rhs[i]))
+        np.testing.assert_allclose(solve_tridiagonal(multiplier[i], inverse_pivot[i], upper[i], rhs[i]), solution[i])
+
+
+@pytest.mark.parametrize('scheme', ['implicit', 'crank_nicolson'])
+def test_implicit_schemes_reach_steady_state(scheme, build_wall):
+    time = Time(time_steps_per_hour=1)
+    surface, zone_air = build_wall(time, number_of_nodes=50)
+    surface.weather.dry_bulb_temperature[:] = 0.0
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air, scheme=scheme)
+    for time_index in range(500):
+        fdm.run_solver(0, time_index)
+
+    R = surface.thermal_resistance_array
+    expected = 21*np.cumsum(R)[:-1]/R.sum()
+    np.testing.assert_allclose(fdm.temperature_array[499], expected, atol=1e-2)
+
+
+def test_implicit_schemes_match_explicit_reference(build_wall):
+    reference_time = Time(time_steps_per_hour=60)
+    surface, zone_air = build_wall(reference_time, number_of_nodes=10)
+    reference = FiniteDifferenceMethod1D(reference_time, surface, zone_air)
+    for time_index in range(60*48):
+        reference.run_solver(0, time_index)
+
+    time = Time(time_steps_per_hour=1)
+    surface, zone_air = build_wall(time, number_of_nodes=10)
+    surface.weather.dry_bulb_temperature = pd.Series(np.asarray(build_wall(reference_time)[0].weather.dry_bulb_temperature)[59::60])
+    for scheme, tolerance in [('implicit', 0.5), ('crank_nicolson', 0.1)]:
+        fdm = FiniteDifferenceMethod1D(time, surface, zone_air, scheme=scheme)
+        for time_index in range(48):
+            fdm.run_solver(0, time_index)
+        np.testing.assert_allclose(fdm.temperature_array[47], reference.temperature_array[60*48-1], atol=tolerance)
+
+    with pytest.raises(ValueError):
+        FiniteDifferenceMethod1D(time, surface, zone_air, scheme='unknown')
+
+
+def test_conduction_transfer_function_steady_state_and_cache():
+    # 200 mm concrete at 15 minute steps, the fastest modes are quasi-steady
+    number_of_nodes = 50
+    dx = 0.2/number_of_nodes
+    resistance = np.full(number_of_nodes + 1, dx/1.4)
+    resistance[[0, -1]] = dx/2/1.4
+    capacitance = np.full(number_of_nodes, 2.1e6*dx)
+    ctf = get_conduction_transfer_function(resistance, capacitance, 900)
+    gain = ctf.direct_gain + ctf.modal_output @ (ctf.modal_input/(1 - ctf.poles[:, None]))
+
+    assert ctf.number_of_modes == 14
+    assert len(ctf.poles) == ctf.number_of_modes
+    assert np.all(ctf.poles >= 1e-12)
+    np.testing.assert_allclose(gain, [[1/resistance.sum(), -1/resistance.sum()], [1/resistance.sum(), -1/resistance.sum()]])
+    assert get_conduction_transfer_function(resistance.copy(), capacitance.copy(), 900) is ctf
+    assert get_conduction_transfer_function(resistance, capacitance, 3600) is not ctf
+    clear_conduction_transfer_function_cache()
+    assert get_conduction_transfer_function(resistance, capacitance, 900) is not ctf
+
+
+@pytest.mark.parametrize('length', [1, 2, 64, 65, 200])
+def test_conduction_transfer_function_blocks_match_recursion(length):
+    number_of_nodes = 10
+    dx = 0.02
+    resistance = np.full(number_of_nodes + 1, dx/1.4)
+    resistance[[0, -1]] = dx/2/1.4 + np.array([0.04, 0.13])
+    ctf = ConductionTransferFunction(resistance, np.full(number_of_nodes, 2.1e6*dx), 900)
+    temperatures = np.array([10 + 10*np.sin(np.arange(length)*2*np.pi/96), np.full(length, 21.0)])
+    inside_heat_flux, outside_heat_flux = ctf.calculate_heat_flux(*temperatures)
+
+    # Step by step recursion of the modes
+    forcing = ctf.modal_input @ temperatures
+    amplitudes = forcing[:, 0]/(1 - ctf.poles)
+    expected = np.empty((2, length))
+    for t in range(length):
+        if t > 0:
+            amplitudes = ctf.poles*amplitudes + forcing[:, t-1]
+        expected[:, t] = ctf.modal_output @ amplitudes + ctf.direct_gain @ temperatures[:, t]
+
+    np.testing.assert_allclose(inside_heat_flux, expected[0])
+    np.testing.assert_allclose(outside_heat_flux, expected[1])
+
+
+def test_conduction_transfer_function_thick_wall_sub_hourly():
+    # 1 m concrete wall at 15 minute steps, many poles close to one
+    number_of_nodes = 20
+    dx = 1.0/number_of_nodes
+    resistance = np.full(number_of_nodes + 1, dx/1.4)
+    resistance[[0, -1]] = dx/2/1.4
+    capacitance = np.full(number_of_nodes, 2.1e6*dx)
+    ctf = ConductionTransferFunction(resistance, capacitance, 900)
+    length = 365*96
+    inside_heat_flux, outside_heat_flux = ctf.calculate_heat_flux(np.zeros(length), np.full(length, 21.0))
+
+    np.testing.assert_allclose(inside_heat_flux, -21/resistance.sum())
+    np.testing.assert_allclose(outside_heat_flux, -21/resistance.sum())
+
+    outside_temperature = 10 + 10*np.sin(np.linspace(0, 365*2*np.pi, length))
+    inside_heat_flux, outside_heat_flux = ctf.calculate_heat_flux(outside_temperature, np.full(length, 21.0))
+    assert np.isfinite(inside_heat_flux).all()
+    assert inside_heat_flux.mean() == pytest.approx(-11/resistance.sum(), rel=0.01)
+
+
+def test_conduction_transfer_function_matches_finite_difference(build_wall):
+    hours = 24*5
+    time = Time(time_steps_per_hour=60)
+    surface, zone_air = build_wall(time, number_of_nodes=10)
+    resistance = surface.thermal_resistance_array
+    outside_temperature = 10 + 10*np.sin(np.arange(hours)*2*np.pi/24)
+    inside_temperature = np.full(hours, 21.0)
+    ctf = ConductionTransferFunction(resistance, surface.thermal_capacitance_array, 3600)
+    inside_heat_flux, outside_heat_flux = ctf.calculate_heat_flux(outside_temperature, inside_temperature)
+
+    # Fine Crank-Nicolson reference with the outside temperature held over each hour
+    surface.weather.dry_bulb_temperature[:] = 0.0
+    surface.weather.dry_bulb_temperature[:hours*60 + 1] = np.concatenate([[outside_temperature[0]], np.repeat(outside_temperature, 60)])
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air, scheme='crank_nicolson')
+    fdm.temperature_array[0] = outside_temperature[0] + (21 - outside_temperature[0])*np.cumsum(resistance)[:-1]/resistance.sum()
+    for time_index in range(1, hours*60 + 1):
+        fdm.run_solver(0, time_index)
+    inside_node_temperature = fdm.temperature_array[60:hours*60 + 1:60, -1]
+    expected = (inside_node_temperature - 21)/resistance[-1]
+
+    np.testing.assert_allclose(inside_heat_flux[1:], expected[:-1], atol=0.01*np.abs(expected).max())
+
+
+@pytest.mark.parametrize('scheme', ['explicit', 'implicit', 'crank_nicolson', None])
+def test_batch_finite_difference_matches_single_surfaces(scheme, build_wall):
+    time = Time(time_steps_per_hour=4)
+    walls = [build_wall(time, number_of_nodes) for number_of_nodes in [3, 5, 4]]
+    surfaces = [surface for surface, zone_air in walls]
+    zone_airs = [zone_air for surface, zone_air in walls]
+    surfaces[2].weather = surfaces[0].weather
+    zone_airs[1].zone_air_temperature = pd.Series(20 + np.cos(np.linspace(0, 365*2*np.pi, time.length)))
+    batch = BatchFiniteDifferenceMethod1D(time, surfaces, zone_airs, scheme=scheme, history=True)
+    singles = [FiniteDifferenceMethod1D(time, surface, zone_air, scheme=scheme) for surface, zone_air in zip(surfaces, zone_airs)]
+    for time_index in range(1, 200):
+        batch.run_solver(0, time_index)
+        for single in singles:
+            single.run_solver(0, time_index)
+
+    assert batch.temperature.shape == (3, 5)
+    assert len(batch.outside_temperature) == 2
+    assert all(single.scheme == batch.scheme for single in singles)
+    for i, single in enumerate(singles):
+        np.testing.assert_allclose(batch.get_surface_temperature(i), single.temperature_array[199])
+        np.testing.assert_allclose(batch.get_surface_temperature(i, batch.temperature_array[150]), single.temperature_array[150])
+
+
+def test_frequency_domain_conduction_matches_finite_difference(build_wall):
+    time = Time(time_steps_per_hour=12)
+    surface, zone_air = build_wall(time, number_of_nodes=10)
+    days = np.arange(time.length)/(24*12)
+    outside_temperature = 10 + 10*np.sin(2*np.pi*days)
+    surface.weather.dry_bulb_temperature = pd.Series(outside_temperature)
+    thin_surface, _ = build_wall(time, number_of_nodes=3)
+    frequency_domain = FrequencyDomainConduction(time, [surface, thin_surface])
+    inside_heat_flux, outside_heat_flux = frequency_domain.calculate_heat_flux(outside_temperature, np.full(time.length, 21.0))
+
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air, scheme='crank_nicolson')
+    steps = 10*24*12
+    for time_index in range(1, steps):
+        fdm.run_solver(0, time_index)
+    resistance = surface.thermal_resistance_array
+    last_day = slice(steps - 24*12, steps)
+    expected_inside = (fdm.temperature_array[last_day, -1] - 21)/resistance[-1]
+    expected_outside = (outside_temperature[last_day] - fdm.temperature_array[last_day, 0])/resistance[0]
+
+    assert inside_heat_flux.shape == (2, time.length)
+    np.testing.assert_allclose(inside_heat_flux[0, last_day], expected_inside, atol=0.01*np.abs(expected_inside).max())
+    np.testing.assert_allclose(outside_heat_flux[0, last_day], expected_outside, atol=0.01*np.abs(expected_outside).max())
+    np.testing.assert_allclose(inside_heat_flux[1].mean(), (10 - 21)/thin_surface.thermal_resistance_array.sum())
+
+
+def test_finite_difference_operator_step(build_wall):
+    time = Time(time_steps_per_hour=4)
+    surface, zone_air = build_wall(time)
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air, scheme='crank_nicolson')
+    operator = get_finite_difference_operator(surface.thermal_resistance_array, surface.thermal_capacitance_array, time.time_step, 'crank_nicolson')
+    previous = np.linspace(5, 21, 5)
+    fdm.solve_timestep(0, previous, 0.0, 21.0, 2.0, 20.0)
+
+    np.testing.assert_allclose(operator.step(previous, 0.0, 21.0, 2.0, 20.0), fdm.temperature_array[0])
+
+
+def test_step_doubling_controller():
+    # Exponential decay with implicit Euler steps, the state drops quickly
+    # and then the time step grows
+    controller = StepDoublingController(8.0, levels=6, tolerance=1e-3)
+    times, states = controller.integrate(lambda state, time, time_step: state/(1 + time_step), np.array([1.0]), 0.0, 64.0)
+    time_steps = np.diff(times)
+
+    assert times[-1] == pytest.approx(64.0)
+    assert time_steps[0] < time_steps[-1]
+    assert set(np.round(np.log2(8.0/time_steps), 6)) <= set(range(7))
+    assert np.abs(states[:, 0] - np.exp(-times)).max() < 0.02
+    np.testing.assert_allclose(interpolate_states(times, states, [0.0, times[1]/2, times[1]])[:, 0], [1.0, (1 + states[1, 0])/2, states[1, 0]])
+
+
+def test_step_doubling_controller_clipped_rejection():
+    # Error estimate dt^2/2 after 4 s, a rejected step clipped by the stop
+    # time is not reused as the full step of a different time step
+    def step(state, time, time_step):
+        return state + time_step + (time >= 4)*time_step**2
+
+    controller = StepDoublingController(4.0, levels=2, tolerance=1.5)
+    times, states = controller.integrate(step, np.array([0.0]), 0.0, 6.5)
+    time_steps = np.diff(times)
+
+    assert times[-1] == pytest.approx(6.5)
+    assert (time_steps[times[:-1] >= 4]**2/2 <= 1.5).all()
+    assert controller.number_of_rejected_steps == 2
+    assert controller.number_of_inaccurate_steps == 0
+
+    controller = StepDoublingController(4.0, levels=2, tolerance=0.1)
+    controller.integrate(step, np.array([0.0]), 0.0, 6.5)
+    assert controller.number_of_inaccurate_steps == 3
+
+
+def test_adaptive_finite_difference_method(build_wall):
+    # Daily outside temperature cycle and a setpoint change after one day,
+    # compared with fixed steps of 1/16 of the reporting time step
+    results = []
+    coarse_time = Time(end_hour=48, time_steps_per_hour=4)
+    coarse_hours = np.arange(1, coarse_time.length + 1)/4
+    outside_temperature = 10 + 10*np.sin(2*np.pi*(coarse_hours - 9)/24)
+    inside_temperature = np.where(coarse_hours < 24, 18.0, 24.0)
+    for time in [coarse_time, Time(end_hour=48, time_steps_per_hour=64)]:
+        surface, zone_air = build_wall(time)
+        hours = np.arange(1, time.length + 1)*time.time_step/3600
+        surface.weather.dry_bulb_temperature = pd.Series(np.interp(hours, coarse_hours, outside_temperature))
+        zone_air.zone_air_temperature = pd.Series(np.interp(hours, coarse_hours, inside_temperature))
+        results.append((time, surface, zone_air))
+
+    time, surface, zone_air = results[1]
+    reference = FiniteDifferenceMethod1D(time, surface, zone_air, scheme='implicit')
+    for time_index in range(time.length):
+        reference.run_solver(0, time_index)
+
+    time, surface, zone_air = results[0]
+    fdm = AdaptiveFiniteDifferenceMethod1D(time, surface, zone_air, tolerance=0.02)
+    fdm.run_solver()
+    time_steps = np.diff(fdm.step_times)
+    setpoint_step = np.searchsorted(fdm.step_times, 24*3600)
+
+    assert fdm.temperature_array.shape == (time.length, 5)
+    assert np.abs(fdm.temperature_array - reference.temperature_array[15::16]).max() < 0.15
+    assert fdm.controller.number_of_steps < time.length
+    assert time_steps.max() > time.time_step
+    assert time_steps[setpoint_step] < time.time_step
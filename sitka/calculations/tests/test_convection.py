@@ -0,0 +1,133 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from sitka.io.time import Time
+from sitka.io.weather import EPW
+from sitka.calculations.convection import (
+    OutsideConvection, BatchOutsideConvection, InsideConvection, BatchInsideConvection, ROUGHNESS_COEFFICIENTS,
+    calculate_natural_convection_coefficient, calculate_outside_heat_transfer_coefficient,
+    calculate_inside_heat_transfer_coefficient,
+)
+from sitka.components.surface import Surface
+
+
+def test_outside_convection():
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.dry_bulb_temperature = pd.Series(np.full(time.length, 10.0))
+    weather.wind_speed = pd.Series(np.full(time.length, 5.0))
+    surface = Surface('surface1', azimuth=0, tilt=90, width=2, height=3)
+    convection = OutsideConvection(time, weather, surface, weather.dry_bulb_temperature + 2)
+    wind_speed = 5*(270/10)**0.14*(1.5/370)**0.22
+
+    assert convection.surface_height == 1.5
+    np.testing.assert_allclose(convection.wind_speed, wind_speed)
+    np.testing.assert_allclose(convection.heat_transfer_coefficient, 10.79 + 4.192*wind_speed)
+    np.testing.assert_allclose(convection.heat_transfer_rate, convection.heat_transfer_coefficient*2*6)
+
+
+def test_outside_convection_step_update():
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.dry_bulb_temperature = pd.Series(np.full(time.length, 10.0))
+    weather.wind_speed = pd.Series(np.full(time.length, 5.0))
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=1)
+    convection = OutsideConvection(time, weather, surface, weather.dry_bulb_temperature)
+    heat_transfer_rate = convection.heat_transfer_rate
+    convection.update_surface_temperature(12.0, 5)
+    convection.update_surface_temperature(np.array([8.0, 8.0]), 6, 8)
+
+    assert convection.heat_transfer_rate is heat_transfer_rate
+    assert (weather.dry_bulb_temperature == 10).all()
+    assert convection.surface_temperature[5] == 12
+    assert convection.heat_transfer_rate[4] == 0
+    assert convection.heat_transfer_rate[5] > 0
+    assert (convection.heat_transfer_rate[6:8] < 0).all()
+
+
+def test_exterior_convection_models():
+    delta_temperature = np.array([5.0, -5.0])
+    wind_speed = np.array([3.0, 3.0])
+    windward = np.array([True, False])
+    roughness_coefficients = ROUGHNESS_COEFFICIENTS['medium_rough']
+    natural = calculate_natural_convection_coefficient(delta_temperature, 0)
+    tarp = calculate_outside_heat_transfer_coefficient('tarp', delta_temperature, wind_speed, windward, 0, roughness_coefficients, 8, 4)
+    doe2 = calculate_outside_heat_transfer_coefficient('doe2', delta_temperature, wind_speed, windward, 0, roughness_coefficients, 8, 4)
+    mowitt = calculate_outside_heat_transfer_coefficient('mowitt', delta_temperature, wind_speed, windward, 0, roughness_coefficients, 8, 4)
+
+    np.testing.assert_allclose(natural, [9.482*5**(1/3)/6.238, 1.810*5**(1/3)/2.382])
+    np.testing.assert_allclose(calculate_natural_convection_coefficient(5.0, 90), 1.31*5**(1/3), rtol=1e-3)
+    np.testing.assert_allclose(tarp, natural + 2.537*np.array([1.0, 0.5])*1.52*np.sqrt(2*3.0))
+    np.testing.assert_allclose(doe2[0], natural[0] + 1.52*(np.sqrt(natural[0]**2 + (2.38*3**0.89)**2) - natural[0]))
+    np.testing.assert_allclose(mowitt[1], np.sqrt((0.84*5**(1/3))**2 + (3.55*3**0.617)**2))
+    with pytest.raises(ValueError):
+        calculate_outside_heat_transfer_coefficient('unknown', delta_temperature, wind_speed, windward, 0, roughness_coefficients, 8, 4)
+
+
+def test_batch_outside_convection_matches_single_surface():
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.dry_bulb_temperature = pd.Series(10 + 10*np.sin(np.linspace(0, 2*np.pi, time.length)))
+    weather.wind_speed = pd.Series(np.linspace(0, 10, time.length))
+    weather.wind_direction = pd.Series(np.linspace(0, 3600, time.length) % 360)
+    surfaces = [
+        Surface('wall', azimuth=0, tilt=90, width=2, height=3, roughness='rough'),
+        Surface('roof', azimuth=0, tilt=0, width=5, height=5),
+        Surface('east', azimuth=-90, tilt=90, width=2, height=3, roughness='smooth'),
+        Surface('west', azimuth=90, tilt=90, width=4, height=6),
+    ]
+    models = ['tarp', 'doe2', 'mowitt', 'simple_combined']
+    surface_temperature = weather.dry_bulb_temperature.values + np.arange(-2, 2).reshape(-1, 1)
+    batch = BatchOutsideConvection(time, weather, surfaces, surface_temperature, models=models)
+
+    assert batch.heat_transfer_coefficient.shape == (4, time.length)
+    for i, (surface, model) in enumerate(zip(surfaces, models)):
+        single = OutsideConvection(time, weather, surface, pd.Series(surface_temperature[i]), model=model)
+        np.testing.assert_allclose(batch.heat_transfer_coefficient[i], single.heat_transfer_coefficient)
+        np.testing.assert_allclose(batch.heat_transfer_rate[i], single.heat_transfer_rate)
+
+    # Windward for the south wall with wind from the south only
+    assert batch.windward[0][weather.wind_direction.between(100, 260).values].all()
+    assert not batch.windward[0][(weather.wind_direction < 80).values].any()
+    assert batch.windward[1].all()
+
+    batch.update_surface_temperature(weather.dry_bulb_temperature[5] + np.array([1.0, 2.0, 3.0, 4.0]), 5)
+    assert (batch.heat_transfer_rate[:, 5] > 0).all()
+
+
+def test_interior_convection_models():
+    # Inside faces of a wall, a floor (facing up) and a ceiling (facing down)
+    tilt = np.array([[90.0], [0.0], [180.0]])
+    delta_temperature = np.array([[2.0, -2.0], [2.0, -2.0], [2.0, -2.0]])
+    walton = calculate_inside_heat_transfer_coefficient('walton', delta_temperature, tilt)
+    fisher_pedersen = calculate_inside_heat_transfer_coefficient('fisher_pedersen', delta_temperature, tilt, 4.0)
+    ashrae = calculate_inside_heat_transfer_coefficient('ashrae_vertical_wall', np.array([0.0, 8.0]), 90)
+
+    np.testing.assert_allclose(walton, [[3.076, 3.076], [4.040, 0.948], [0.948, 4.040]])
+    np.testing.assert_allclose(fisher_pedersen[:, 0], [1.208 + 1.012*4**0.604, 3.873 + 0.082*4**0.98, 2.234 + 4.099*4**0.503])
+    np.testing.assert_allclose(ashrae, [0.1, 2.62])
+    with pytest.raises(ValueError):
+        calculate_inside_heat_transfer_coefficient('unknown', delta_temperature, tilt)
+
+
+def test_batch_inside_convection_matches_single_surface():
+    time = Time(time_steps_per_hour=1)
+    air_temperature = 21 + np.sin(np.linspace(0, 20*np.pi, time.length))
+    surfaces = [
+        Surface('wall', tilt=90, width=2, height=3),
+        Surface('roof', tilt=0, width=5, height=5),
+        Surface('floor', tilt=180, width=5, height=5),
+    ]
+    models = ['ashrae_vertical_wall', 'tarp', 'fisher_pedersen']
+    surface_temperature = air_temperature + np.array([[1.0], [-1.0], [0.5]])
+    batch = BatchInsideConvection(time, surfaces, surface_temperature, air_temperature, models=models, air_changes_per_hour=2.0)
+
+    for i, (surface, model) in enumerate(zip(surfaces, models)):
+        single = InsideConvection(time, surface, pd.Series(surface_temperature[i]), pd.Series(air_temperature), model=model, air_changes_per_hour=2.0)
+        np.testing.assert_allclose(batch.heat_transfer_coefficient[i], single.heat_transfer_coefficient)
+        np.testing.assert_allclose(batch.heat_transfer_rate[i], single.heat_transfer_rate)
+
+    batch.update_surface_temperature(np.array([20.0, 20.0, 20.0]), 3, air_temperature=22.0)
+    assert (batch.heat_transfer_rate[:, 3] < 0).all()
+    assert (batch.air_temperature[:, 3] == 22).all()
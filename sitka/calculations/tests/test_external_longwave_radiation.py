@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from sitka.io.time import Time
+from sitka.io.weather import EPW
+from sitka.calculations.radiation import ExternalLongwaveRadiation
+from sitka.components.surface import Surface
+
+
+def test_long_wave_radiation_coefficients():
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.dry_bulb_temperature = pd.Series(10 + 10*np.sin(np.linspace(0, 2*np.pi, time.length)))
+    weather.sky_temperature = weather.dry_bulb_temperature - 15
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=1)
+    surface_temperature = weather.dry_bulb_temperature + 5
+    longwave = ExternalLongwaveRadiation(time, weather, surface, surface_temperature)
+
+    absorptivity_sigma = longwave.absorptivity*longwave.sigma
+    abs_surf_temp = surface_temperature + 273
+    abs_amb_temp = weather.dry_bulb_temperature + 273
+    abs_sky_temp = weather.sky_temperature + 273
+    expected_ground = absorptivity_sigma*0.5*(abs_amb_temp**4 - abs_surf_temp**4)/(abs_amb_temp - abs_surf_temp)
+    expected_sky = absorptivity_sigma*0.5*(abs_sky_temp**4 - abs_surf_temp**4)/(abs_sky_temp - abs_surf_temp)
+
+    np.testing.assert_allclose(longwave.ground_radiation, expected_ground)
+    np.testing.assert_allclose(longwave.sky_radiation, expected_sky)
+    np.testing.assert_allclose(longwave.air_radiation, expected_ground/0.5)
+    np.testing.assert_allclose(longwave.total_radiation, longwave.ground_radiation + longwave.sky_radiation + longwave.air_radiation)
+
+
+def test_long_wave_radiation_equal_temperature_limit():
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.dry_bulb_temperature = pd.Series(10 + 10*np.sin(np.linspace(0, 2*np.pi, time.length)))
+    weather.sky_temperature = weather.dry_bulb_temperature - 15
+    surface = Surface('surface1', azimuth=0, tilt=0, width=1, height=1)
+    longwave = ExternalLongwaveRadiation(time, weather, surface, weather.dry_bulb_temperature)
+    expected = 4*longwave.absorptivity*longwave.sigma*(weather.dry_bulb_temperature + 273)**3
+
+    assert (longwave.ground_radiation == 0).all()
+    np.testing.assert_allclose(longwave.air_radiation, expected)
+
+
+def test_long_wave_radiation_step_update():
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.dry_bulb_temperature = pd.Series(10 + 10*np.sin(np.linspace(0, 2*np.pi, time.length)))
+    weather.sky_temperature = weather.dry_bulb_temperature - 15
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=1)
+    longwave = ExternalLongwaveRadiation(time, weather, surface, weather.dry_bulb_temperature)
+    total_radiation = longwave.total_radiation
+    surface_temperature = weather.dry_bulb_temperature + 5
+    longwave.update_surface_temperature(surface_temperature[10], 10)
+    longwave.update_surface_temperature(surface_temperature[20:30].values, 20, 30)
+    expected = ExternalLongwaveRadiation(time, weather, surface, surface_temperature)
+
+    assert longwave.total_radiation is total_radiation
+    assert (weather.dry_bulb_temperature + 5 == surface_temperature).all()
+    np.testing.assert_allclose(longwave.total_radiation[[10] + list(range(20, 30))], expected.total_radiation[[10] + list(range(20, 30))])
+    np.testing.assert_allclose(longwave.total_radiation[:10], ExternalLongwaveRadiation(time, weather, surface, weather.dry_bulb_temperature).total_radiation[:10])
+
+
+def test_long_wave_radiation_without_sky_temperature():
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.dry_bulb_temperature = pd.Series(10 + 10*np.sin(np.linspace(0, 2*np.pi, time.length)))
+    weather.sky_temperature = None
+    surface = Surface('surface1', azimuth=0, tilt=0, width=1, height=1)
+    longwave = ExternalLongwaveRadiation(time, weather, surface, weather.dry_bulb_temperature)
+    expected = 4*longwave.absorptivity*longwave.sigma*(weather.dry_bulb_temperature + 273)**3
+
+    np.testing.assert_allclose(longwave.air_radiation, expected)
+    assert longwave.sky_radiation is None
+    assert longwave.total_radiation is None
@@ -5,7 +5,7 @@ from sitka.general.settings import Settings
 from sitka.io.time import Time
 from sitka.io.weather import EPW
 from sitka.calculations.solar import SolarAngles, SurfaceSolarAngles
-from sitka.calculations.radiation import ExternalShortwaveRadiation
+from sitka.calculations.radiation import ExternalShortwaveRadiation, PerezSkyModel
 from sitka.components.site import Site
 from sitka.components.surface import Surface
 
@@ -68,7 +68,7 @@ def test_incident_diffuse_radiation():
     surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
     external_shortwave_radiation = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles)
 
-    assert round(external_shortwave_radiation.incident_diffuse_radiation.max(),2) == 1.3
+    assert round(external_shortwave_radiation.incident_diffuse_radiation.max(),2) == 0.77
     assert round(external_shortwave_radiation.incident_diffuse_radiation.min(),2) == 0.55
 
 
@@ -101,7 +101,7 @@ def test_incident_total_radiation():
     external_shortwave_radiation = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles)
 
     assert round(external_shortwave_radiation.incident_total_radiation.max(),2) == 1.55
-    assert round(external_shortwave_radiation.incident_total_radiation.min(),2) == 0.76
+    assert round(external_shortwave_radiation.incident_total_radiation.min(),2) == 0.75
 
 
 def test_incident_heat_flux():
@@ -117,4 +117,44 @@ def test_incident_heat_flux():
     external_shortwave_radiation = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles)
 
     assert round(external_shortwave_radiation.incident_total_heat_flux.max(),2) == 1.24
-    assert round(external_shortwave_radiation.incident_total_heat_flux.min(),2) == 0.61
+    assert round(external_shortwave_radiation.incident_total_heat_flux.min(),2) == 0.60
+
+
+def test_night_time_shortwave_radiation():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time()
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.ones(time.length)
+    weather.diffuse_horizontal_radiation = np.ones(time.length)
+    solar_angles = SolarAngles(time=time, site=site)
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=1)
+    surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+    external_shortwave_radiation = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles)
+    night = solar_angles.sun_up == 0
+
+    assert len(solar_angles.daylight_index) == (~night).sum()
+    assert (surface_solar_angles.incidence_angle[night] == 90).all()
+    assert (external_shortwave_radiation.incident_direct_radiation[night] == 0).all()
+    assert (external_shortwave_radiation.ratio_of_clear_sky_diffuse_on_horizontal_to_tilted[night] == 0.55).all()
+
+
+def test_perez_incident_diffuse_radiation():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.ones(time.length)*600
+    weather.diffuse_horizontal_radiation = np.ones(time.length)*100
+    solar_angles = SolarAngles(time=time, site=site)
+    sky_model = PerezSkyModel(time, solar_angles, weather)
+    horizontal = Surface('surface1', azimuth=0, tilt=0, width=1, height=1)
+    south = Surface('surface2', azimuth=0, tilt=90, width=1, height=1)
+    north = Surface('surface3', azimuth=180, tilt=90, width=1, height=1)
+    radiation = {}
+    for surface in [horizontal, south, north]:
+        surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+        radiation[surface.name] = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles, sky_model=sky_model)
+    high_sun = np.asarray(solar_angles.solar_altitude) > 5
+
+    assert (sky_model.sky_clearness_bin[high_sun] > 0).all()
+    np.testing.assert_allclose(radiation['surface1'].incident_diffuse_radiation[high_sun], 100)
+    assert radiation['surface2'].incident_diffuse_radiation.sum() > radiation['surface3'].incident_diffuse_radiation.sum()
@@ -0,0 +1,184 @@
+import warnings
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from sitka.io.time import Time
+from sitka.components.site import Site
+from sitka.calculations.fluids import (
+    MoistAir, calculate_standard_pressure, calculate_saturation_pressure, calculate_humidity_ratio,
+    calculate_vapor_pressure, calculate_relative_humidity, calculate_enthalpy, calculate_dew_point_temperature,
+    calculate_wet_bulb_temperature, calculate_specific_volume, calculate_density, SaturationPressureTable,
+    get_wet_bulb_table, calculate_humidity_ratio_from_relative_humidity, solve_wet_bulb_temperature, solve_dry_bulb_temperature, solve_dew_point_temperature,
+    _solve_wet_bulb_temperature_from_relative_humidity,
+)
+
+
+def test_saturation_pressure():
+    # 2017 ASHRAE Handbook of Fundamentals, Chapter 1, Table 3
+    temperature = pd.Series([-20.0, -10.0, 0.0, 20.0, 50.0])
+    saturation_pressure = calculate_saturation_pressure(temperature)
+
+    np.testing.assert_allclose(saturation_pressure, [103.26, 259.87, 611.21, 2339.3, 12352.0], rtol=1e-3)
+    assert calculate_saturation_pressure(20.0) == pytest.approx(2339.3, rel=1e-3)
+
+
+def test_moist_air_functions():
+    pressure = calculate_standard_pressure(0)
+    humidity_ratio = calculate_humidity_ratio(calculate_saturation_pressure(20.0), pressure)
+
+    assert pressure == pytest.approx(101325)
+    assert calculate_standard_pressure(1500) == pytest.approx(84556, rel=1e-3)
+    # Table 2 values include the enhancement factor, about 0.4 % higher
+    assert humidity_ratio == pytest.approx(0.014758/1.0044, rel=1e-3)
+    assert calculate_vapor_pressure(humidity_ratio, pressure) == pytest.approx(2339.3, rel=1e-3)
+    assert calculate_relative_humidity(20.0, humidity_ratio, pressure) == pytest.approx(1.0)
+    assert calculate_enthalpy(20.0, humidity_ratio) == pytest.approx(57.42e3, rel=1e-3)
+    assert calculate_specific_volume(20.0, humidity_ratio, pressure) == pytest.approx(0.8497, rel=1e-3)
+    assert calculate_density(20.0, 0.0, pressure) == pytest.approx(1.204, rel=1e-3)
+    np.testing.assert_allclose(
+        calculate_dew_point_temperature(calculate_saturation_pressure([-20.0, -5.0, 5.0, 20.0, 40.0])),
+        [-20.0, -5.0, 5.0, 20.0, 40.0], atol=0.1,
+    )
+    np.testing.assert_allclose(calculate_wet_bulb_temperature([20.0, 30.0], [1.0, 1.0]), [20.0, 30.0], atol=0.5)
+
+
+def test_moist_air():
+    time = Time(end_hour=24)
+    site = Site(elevation=100)
+    moist_air = MoistAir(time, site)
+    moist_air.set_temperature(np.linspace(-10, 35, 96))
+    moist_air.set_relative_humidity(np.linspace(0.2, 0.9, 96))
+    moist_air.calculate_properties()
+
+    assert moist_air.standard_pressure == pytest.approx(calculate_standard_pressure(100))
+    np.testing.assert_allclose(moist_air.relative_humidity, np.linspace(0.2, 0.9, 96))
+    np.testing.assert_allclose(
+        calculate_relative_humidity(moist_air.dry_bulb_temperature, moist_air.humidity_ratio, moist_air.standard_pressure),
+        moist_air.relative_humidity,
+    )
+    assert (moist_air.dew_point_temperature < moist_air.wet_bulb_temperature + 0.5).all()
+    assert (moist_air.wet_bulb_temperature < moist_air.dry_bulb_temperature + 0.5).all()
+    assert (moist_air.moist_air_density > 1.0).all()
+    assert len(moist_air.enthalpy) == 96
+    assert moist_air.converged.all()
+
+    # Dry air has no dew point
+    moist_air.set_humidity_ratio(np.zeros(96))
+    with pytest.warns(RuntimeWarning, match='did not converge'):
+        moist_air.calculate_properties()
+    assert not moist_air.converged.any()
+    assert np.isfinite(moist_air.wet_bulb_temperature).all()
+
+    # The given relative humidity is kept for a new temperature
+    moist_air.set_relative_humidity(np.linspace(0.2, 0.9, 96))
+    moist_air.set_temperature(np.linspace(0, 40, 96))
+    moist_air.calculate_properties()
+    np.testing.assert_allclose(moist_air.relative_humidity, np.linspace(0.2, 0.9, 96))
+    humidity_ratio = moist_air.humidity_ratio.copy()
+    moist_air.set_humidity_ratio(humidity_ratio)
+    moist_air.set_temperature(np.linspace(10, 50, 96))
+    moist_air.calculate_properties()
+    np.testing.assert_allclose(moist_air.humidity_ratio, humidity_ratio)
+
+
+def test_saturation_pressure_table():
+    table = SaturationPressureTable()
+    temperature = np.array([-80.0, -20.3, -0.1, 0.0, 0.1, 23.7, 99.9, 120.0])
+
+    assert table.maximum_relative_error < 1e-7
+    np.testing.assert_allclose(table.calculate_saturation_pressure(temperature), calculate_saturation_pressure(temperature), rtol=1e-7)
+
+
+def test_wet_bulb_table():
+    table = get_wet_bulb_table()
+    temperature = np.linspace(-20, 50, 1001)
+    relative_humidity = np.linspace(0.05, 1.0, 1001)
+    pressure = np.linspace(70000, 105000, 1001)
+    wet_bulb_temperature = _solve_wet_bulb_temperature_from_relative_humidity(temperature, relative_humidity, pressure)
+    error = np.abs(table.interpolate(temperature, relative_humidity, pressure) - wet_bulb_temperature)
+
+    assert table is get_wet_bulb_table()
+    assert table.maximum_error < 0.02
+    assert error.max() <= table.maximum_error
+    # States on either side of the change from ice to water at a 0 C wet bulb
+    near_freezing = np.abs(wet_bulb_temperature) < 0.5
+    assert near_freezing.any()
+    assert error[near_freezing].max() <= table.maximum_error
+
+    # States outside the grid are solved
+    temperature = np.array([-45.0, 70.0, 20.0, 20.0, 20.0])
+    relative_humidity = np.array([0.5, 0.3, 0.005, 0.5, 0.5])
+    pressure = np.array([101325.0, 101325.0, 101325.0, 50000.0, 101325.0])
+    np.testing.assert_allclose(
+        table.interpolate(temperature, relative_humidity, pressure),
+        _solve_wet_bulb_temperature_from_relative_humidity(temperature, relative_humidity, pressure),
+        atol=table.maximum_error,
+    )
+    assert table.interpolate(-45.0, 0.5, 101325.0) < -45
+
+
+def test_solve_wet_bulb_temperature():
+    # Humidity ratios from the psychrometric equation for known wet bulb
+    # temperatures, over water and ice
+    temperature = np.array([[30.0, 20.0], [5.0, -10.0]])
+    wet_bulb_temperature = np.array([[25.0, 10.0], [1.0, -12.0]])
+    pressure = 101325
+    saturation_humidity_ratio = calculate_humidity_ratio(calculate_saturation_pressure(wet_bulb_temperature), pressure)
+    humidity_ratio = np.where(
+        wet_bulb_temperature >= 0,
+        ((2501 - 2.326*wet_bulb_temperature)*saturation_humidity_ratio - 1.006*(temperature - wet_bulb_temperature))/(2501 + 1.86*temperature - 4.186*wet_bulb_temperature),
+        ((2830 - 0.24*wet_bulb_temperature)*saturation_humidity_ratio - 1.006*(temperature - wet_bulb_temperature))/(2830 + 1.86*temperature - 2.1*wet_bulb_temperature),
+    )
+    result, converged = solve_wet_bulb_temperature(temperature, humidity_ratio, pressure)
+
+    assert converged.all()
+    np.testing.assert_allclose(result, wet_bulb_temperature, atol=1e-6)
+    assert np.ndim(solve_wet_bulb_temperature(20.0, 0.01, pressure)[0]) == 0
+    # Dry air has no dew point to start from
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result, converged = solve_wet_bulb_temperature([20.0, -5.0], 0.0, pressure)
+    assert converged.all()
+    assert (result < [20.0, -5.0]).all()
+    assert solve_wet_bulb_temperature(20.0, 0.01, pressure)[0] == pytest.approx(
+        calculate_wet_bulb_temperature(20.0, calculate_relative_humidity(20.0, 0.01, pressure)), abs=0.5)
+
+
+def test_solve_inverse_states():
+    temperature, relative_humidity, pressure = np.meshgrid(
+        np.linspace(-40, 60, 101), np.linspace(0.01, 1, 34), [60000, 101325], indexing='ij')
+    humidity_ratio = calculate_humidity_ratio_from_relative_humidity(temperature, relative_humidity, pressure)
+    dry_bulb_temperature, converged = solve_dry_bulb_temperature(calculate_enthalpy(temperature, humidity_ratio), relative_humidity, pressure)
+
+    assert converged.all()
+    np.testing.assert_allclose(dry_bulb_temperature, temperature, atol=1e-6)
+
+    dew_point_temperature, converged = solve_dew_point_temperature(humidity_ratio, pressure)
+    assert converged.all()
+    # Vapor pressures between the ice and water equations at 0 C, 1e-4 apart,
+    # have frost points just above 0 C
+    np.testing.assert_allclose(calculate_saturation_pressure(dew_point_temperature), calculate_vapor_pressure(humidity_ratio, pressure), rtol=1e-4)
+    saturated = relative_humidity == 1
+    np.testing.assert_allclose(solve_dew_point_temperature(humidity_ratio[saturated], pressure[saturated])[0], temperature[saturated], atol=2e-3)
+
+    # States that cannot be solved are not converged
+    assert not solve_dew_point_temperature(0.0, 101325)[1]
+
+
+def test_moist_air_table_mode():
+    time = Time(end_hour=24)
+    site = Site()
+    results = []
+    for mode in ['exact', 'table']:
+        moist_air = MoistAir(time, site, mode=mode)
+        moist_air.set_temperature(np.linspace(-10, 35, 96))
+        moist_air.set_relative_humidity(np.linspace(0.2, 0.9, 96))
+        moist_air.calculate_properties()
+        results.append(moist_air)
+
+    np.testing.assert_allclose(results[1].humidity_ratio, results[0].humidity_ratio, rtol=1e-7)
+    np.testing.assert_allclose(results[1].wet_bulb_temperature, results[0].wet_bulb_temperature, atol=get_wet_bulb_table().maximum_error)
+    with pytest.raises(ValueError):
+        MoistAir(time, site, mode='fast')
@@ -0,0 +1,81 @@
+import pytest
+import numpy as np
+
+from sitka.io.time import Time
+from sitka.io.weather import EPW
+from sitka.calculations.solar import SolarAngles, SurfaceSolarAngles
+from sitka.calculations.radiation import ExternalShortwaveRadiation, IrradiationMap, PerezSkyModel
+from sitka.components.site import Site
+from sitka.components.surface import Surface
+
+
+def test_irradiation_map_init():
+    site = Site()
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.ones(time.length)
+    weather.diffuse_horizontal_radiation = np.ones(time.length)
+    solar_angles = SolarAngles(time=time, site=site)
+    irradiation_map = IrradiationMap(time, solar_angles, weather, azimuth=[0, 90, 180], tilt=[0, 90])
+
+    assert irradiation_map.annual_total_irradiation.shape == (3, 2)
+    assert irradiation_map.monthly_direct_irradiation.shape == (12, 3, 2)
+
+
+def test_irradiation_map_matches_external_shortwave_radiation():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.linspace(0, 500, time.length)
+    weather.diffuse_horizontal_radiation = np.linspace(100, 0, time.length)
+    solar_angles = SolarAngles(time=time, site=site)
+    irradiation_map = IrradiationMap(time, solar_angles, weather, azimuth=[-100, 30], tilt=[45, 120], chunk_size=3)
+
+    for azimuth in [-100, 30]:
+        for tilt in [45, 120]:
+            surface = Surface('surface1', azimuth=azimuth, tilt=tilt, width=1, height=1)
+            surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+            external_shortwave_radiation = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles)
+
+            assert irradiation_map.annual_direct_irradiation.loc[azimuth, tilt] == pytest.approx(external_shortwave_radiation.incident_direct_radiation.sum())
+            assert irradiation_map.annual_diffuse_irradiation.loc[azimuth, tilt] == pytest.approx(external_shortwave_radiation.incident_diffuse_radiation.sum())
+            assert irradiation_map.annual_reflected_irradiation.loc[azimuth, tilt] == pytest.approx(external_shortwave_radiation.incident_reflected_radiation.sum())
+
+
+def test_perez_irradiation_map_matches_external_shortwave_radiation():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.linspace(0, 500, time.length)
+    weather.diffuse_horizontal_radiation = np.linspace(100, 0, time.length)
+    solar_angles = SolarAngles(time=time, site=site)
+    sky_model = PerezSkyModel(time, solar_angles, weather)
+    irradiation_map = IrradiationMap(time, solar_angles, weather, azimuth=[-100, 30], tilt=[45, 120], sky_model=sky_model)
+
+    for azimuth in [-100, 30]:
+        for tilt in [45, 120]:
+            surface = Surface('surface1', azimuth=azimuth, tilt=tilt, width=1, height=1)
+            surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+            external_shortwave_radiation = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles, sky_model=sky_model)
+
+            assert irradiation_map.annual_diffuse_irradiation.loc[azimuth, tilt] == pytest.approx(external_shortwave_radiation.incident_diffuse_radiation.sum())
+
+
+def test_irradiation_map_north_surfaces_sub_hourly():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time(time_steps_per_hour=4)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.linspace(0, 500, time.length)
+    weather.diffuse_horizontal_radiation = np.linspace(100, 0, time.length)
+    solar_angles = SolarAngles(time=time, site=site, algorithm='noaa')
+    irradiation_map = IrradiationMap(time, solar_angles, weather, azimuth=[-150, 180], tilt=[90])
+
+    for azimuth in [-150, 180]:
+        surface = Surface('surface1', azimuth=azimuth, tilt=90, width=1, height=1)
+        surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+        external_shortwave_radiation = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles)
+
+        # Irradiation [Wh/m^2] of 15 minute irradiance [W/m^2]
+        assert irradiation_map.annual_direct_irradiation.loc[azimuth, 90] > 0
+        assert irradiation_map.annual_direct_irradiation.loc[azimuth, 90] == pytest.approx(external_shortwave_radiation.incident_direct_radiation.sum()/4)
+        assert irradiation_map.annual_diffuse_irradiation.loc[azimuth, 90] == pytest.approx(external_shortwave_radiation.incident_diffuse_radiation.sum()/4)
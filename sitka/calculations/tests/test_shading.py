@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+
+from sitka.io.time import Time
+from sitka.io.weather import EPW
+from sitka.calculations.solar import SolarAngles, SurfaceSolarAngles
+from sitka.calculations.radiation import ExternalShortwaveRadiation
+from sitka.calculations.shading import Overhang, Fin, HorizonProfile, ShadingMask, RayCastShading
+from sitka.components.site import Site
+from sitka.components.surface import Surface
+from sitka.geometry.bvh import BoundingVolumeHierarchy
+
+
+def test_overhang_sunlit_fraction():
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=2)
+    overhang = Overhang(depth=1.0)
+    sunlit_fraction = overhang.calculate_sunlit_fraction(surface, np.array([0.0, 0.0, 0.0]), np.array([0.0, 45.0, 80.0]))
+
+    np.testing.assert_allclose(sunlit_fraction, [1.0, 0.5, 0.0])
+
+
+def test_fin_sunlit_fraction():
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=1)
+    fin = Fin(depth=0.5, side='right')
+    sunlit_fraction = fin.calculate_sunlit_fraction(surface, np.array([-45.0, 45.0]), np.array([30.0, 30.0]))
+
+    np.testing.assert_allclose(sunlit_fraction, [1.0, 0.5])
+
+
+def test_shading_mask_lookup():
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=2)
+    obstructions = [Overhang(depth=1.0), HorizonProfile(azimuth=[-180, 0, 180], altitude=[0, 10, 0])]
+    shading_mask = ShadingMask(surface, obstructions, resolution=1.0)
+    solar_azimuth = np.array([0.0, 0.0, 30.0, 179.6])
+    solar_altitude = np.array([5.0, 45.0, 20.0, 10.0])
+    expected = np.ones(4)
+    for obstruction in obstructions:
+        expected *= obstruction.calculate_sunlit_fraction(surface, np.round(solar_azimuth), np.round(solar_altitude))
+
+    assert shading_mask.sunlit_fraction.shape == (360, 91)
+    np.testing.assert_allclose(shading_mask.calculate_sunlit_fraction(solar_azimuth, solar_altitude), expected)
+
+
+def test_shaded_incident_direct_radiation():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.ones(time.length)
+    weather.diffuse_horizontal_radiation = np.ones(time.length)
+    solar_angles = SolarAngles(time=time, site=site)
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=1)
+    surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+    unshaded = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles)
+    shaded = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles, shading=ShadingMask(surface, [Overhang(depth=0.5)]))
+    blocked = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles, shading=ShadingMask(surface, [HorizonProfile([-180, 180], [90, 90])]))
+
+    assert 0 < shaded.incident_direct_radiation.sum() < unshaded.incident_direct_radiation.sum()
+    assert blocked.incident_direct_radiation.sum() == 0
+    assert (shaded.incident_diffuse_radiation == unshaded.incident_diffuse_radiation).all()
+
+
+def test_ray_cast_shading_by_wall():
+    # Wall 2 m south of the points, 10 m high and 100 m long
+    wall = np.array([[-50, -2, 0], [50, -2, 0], [50, -2, 10], [-50, -2, 10]], dtype=float)
+    bvh = BoundingVolumeHierarchy([wall])
+    points = np.array([[0, 0, 1], [0, 0, 20]], dtype=float)
+    ray_cast_shading = RayCastShading(bvh, points, normals=[[0, -1, 0], [0, -1, 0]])
+    solar_azimuth = np.array([0.0, 0.0, 0.2, 180.0])
+    solar_altitude = np.array([30.0, 70.0, 30.0, 30.0])
+    sunlit = ray_cast_shading.calculate_point_sunlit(solar_azimuth, solar_altitude)
+
+    assert sunlit.tolist() == [[False, False, False, False], [True, True, True, False]]
+    assert len(ray_cast_shading.cache) == 3
+    np.testing.assert_allclose(ray_cast_shading.calculate_sunlit_fraction(solar_azimuth, solar_altitude), [0.5, 0.5, 0.5, 0.0])
+
+
+def test_ray_cast_shaded_incident_direct_radiation():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.ones(time.length)
+    weather.diffuse_horizontal_radiation = np.ones(time.length)
+    solar_angles = SolarAngles(time=time, site=site)
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=1)
+    surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+    wall = np.array([[-50, -5, 0], [50, -5, 0], [50, -5, 5], [-50, -5, 5]], dtype=float)
+    points = np.array([[0, 0, 1], [0, 0, 4], [0, 0, 10]], dtype=float)
+    ray_cast_shading = RayCastShading(BoundingVolumeHierarchy([wall]), points, normals=np.tile([0, -1, 0], (3, 1)))
+    unshaded = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles)
+    shaded = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles, shading=ray_cast_shading.get_surface_shading([0, 1]))
+    open_sky = ExternalShortwaveRadiation(time, solar_angles, weather, surface, surface_solar_angles, shading=ray_cast_shading.get_surface_shading([2]))
+
+    assert 0 < shaded.incident_direct_radiation.sum() < unshaded.incident_direct_radiation.sum()
+    np.testing.assert_allclose(open_sky.incident_direct_radiation, unshaded.incident_direct_radiation, atol=0.05)
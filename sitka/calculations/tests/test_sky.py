@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+
+from sitka.io.time import Time
+from sitka.io.weather import EPW
+from sitka.calculations.solar import SolarAngles
+from sitka.calculations.sky import SkyPatches, SkyMatrix, calculate_direction
+from sitka.components.site import Site
+
+
+def test_tregenza_sky_patches():
+    sky_patches = SkyPatches()
+
+    assert sky_patches.number_of_patches == 145
+    assert round(sky_patches.solid_angle.sum(), 6) == round(2*np.pi, 6)
+
+
+def test_reinhart_sky_patches():
+    sky_patches = SkyPatches(subdivision=2)
+
+    assert sky_patches.number_of_patches == 577
+    assert round(sky_patches.solid_angle.sum(), 6) == round(2*np.pi, 6)
+
+
+def test_sky_patch_index():
+    sky_patches = SkyPatches()
+    patch_index = sky_patches.calculate_patch_index(sky_patches.altitude, sky_patches.azimuth)
+
+    np.testing.assert_array_equal(patch_index, np.arange(sky_patches.number_of_patches))
+
+
+def test_sky_matrix_diffuse_horizontal_radiation():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.zeros(time.length)
+    weather.diffuse_horizontal_radiation = np.ones(time.length)
+    solar_angles = SolarAngles(time=time, site=site, algorithm='noaa')
+    sky_matrix = SkyMatrix(time, solar_angles, weather)
+    daylight_coefficients = sky_matrix.calculate_daylight_coefficients(azimuth=[0, 0], tilt=[0, 90])
+    incident_radiation = sky_matrix.calculate_incident_radiation(daylight_coefficients)
+
+    assert incident_radiation.shape == (2, time.length)
+    np.testing.assert_allclose(incident_radiation[0], 1.0)
+    np.testing.assert_allclose(incident_radiation[1], 0.5 + 0.5*sky_matrix.ground_reflectance, rtol=0.02)
+
+
+def test_sky_matrix_direct_radiation():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time(time_steps_per_hour=1)
+    weather = EPW(time)
+    solar_angles = SolarAngles(time=time, site=site, algorithm='noaa')
+    weather.direct_normal_radiation = np.asarray(solar_angles.sun_up)*500
+    weather.diffuse_horizontal_radiation = np.zeros(time.length)
+    sky_matrix = SkyMatrix(time, solar_angles, weather, SkyPatches(subdivision=2))
+    azimuth = np.array([0, 90, 180])
+    tilt = np.array([0, 90, 60])
+    daylight_coefficients = sky_matrix.calculate_daylight_coefficients(azimuth, tilt)
+    daylight_coefficients[:, -1] = 0
+    incident_radiation = sky_matrix.calculate_incident_radiation(daylight_coefficients)
+
+    normal = calculate_direction(90 - tilt, azimuth)
+    sun = calculate_direction(solar_angles.solar_altitude, solar_angles.solar_azimuth)
+    expected = np.maximum(normal @ sun.T, 0)*np.asarray(weather.direct_normal_radiation)
+    np.testing.assert_allclose(incident_radiation.sum(axis=1), expected.sum(axis=1), rtol=0.01)
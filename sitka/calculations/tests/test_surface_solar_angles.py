@@ -1,7 +1,8 @@
 import pytest
+import numpy as np
 
 from sitka.io.time import Time
-from sitka.calculations.solar import SolarAngles, SurfaceSolarAngles
+from sitka.calculations.solar import SolarAngles, SurfaceSolarAngles, BatchSurfaceSolarAngles
 from sitka.components.site import Site
 from sitka.components.surface import Surface
 
@@ -23,3 +24,63 @@ def test_sun_surface_azimuth():
 
     assert round(surface_solar_angles.sun_surface_azimuth.max(),0) == 90.0
     assert round(surface_solar_angles.sun_surface_azimuth.min(),0) == 0.0
+
+def test_batch_surface_solar_angles():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time()
+    solar_angles = SolarAngles(time=time, site=site)
+    surfaces = [
+        Surface('surface1', azimuth=0, tilt=90, width=1, height=1),
+        Surface('surface2', azimuth=-45, tilt=30, width=1, height=1),
+        Surface('surface3', azimuth=120, tilt=0, width=1, height=1),
+    ]
+    batch = BatchSurfaceSolarAngles.from_surfaces(time, solar_angles, surfaces)
+
+    assert batch.incidence_angle.shape == (3, time.length)
+    for i, surface in enumerate(surfaces):
+        surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+        np.testing.assert_allclose(batch.incidence_angle[i], surface_solar_angles.incidence_angle)
+        np.testing.assert_allclose(batch.profile_angle[i], surface_solar_angles.profile_angle)
+        np.testing.assert_array_equal(batch.sun_on_surface[i], surface_solar_angles.sun_on_surface)
+
+def test_compressed_batch_surface_solar_angles():
+    site = Site(latitude=47.68, longitude=-122.25, elevation=20.0)
+    time = Time()
+    solar_angles = SolarAngles(time=time, site=site)
+    batch = BatchSurfaceSolarAngles(time, solar_angles, azimuth=[0, 90], tilt=[90, 90], compress=True)
+
+    assert batch.incidence_angle.shape == (2, len(solar_angles.daylight_index))
+
+
+def test_north_surface_sun_on_surface():
+    site = Site(latitude=50.0, longitude=0.0, elevation=0.0)
+    time = Time()
+    solar_angles = SolarAngles(time=time, site=site, algorithm='noaa')
+    surface = Surface('surface1', azimuth=180, tilt=90, width=1, height=1)
+    surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+
+    # Sunlit when the sun is up and north of the east-west line
+    solar_azimuth = np.deg2rad(np.asarray(solar_angles.solar_azimuth))
+    expected = (np.asarray(solar_angles.solar_altitude) > 0) & (np.cos(solar_azimuth) < 0)
+    morning = expected & (np.asarray(solar_angles.solar_azimuth) < 0)
+
+    assert morning.any()
+    assert (np.asarray(surface_solar_angles.sun_surface_azimuth) <= 180).all()
+    np.testing.assert_array_equal(np.asarray(surface_solar_angles.sun_on_surface).astype(bool), expected)
+
+
+def test_north_surface_batch_surface_solar_angles():
+    site = Site(latitude=50.0, longitude=0.0, elevation=0.0)
+    time = Time()
+    solar_angles = SolarAngles(time=time, site=site, algorithm='noaa')
+    surfaces = [
+        Surface('surface1', azimuth=180, tilt=90, width=1, height=1),
+        Surface('surface2', azimuth=-150, tilt=60, width=1, height=1),
+    ]
+    batch = BatchSurfaceSolarAngles.from_surfaces(time, solar_angles, surfaces)
+
+    for i, surface in enumerate(surfaces):
+        surface_solar_angles = SurfaceSolarAngles(time, solar_angles, surface)
+        np.testing.assert_array_equal(batch.sun_on_surface[i], surface_solar_angles.sun_on_surface)
+        np.testing.assert_allclose(batch.incidence_angle[i], surface_solar_angles.incidence_angle)
+        np.testing.assert_allclose(batch.profile_angle[i], surface_solar_angles.profile_angle)
@@ -0,0 +1,308 @@
+"""Materials and constructions of surfaces.
+"""
+import numpy as np
+
+from sitka.calculations.conduction import (
+    get_conduction_transfer_function, get_finite_difference_operator, select_finite_difference_scheme,
+)
+
+
+class Material:
+    """
+    Properties for a homogeneous material layer.
+
+    Parameters
+    ----------
+    name : string
+    thickness : float
+    conductivity : float
+    density : float
+    specific_heat : float
+
+    Attributes
+    ----------
+    name : string
+        Name of the material.
+    thickness : float
+        layer thickness [m].
+    conductivity : float
+        thermal conductivity [W/m-K].
+    density : float
+        density [kg/m^3].
+    specific_heat : float
+        specific heat [J/kg-K].
+    resistance : float
+        thermal resistance of the layer [m^2-K/W].
+    diffusivity : float
+        thermal diffusivity [m^2/s].
+    """
+    def __init__(self, name, thickness, conductivity, density, specific_heat):
+        # General Properties
+        self.name = name
+
+        # Thermal properties
+        self.thickness = thickness  # layer thickness [m]
+        self.conductivity = conductivity  # thermal conductivity [W/m-K]
+        self.density = density  # density [kg/m^3]
+        self.specific_heat = specific_heat  # specific heat [J/kg-K]
+
+    @property
+    def resistance(self):
+        return self.thickness/self.conductivity
+
+    @property
+    def diffusivity(self):
+        return self.conductivity/(self.density*self.specific_heat)
+
+
+class Construction:
+    """
+    Layers of materials from the outside to the inside of a surface.
+
+    The node discretization, finite difference operators and conduction
+    transfer functions are calculated once per distinct set of layer
+    properties and time step, so constructions with the same layers share
+    them. At most DISCRETIZATION_CACHE_SIZE discretizations are kept.
+
+    Parameters
+    ----------
+    name : string
+    materials : list of Material
+        Layers from the outside to the inside.
+    outside_film_resistance : float
+        Resistance added between the outside boundary and the first node
+        [m^2-K/W]. Zero makes the boundary the outside surface temperature.
+    inside_film_resistance : float
+        Resistance added between the last node and the inside boundary
+        [m^2-K/W]. Zero makes the boundary the inside surface temperature.
+    space_discretization_constant : float
+        Constant of the node spacing sqrt(constant x diffusivity x time
+        step) default 3.
+
+    Attributes
+    ----------
+    name : string
+    materials : list of Material
+    thickness : float
+        total thickness [m].
+    resistance : float
+        total resistance including the film resistances [m^2-K/W].
+    u_factor : float
+        thermal transmittance [W/m^2-K].
+    key : tuple
+        Properties identifying constructions with the same layers.
+    """
+    def __init__(self, name, materials, outside_film_resistance=0.0, inside_film_resistance=0.0,
+                 space_discretization_constant=3.0):
+        self.name = name
+        self.materials = materials
+        self.outside_film_resistance = outside_film_resistance
+        self.inside_film_resistance = inside_film_resistance
+        self.space_discretization_constant = space_discretization_constant
+
+    @property
+    def thickness(self):
+        return sum(material.thickness for material in self.materials)
+
+    @property
+    def resistance(self):
+        return self.outside_film_resistance + sum(material.resistance for material in self.materials) + self.inside_film_resistance
+
+    @property
+    def u_factor(self):
+        return 1/self.resistance
+
+    @property
+    def key(self):
+        return (
+            tuple((m.thickness, m.conductivity, m.density, m.specific_heat) for m in self.materials),
+            self.outside_film_resistance,
+            self.inside_film_resistance,
+            self.space_discretization_constant,
+        )
+
+    def get_discretization(self, time_step):
+        """
+        Get the node discretization of the construction for a time step.
+
+        Parameters
+        ----------
+        time_step : float
+            Time step [s].
+
+        Returns
+        -------
+        discretization : ConstructionDiscretization
+        """
+        key = (self.key, float(time_step))
+        if key not in _DISCRETIZATION_CACHE:
+            if len(_DISCRETIZATION_CACHE) >= DISCRETIZATION_CACHE_SIZE:
+                del _DISCRETIZATION_CACHE[next(iter(_DISCRETIZATION_CACHE))]
+            _DISCRETIZATION_CACHE[key] = ConstructionDiscretization(self, time_step)
+        return _DISCRETIZATION_CACHE[key]
+
+    def get_finite_difference_operator(self, time_step, scheme=None):
+        """
+        Get the shared finite difference operator of the construction.
+
+        Parameters
+        ----------
+        time_step : float
+            Time step [s].
+        scheme : string
+            Time stepping scheme ('explicit', 'implicit' or 'crank_nicolson'),
+            default explicit when it is stable for the discretization and
+            implicit otherwise.
+
+        Returns
+        -------
+        operator : FiniteDifferenceOperator
+        """
+        discretization = self.get_discretization(time_step)
+        R = discretization.thermal_resistance_array
+        C = discretization.thermal_capacitance_array
+        if scheme is None:
+            scheme = select_finite_difference_scheme(R, C, time_step)
+        return get_finite_difference_operator(R, C, time_step, scheme)
+
+    def get_conduction_transfer_function(self, time_step):
+        """
+        Get the shared conduction transfer functions of the construction.
+
+        Parameters
+        ----------
+        time_step : float
+            Time step [s].
+
+        Returns
+        -------
+        conduction_transfer_function : ConductionTransferFunction
+        """
+        discretization = self.get_discretization(time_step)
+        return get_conduction_transfer_function(
+            discretization.thermal_resistance_array, discretization.thermal_capacitance_array, time_step
+        )
+
+
+class ConstructionDiscretization:
+    """
+    Node discretization of a construction for a time step.
+
+    Each layer is divided into equal cells no thicker than
+    sqrt(constant x diffusivity x time step), with a node at the centre of
+    each cell. The Fourier numbers of the cells are at least 1/constant, so
+    the explicit scheme is usually unstable for the discretization and the
+    finite difference solvers select the implicit scheme by default.
+
+    Parameters
+    ----------
+    construction : Construction
+    time_step : float
+        Time step [s].
+
+    Attributes
+    ----------
+    nodes_per_layer : list of int
+        Number of nodes in each material layer.
+    layers : list of string
+        Material name of each node.
+    thickness : float
+        total thickness [m].
+    node_thickness : array
+        Cell thickness of each node [m].
+    x : array
+        Position of each node from the outside [m].
+    thermal_resistance_array : array
+        Resistances between the boundaries and the nodes (node + 1) [m^2-K/W].
+    thermal_capacitance_array : array
+        Node capacitances (node) [J/m^2-K].
+    """
+    def __init__(self, construction, time_step):
+        self.nodes_per_layer = None
+        self.layers = None
+        self.thickness = None
+        self.node_thickness = None
+        self.x = None
+        self.thermal_resistance_array = None
+        self.thermal_capacitance_array = None
+        self._construction = construction
+        self._time_step = time_step
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_nodes()
+        self.calculate_resistance_and_capacitance()
+
+    def calculate_nodes(self):
+        """
+        Divide each layer into cells.
+
+        Yields
+        ----------
+        nodes_per_layer : list of int
+        layers : list of string
+        thickness : float
+        node_thickness : array
+        x : array
+        """
+        layers = []
+        node_thickness = []
+        nodes_per_layer = []
+        for material in self.construction.materials:
+            maximum_thickness = np.sqrt(self.construction.space_discretization_constant*material.diffusivity*self.time_step)
+            number_of_nodes = max(1, int(np.ceil(material.thickness/maximum_thickness)))
+            nodes_per_layer.append(number_of_nodes)
+            layers.extend([material.name]*number_of_nodes)
+            node_thickness.extend([material.thickness/number_of_nodes]*number_of_nodes)
+        self.nodes_per_layer = nodes_per_layer
+        self.layers = layers
+        self.node_thickness = np.array(node_thickness)
+        self.thickness = self.node_thickness.sum()
+        self.x = np.cumsum(self.node_thickness) - self.node_thickness/2
+
+    def calculate_resistance_and_capacitance(self):
+        """
+        Calculate the resistances between nodes and the node capacitances.
+
+        Yields
+        ----------
+        thermal_resistance_array : array
+        thermal_capacitance_array : array
+        """
+        conductivity = np.concatenate([
+            np.full(n, material.conductivity) for material, n in zip(self.construction.materials, self.nodes_per_layer)
+        ])
+        heat_capacity = np.concatenate([
+            np.full(n, material.density*material.specific_heat) for material, n in zip(self.construction.materials, self.nodes_per_layer)
+        ])
+        half_resistance = self.node_thickness/(2*conductivity)
+
+        resistance = np.empty(len(self.node_thickness) + 1)
+        resistance[0] = self.construction.outside_film_resistance + half_resistance[0]
+        resistance[1:-1] = half_resistance[:-1] + half_resistance[1:]
+        resistance[-1] = half_resistance[-1] + self.construction.inside_film_resistance
+
+        self.thermal_resistance_array = resistance
+        self.thermal_capacitance_array = heat_capacity*self.node_thickness
+
+    @property
+    def construction(self):
+        return self._construction
+
+    @property
+    def time_step(self):
+        return self._time_step
+
+
+# Largest number of cached discretizations, the oldest is dropped first
+DISCRETIZATION_CACHE_SIZE = 256
+_DISCRETIZATION_CACHE = {}
+
+
+def clear_discretization_cache():
+    """
+    Remove all cached construction discretizations.
+    """
+    _DISCRETIZATION_CACHE.clear()
@@ -36,8 +36,18 @@ class Surface:
         surface height [m].
     area : float
         wall surface area [m^2].
+    absorptivity : float
+        exterior solar absorptivity [0-1].
+    roughness : string
+        exterior surface roughness for convection ('very_rough', 'rough',
+        'medium_rough', 'medium_smooth', 'smooth' or 'very_smooth').
+    perimeter : float
+        wall surface perimeter [m].
+    construction : Construction
+        layers of materials from the outside to the inside.
     """
-    def __init__(self, name, azimuth=0, tilt=90, width=0, height=0):
+    def __init__(self, name, azimuth=0, tilt=90, width=0, height=0, absorptivity=0.8, roughness='medium_rough',
+                 construction=None):
         # General Properties
         self.name = name
 
@@ -49,6 +59,102 @@ class Surface:
         self.width = width  # surface width [m]
         self.height = height  # surface height [m]
         self.area = width*height  # wall surface area [m^2]
+        self.perimeter = 2*(width + height)  # wall surface perimeter [m]
+
+        # Optical properties
+        self.absorptivity = absorptivity  # exterior solar absorptivity []
+        self.roughness = roughness  # exterior surface roughness
+
+        # Thermal properties
+        self.construction = construction  # layers from outside to inside
+
+
+class OrientationCache:
+    """
+    Share surface solar angles and incident shortwave radiation between
+    surfaces with the same orientation.
+
+    Orientations are grouped by azimuth and tilt rounded to the resolution,
+    together with the time, solar angles and weather objects used. The
+    cached objects are calculated for the rounded orientation.
+
+    Parameters
+    ----------
+    resolution : float
+        Angle resolution used to group orientations [deg].
+
+    Attributes
+    ----------
+    resolution : float
+        Angle resolution used to group orientations [deg].
+    surface_solar_angles : dict
+        Cached SurfaceSolarAngles by orientation key.
+    external_shortwave_radiation : dict
+        Cached ExternalShortwaveRadiation by orientation key.
+    """
+    def __init__(self, resolution=0.1):
+        self.resolution = resolution
+        self.surface_solar_angles = {}
+        self.external_shortwave_radiation = {}
+        self._surfaces = {}
+
+    def get_orientation(self, surface):
+        """
+        Round the surface azimuth and tilt to the cache resolution.
+
+        Returns
+        -------
+        orientation : tuple of int
+            Azimuth and tilt in multiples of the resolution.
+        """
+        return (
+            int(np.round(surface.azimuth/self.resolution)),
+            int(np.round(surface.tilt/self.resolution)),
+        )
+
+    def get_orientation_surface(self, surface):
+        """
+        Get the shared surface representing the orientation of a surface.
+        """
+        orientation = self.get_orientation(surface)
+        if orientation not in self._surfaces:
+            self._surfaces[orientation] = Surface(
+                'orientation_%d_%d' % orientation,
+                azimuth=orientation[0]*self.resolution,
+                tilt=orientation[1]*self.resolution,
+            )
+        return self._surfaces[orientation]
+
+    def get_surface_solar_angles(self, time, solar_angles, surface):
+        """
+        Get the shared SurfaceSolarAngles for the orientation of a surface.
+        """
+        key = self.get_orientation(surface) + (id(time), id(solar_angles))
+        if key not in self.surface_solar_angles:
+            orientation_surface = self.get_orientation_surface(surface)
+            self.surface_solar_angles[key] = SurfaceSolarAngles(time, solar_angles, orientation_surface)
+        return self.surface_solar_angles[key]
+
+    def get_external_shortwave_radiation(self, time, solar_angles, weather, surface):
+        """
+        Get the shared ExternalShortwaveRadiation for the orientation of a surface.
+        """
+        key = self.get_orientation(surface) + (id(time), id(solar_angles), id(weather))
+        if key not in self.external_shortwave_radiation:
+            orientation_surface = self.get_orientation_surface(surface)
+            surface_solar_angles = self.get_surface_solar_angles(time, solar_angles, surface)
+            self.external_shortwave_radiation[key] = ExternalShortwaveRadiation(
+                time, solar_angles, weather, orientation_surface, surface_solar_angles
+            )
+        return self.external_shortwave_radiation[key]
+
+    def clear(self):
+        """
+        Remove all cached objects.
+        """
+        self.surface_solar_angles = {}
+        self.external_shortwave_radiation = {}
+        self._surfaces = {}
 
 
 class HeatTransferSurface(TimeSeriesComponent):
@@ -62,6 +168,9 @@ class HeatTransferSurface(TimeSeriesComponent):
     solar_angles : SolarAngles
     weather : Weather
     surface : Surface
+    orientation_cache : OrientationCache
+        Optional cache used to share solar calculations between surfaces
+        with the same orientation.
 
     Attributes
     ----------
@@ -70,21 +179,40 @@ class HeatTransferSurface(TimeSeriesComponent):
     surface_solar_angles : SurfaceSolarAngles
     external_shortwave_radiation : ExternalShortwaveRadiation
     external_longwave_radiation : ExternalLongwaveRadiation
+    absorbed_shortwave_heat_flux : Series
+        Absorbed solar heat flux on the exterior of the surface [W/m^2].
+    absorbed_shortwave_heat_gain : Series
+        Absorbed solar heat gain on the exterior of the surface [W].
     exterior_surface_temperature : Series
     time : Time
     solar_angles : SolarAngles
     weather : Weather
     surface : Surface
     surface_solar_angles : SurfaceSolarAngles
+    discretization : ConstructionDiscretization
+        Node discretization of the surface construction for the time step,
+        shared with surfaces of the same construction, None without a
+        construction. The node properties below need a construction.
+    layers : list of string
+        Material name of each node.
+    thickness : float
+        Construction thickness [m].
+    thermal_resistance_array : array
+        Resistances between the boundaries and the nodes (node + 1) [m^2-K/W].
+    thermal_capacitance_array : array
+        Node capacitances (node) [J/m^2-K].
     """
-    def __init__(self, name, time, solar_angles, weather, surface):
+    def __init__(self, name, time, solar_angles, weather, surface, orientation_cache=None):
         # General Properties
         self.name = name
+        self.orientation_cache = orientation_cache
 
         # Solar Properties
         self.surface_solar_angles = None
         self.external_shortwave_radiation = None
         self.external_longwave_radiation = None
+        self.absorbed_shortwave_heat_flux = None
+        self.absorbed_shortwave_heat_gain = None
 
         # Thermal Properties
         self.exterior_surface_temperature = None
@@ -105,6 +233,7 @@ class HeatTransferSurface(TimeSeriesComponent):
             self.initialize_exterior_surface_temperature()
             self.setup_surface_solar_angles()
             self.setup_external_solar_radiation()
+            self.calculate_absorbed_shortwave_radiation()
 
     def initialize_exterior_surface_temperature(self):
         """
@@ -123,7 +252,9 @@ class HeatTransferSurface(TimeSeriesComponent):
 
     def setup_surface_solar_angles(self):
         """
-        Create an object for surface solar angles.
+        Create an object for surface solar angles. The object is shared
+        with other surfaces of the same orientation when an orientation
+        cache is used.
 
         Yields
         ----------
@@ -132,11 +263,16 @@ class HeatTransferSurface(TimeSeriesComponent):
         References
         --------
         """
-        self.surface_solar_angles = SurfaceSolarAngles(self.time, self.solar_angles, self.surface)
+        if self.orientation_cache is not None:
+            self.surface_solar_angles = self.orientation_cache.get_surface_solar_angles(self.time, self.solar_angles, self.surface)
+        else:
+            self.surface_solar_angles = SurfaceSolarAngles(self.time, self.solar_angles, self.surface)
 
     def setup_external_solar_radiation(self):
         """
-        Create object for external shortwave radiation calculations.
+        Create object for external shortwave radiation calculations. The
+        shortwave radiation object is shared with other surfaces of the same
+        orientation when an orientation cache is used.
 
         Yields
         ----------
@@ -146,9 +282,56 @@ class HeatTransferSurface(TimeSeriesComponent):
         References
         --------
         """
-        self.external_shortwave_radiation = ExternalShortwaveRadiation(self.time, self.solar_angles, self.weather, self.surface, self.surface_solar_angles)
+        if self.orientation_cache is not None:
+            self.external_shortwave_radiation = self.orientation_cache.get_external_shortwave_radiation(self.time, self.solar_angles, self.weather, self.surface)
+        else:
+            self.external_shortwave_radiation = ExternalShortwaveRadiation(self.time, self.solar_angles, self.weather, self.surface, self.surface_solar_angles)
         self.external_longwave_radiation = ExternalLongwaveRadiation(self.time, self.weather, self.surface, self.exterior_surface_temperature)
 
+    def calculate_absorbed_shortwave_radiation(self):
+        """
+        Scale the incident shortwave radiation by the surface absorptivity
+        and area.
+
+        Yields
+        ----------
+        absorbed_shortwave_heat_flux : Series
+        absorbed_shortwave_heat_gain : Series
+
+        References
+        --------
+        """
+        incident_total_radiation = self.external_shortwave_radiation.incident_total_radiation
+        self.absorbed_shortwave_heat_flux = pd.Series(self.surface.absorptivity*incident_total_radiation)
+        self.absorbed_shortwave_heat_gain = pd.Series(self.absorbed_shortwave_heat_flux*self.surface.area)
+
+    @property
+    def discretization(self):
+        if self.surface.construction is None:
+            return None
+        return self.surface.construction.get_discretization(self.time.time_step)
+
+    def _get_discretization(self):
+        if self.surface.construction is None:
+            raise ValueError('Surface %s has no construction to discretize' % self.surface.name)
+        return self.discretization
+
+    @property
+    def layers(self):
+        return self._get_discretization().layers
+
+    @property
+    def thickness(self):
+        return self._get_discretization().thickness
+
+    @property
+    def thermal_resistance_array(self):
+        return self._get_discretization().thermal_resistance_array
+
+    @property
+    def thermal_capacitance_array(self):
+        return self._get_discretization().thermal_capacitance_array
+
     @property
     def solar_angles(self):
         return self._solar_angles
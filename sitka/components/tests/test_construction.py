@@ -0,0 +1,116 @@
+import pytest
+import numpy as np
+
+from sitka.io.time import Time
+from sitka.io.weather import EPW
+from sitka.calculations.solar import SolarAngles
+from sitka.calculations.conduction import FiniteDifferenceMethod1D, BatchFiniteDifferenceMethod1D, clear_finite_difference_operator_cache
+from sitka.calculations import conduction as conduction_module
+from sitka.components import construction as construction_module
+from sitka.components.site import Site
+from sitka.components.surface import Surface, HeatTransferSurface
+from sitka.components.construction import Material, Construction, clear_discretization_cache
+
+
+def build_construction(name='wall'):
+    brick = Material('brick', 0.1, 0.9, 1900, 800)
+    insulation = Material('insulation', 0.05, 0.04, 30, 1400)
+    gypsum = Material('gypsum', 0.013, 0.16, 800, 1090)
+    return Construction(name, [brick, insulation, gypsum], outside_film_resistance=0.04, inside_film_resistance=0.13)
+
+
+def test_construction_discretization():
+    construction = build_construction()
+    discretization = construction.get_discretization(900)
+
+    assert construction.resistance == pytest.approx(0.04 + 0.1/0.9 + 0.05/0.04 + 0.013/0.16 + 0.13)
+    assert construction.u_factor == pytest.approx(1/construction.resistance)
+    assert len(discretization.layers) == sum(discretization.nodes_per_layer)
+    assert len(discretization.thermal_resistance_array) == len(discretization.layers) + 1
+    assert len(discretization.thermal_capacitance_array) == len(discretization.layers)
+    assert discretization.thickness == pytest.approx(construction.thickness)
+    assert discretization.thermal_resistance_array.sum() == pytest.approx(construction.resistance)
+    assert discretization.thermal_capacitance_array.sum() == pytest.approx(0.1*1900*800 + 0.05*30*1400 + 0.013*800*1090)
+    for material, number_of_nodes in zip(construction.materials, discretization.nodes_per_layer):
+        assert material.thickness/number_of_nodes <= np.sqrt(3*material.diffusivity*900)
+
+
+def test_construction_cache_shared(monkeypatch):
+    construction1 = build_construction('wall1')
+    construction2 = build_construction('wall2')
+
+    assert construction1.get_discretization(900) is construction2.get_discretization(900)
+    assert construction1.get_discretization(900) is not construction1.get_discretization(3600)
+    assert construction1.get_finite_difference_operator(900, 'implicit') is construction2.get_finite_difference_operator(900, 'implicit')
+    assert construction1.get_conduction_transfer_function(3600) is construction2.get_conduction_transfer_function(3600)
+
+    # The caches are bounded and can be cleared
+    discretization = construction1.get_discretization(900)
+    operator = construction1.get_finite_difference_operator(900, 'implicit')
+    clear_discretization_cache()
+    clear_finite_difference_operator_cache()
+    assert construction1.get_discretization(900) is not discretization
+    assert construction1.get_finite_difference_operator(900, 'implicit') is not operator
+    monkeypatch.setattr(construction_module, 'DISCRETIZATION_CACHE_SIZE', 2)
+    monkeypatch.setattr(conduction_module, 'OPERATOR_CACHE_SIZE', 2)
+    for time_step in [60, 120, 300, 600]:
+        construction1.get_finite_difference_operator(time_step, 'implicit')
+    assert len(construction_module._DISCRETIZATION_CACHE) <= 2
+    assert len(conduction_module._OPERATOR_CACHE) <= 2
+
+
+def test_heat_transfer_surface_construction():
+    site = Site()
+    time = Time(time_steps_per_hour=4)
+    solar_angles = SolarAngles(time=time, site=site)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.ones(time.length)
+    weather.diffuse_horizontal_radiation = np.ones(time.length)
+    construction = build_construction()
+    surface = Surface('surface1', azimuth=0, tilt=90, width=1, height=1, construction=construction)
+    ht_surface = HeatTransferSurface('ht_surface1', time, solar_angles, weather, surface)
+    discretization = construction.get_discretization(time.time_step)
+
+    assert ht_surface.discretization is discretization
+    assert ht_surface.layers == discretization.layers
+    np.testing.assert_array_equal(ht_surface.thermal_resistance_array, discretization.thermal_resistance_array)
+    np.testing.assert_array_equal(ht_surface.thermal_capacitance_array, discretization.thermal_capacitance_array)
+
+    surface = Surface('surface2', azimuth=0, tilt=90, width=1, height=1)
+    ht_surface = HeatTransferSurface('ht_surface2', time, solar_angles, weather, surface)
+    assert ht_surface.discretization is None
+    with pytest.raises(ValueError, match='no construction'):
+        ht_surface.thermal_resistance_array
+
+
+def test_finite_difference_operator_shared_between_surfaces(build_construction_wall):
+    time = Time(time_steps_per_hour=4)
+    surfaces = []
+    for name in ['wall1', 'wall2']:
+        surface, zone_air = build_construction_wall(time, build_construction(name))
+        surfaces.append(surface)
+    fdm1 = FiniteDifferenceMethod1D(time, surfaces[0], zone_air, scheme='implicit')
+    fdm2 = FiniteDifferenceMethod1D(time, surfaces[1], zone_air, scheme='implicit')
+    batch = BatchFiniteDifferenceMethod1D(time, surfaces, zone_air, scheme='implicit')
+    for time_index in range(96):
+        fdm1.run_solver(0, time_index)
+        batch.run_solver(0, time_index)
+
+    assert fdm1.multiplier is fdm2.multiplier
+    np.testing.assert_allclose(batch.temperature[0], fdm1.temperature_array[95])
+
+
+def test_construction_wall_default_scheme_stable(build_construction_wall):
+    # 200 mm concrete without films, the explicit scheme is unstable for the discretization
+    concrete = Material('concrete', 0.2, 1.4, 2100, 1000)
+    construction = Construction('concrete', [concrete])
+    time = Time(time_steps_per_hour=1)
+    surface, zone_air = build_construction_wall(time, construction)
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air)
+    for time_index in range(24*30):
+        fdm.run_solver(0, time_index)
+
+    assert fdm.scheme == 'implicit'
+    assert construction.get_finite_difference_operator(time.time_step).scheme == 'implicit'
+    assert (fdm.temperature_array[:24*30] >= 0).all()
+    assert (fdm.temperature_array[:24*30] <= 21).all()
@@ -5,7 +5,7 @@ from sitka.io.time import Time
 from sitka.io.weather import EPW
 from sitka.calculations.solar import SolarAngles
 from sitka.components.site import Site
-from sitka.components.surface import Surface, HeatTransferSurface
+from sitka.components.surface import Surface, HeatTransferSurface, OrientationCache
 
 
 def test_surface_init():
@@ -28,3 +28,24 @@ def test_heat_transfer_surface_init():
     ht_surface = HeatTransferSurface('ht_surface1', time, solar_angles, weather, surface)
 
     assert ht_surface is not None
+
+
+def test_orientation_cache():
+    site = Site()
+    time = Time()
+    solar_angles = SolarAngles(time=time, site=site)
+    weather = EPW(time)
+    weather.direct_normal_radiation = np.ones(time.length)
+    weather.diffuse_horizontal_radiation = np.ones(time.length)
+    orientation_cache = OrientationCache()
+    surface1 = Surface('surface1', azimuth=0, tilt=90, width=1, height=1)
+    surface2 = Surface('surface2', azimuth=0.01, tilt=90, width=2, height=1, absorptivity=0.4)
+    surface3 = Surface('surface3', azimuth=90, tilt=90, width=1, height=1)
+    ht_surface1 = HeatTransferSurface('ht_surface1', time, solar_angles, weather, surface1, orientation_cache)
+    ht_surface2 = HeatTransferSurface('ht_surface2', time, solar_angles, weather, surface2, orientation_cache)
+    ht_surface3 = HeatTransferSurface('ht_surface3', time, solar_angles, weather, surface3, orientation_cache)
+
+    assert ht_surface1.external_shortwave_radiation is ht_surface2.external_shortwave_radiation
+    assert ht_surface1.external_shortwave_radiation is not ht_surface3.external_shortwave_radiation
+    assert len(orientation_cache.external_shortwave_radiation) == 2
+    np.testing.assert_allclose(ht_surface2.absorbed_shortwave_heat_gain, ht_surface1.absorbed_shortwave_heat_gain)
@@ -0,0 +1,253 @@
+"""Bounding volume hierarchy for ray casting against polygons.
+"""
+import numpy as np
+
+
+class BoundingVolumeHierarchy:
+    """
+    Bounding volume hierarchy of triangles for occlusion ray casting.
+
+    Polygons are split into triangles and sorted into a binary tree of
+    axis-aligned bounding boxes. The tree is stored as flat arrays so that
+    batches of rays can be traversed together.
+
+    Parameters
+    ----------
+    polygons : list of array
+        Planar convex polygons, each an array of vertices (vertex, xyz) [m].
+    leaf_size : int
+        Maximum number of triangles in a leaf node.
+
+    Attributes
+    ----------
+    triangles : array
+        Triangle vertices in tree order (triangle, vertex, xyz) [m].
+    node_minimum : array
+        Minimum corner of the node bounding boxes (node, xyz) [m].
+    node_maximum : array
+        Maximum corner of the node bounding boxes (node, xyz) [m].
+    node_left : array of int
+        Left child of each node, -1 for leaf nodes.
+    node_right : array of int
+        Right child of each node, -1 for leaf nodes.
+    node_start : array of int
+        First triangle of each leaf node.
+    node_count : array of int
+        Number of triangles in each leaf node.
+    """
+    def __init__(self, polygons, leaf_size=4):
+        self.triangles = None
+        self.node_minimum = None
+        self.node_maximum = None
+        self.node_left = None
+        self.node_right = None
+        self.node_start = None
+        self.node_count = None
+        self.leaf_size = leaf_size
+        self._polygons = polygons
+
+        # Run method to update all calculated values
+        self.update_calculated_values()
+
+    def update_calculated_values(self):
+        self.calculate_triangles()
+        self.build_tree()
+
+    def calculate_triangles(self):
+        """
+        Split the polygons into triangles by fanning from the first vertex.
+
+        Yields
+        ----------
+        triangles : array
+        """
+        triangles = []
+        for polygon in self.polygons:
+            polygon = np.asarray(polygon, dtype=float)
+            for i in range(1, len(polygon) - 1):
+                triangles.append([polygon[0], polygon[i], polygon[i + 1]])
+        self.triangles = np.array(triangles, dtype=float).reshape(-1, 3, 3)
+
+    def build_tree(self):
+        """
+        Build the tree by splitting the triangles at the median centroid on
+        the longest axis of each node.
+
+        Yields
+        ----------
+        triangles : array
+        node_minimum : array
+        node_maximum : array
+        node_left : array of int
+        node_right : array of int
+        node_start : array of int
+        node_count : array of int
+        """
+        triangles = self.triangles
+        order = np.arange(len(triangles))
+        centroid = triangles.mean(axis=1)
+        triangle_minimum = triangles.min(axis=1)
+        triangle_maximum = triangles.max(axis=1)
+
+        node_minimum = []
+        node_maximum = []
+        node_left = []
+        node_right = []
+        node_start = []
+        node_count = []
+
+        # Each item is (node, start, stop) of the triangles in order
+        stack = [(0, 0, len(triangles))]
+        for values in (node_minimum, node_maximum, node_left, node_right, node_start, node_count):
+            values.append(None)
+        while stack:
+            node, start, stop = stack.pop()
+            members = order[start:stop]
+            node_minimum[node] = triangle_minimum[members].min(axis=0) if len(members) else np.zeros(3)
+            node_maximum[node] = triangle_maximum[members].max(axis=0) if len(members) else np.zeros(3)
+            node_start[node] = start
+            node_count[node] = stop - start
+            node_left[node] = -1
+            node_right[node] = -1
+            if stop - start <= self.leaf_size:
+                continue
+
+            # Split at the median centroid on the longest axis
+            axis = np.argmax(centroid[members].max(axis=0) - centroid[members].min(axis=0))
+            middle = (stop - start)//2
+            partition = np.argpartition(centroid[members, axis], middle)
+            order[start:stop] = members[partition]
+
+            left = len(node_left)
+            right = left + 1
+            for values in (node_minimum, node_maximum, node_left, node_right, node_start, node_count):
+                values.extend([None, None])
+            node_left[node] = left
+            node_right[node] = right
+            node_count[node] = 0
+            stack.append((left, start, start + middle))
+            stack.append((right, start + middle, stop))
+
+        self.triangles = triangles[order]
+        self.node_minimum = np.array(node_minimum, dtype=float)
+        self.node_maximum = np.array(node_maximum, dtype=float)
+        self.node_left = np.array(node_left, dtype=int)
+        self.node_right = np.array(node_right, dtype=int)
+        self.node_start = np.array(node_start, dtype=int)
+        self.node_count = np.array(node_count, dtype=int)
+
+    def intersects(self, origins, directions, max_distance=np.inf):
+        """
+        Test whether rays hit any triangle.
+
+        All rays are traversed together: the (ray, node) pairs still to be
+        tested are held in arrays and each tree level is one vectorized
+        bounding box test, followed by one vectorized triangle test for the
+        pairs that reached a leaf. Rays stop being traversed once they hit.
+
+        Parameters
+        ----------
+        origins : array
+            Ray origins (ray, xyz) [m].
+        directions : array
+            Ray directions (ray, xyz), not necessarily normalized.
+        max_distance : float
+            Maximum distance along the ray, in multiples of the direction.
+
+        Returns
+        -------
+        hit : array of bool
+        """
+        origins = np.atleast_2d(np.asarray(origins, dtype=float))
+        directions = np.atleast_2d(np.asarray(directions, dtype=float))
+        origins, directions = np.broadcast_arrays(origins, directions)
+        hit = np.zeros(len(origins), dtype=bool)
+        if len(self.triangles) == 0:
+            return hit
+
+        safe_directions = np.where(np.abs(directions) < 1e-12, 1e-12, directions)
+        inverse_directions = 1/safe_directions
+        ray = np.arange(len(origins))
+        node = np.zeros(len(origins), dtype=int)
+        while len(ray):
+            # Bounding box (slab) test
+            t1 = (self.node_minimum[node] - origins[ray])*inverse_directions[ray]
+            t2 = (self.node_maximum[node] - origins[ray])*inverse_directions[ray]
+            t_near = np.maximum(np.minimum(t1, t2).max(axis=1), 0)
+            t_far = np.minimum(np.maximum(t1, t2).min(axis=1), max_distance)
+            inside = (t_near <= t_far) & ~hit[ray]
+            ray = ray[inside]
+            node = node[inside]
+
+            # Triangle test for the leaf nodes
+            leaf = self.node_left[node] < 0
+            leaf_ray = ray[leaf]
+            leaf_node = node[leaf]
+            count = self.node_count[leaf_node]
+            pair_ray = np.repeat(leaf_ray, count)
+            offset = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+            pair_triangle = np.repeat(self.node_start[leaf_node], count) + offset
+            pair_hit = calculate_triangle_intersection(
+                origins[pair_ray], directions[pair_ray], self.triangles[pair_triangle], max_distance
+            )
+            hit[pair_ray[pair_hit]] = True
+
+            # Continue to the children of the internal nodes
+            inner_ray = ray[~leaf]
+            inner_node = node[~leaf]
+            ray = np.concatenate([inner_ray, inner_ray])
+            node = np.concatenate([self.node_left[inner_node], self.node_right[inner_node]])
+            remaining = ~hit[ray]
+            ray = ray[remaining]
+            node = node[remaining]
+
+        return hit
+
+    @property
+    def polygons(self):
+        return self._polygons
+
+    @polygons.setter
+    def polygons(self, value):
+        self._polygons = value
+        self.update_calculated_values()
+
+
+def calculate_triangle_intersection(origins, directions, triangles, max_distance=np.inf, epsilon=1e-9):
+    """
+    Test whether rays hit triangles, pairwise.
+
+    Parameters
+    ----------
+    origins : array
+        Ray origins (ray, xyz) [m].
+    directions : array
+        Ray directions (ray, xyz).
+    triangles : array
+        Triangle vertices (ray, vertex, xyz) [m].
+    max_distance : float
+        Maximum distance along the ray, in multiples of the direction.
+    epsilon : float
+        Tolerance for parallel rays and hits at the ray origin.
+
+    Returns
+    -------
+    hit : array of bool
+
+    References
+    --------
+    Moller, T. and Trumbore, B. (1997). Fast, minimum storage ray-triangle
+    intersection. Journal of Graphics Tools.
+    """
+    edge1 = triangles[:, 1] - triangles[:, 0]
+    edge2 = triangles[:, 2] - triangles[:, 0]
+    p = np.cross(directions, edge2)
+    determinant = np.einsum('ij,ij->i', edge1, p)
+    parallel = np.abs(determinant) < epsilon
+    inverse_determinant = 1/np.where(parallel, 1.0, determinant)
+    s = origins - triangles[:, 0]
+    u = np.einsum('ij,ij->i', s, p)*inverse_determinant
+    q = np.cross(s, edge1)
+    v = np.einsum('ij,ij->i', directions, q)*inverse_determinant
+    t = np.einsum('ij,ij->i', edge2, q)*inverse_determinant
+    return ~parallel & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > epsilon) & (t <= max_distance)
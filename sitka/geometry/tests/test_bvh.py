@@ -0,0 +1,36 @@
+import pytest
+import numpy as np
+
+from sitka.geometry.bvh import BoundingVolumeHierarchy, calculate_triangle_intersection
+
+
+def test_ray_hits_square():
+    square = np.array([[0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]], dtype=float)
+    bvh = BoundingVolumeHierarchy([square])
+    origins = np.array([[0.5, 0.5, 0.0], [1.5, 0.5, 0.0], [0.5, 0.5, 2.0]])
+    hit = bvh.intersects(origins, np.array([0.0, 0.0, 1.0]))
+
+    assert len(bvh.triangles) == 2
+    assert hit.tolist() == [True, False, False]
+
+
+def test_intersects_matches_brute_force():
+    rng = np.random.default_rng(0)
+    centres = rng.uniform(0, 50, (500, 3))
+    polygons = [centre + rng.uniform(-1, 1, (3, 3)) for centre in centres]
+    bvh = BoundingVolumeHierarchy(polygons, leaf_size=4)
+    origins = rng.uniform(0, 50, (300, 3))
+    directions = rng.normal(size=(300, 3))
+    hit = bvh.intersects(origins, directions)
+
+    triangles = np.array(polygons)
+    expected = np.array([
+        calculate_triangle_intersection(
+            np.repeat(origin[None], len(triangles), axis=0), np.repeat(direction[None], len(triangles), axis=0), triangles
+        ).any()
+        for origin, direction in zip(origins, directions)
+    ])
+
+    assert (bvh.node_left >= 0).any()
+    assert hit.any() and not hit.all()
+    assert (hit == expected).all()
@@ -0,0 +1,141 @@
+"""Disk backed state history and checkpoints for long simulations.
+"""
+import os
+import numpy as np
+
+
+def open_history_array(path, shape, fill_value=None, dtype=float, resume=False):
+    """
+    Open a memory mapped .npy array for the state history of a component.
+
+    Only the pages being written are held in memory, the rest of the history
+    is on disk and is read back on access.
+
+    Parameters
+    ----------
+    path : string
+        Path of the .npy file.
+    shape : tuple of int
+    fill_value : float
+        Initial value of a new array.
+    dtype : data-type
+    resume : bool
+        Open the existing array, for a restart from a checkpoint, instead of
+        creating a new one.
+
+    Returns
+    -------
+    history_array : memmap
+    """
+    if resume:
+        history_array = np.lib.format.open_memmap(path, mode='r+')
+        if history_array.shape != tuple(shape) or history_array.dtype != np.dtype(dtype):
+            raise ValueError('History array %s has shape %s and type %s, expected %s and %s' % (
+                path, history_array.shape, history_array.dtype, tuple(shape), np.dtype(dtype)))
+        return history_array
+
+    history_array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=tuple(shape))
+    if fill_value is not None:
+        history_array[:] = fill_value
+    return history_array
+
+
+class Checkpoint:
+    """
+    Periodic checkpoints of the state of simulation components.
+
+    Components provide get_state(time_index), returning a dict of arrays
+    needed to continue after the time step, and set_state(time_index, state).
+    Components with a flush method, such as solvers with a memory mapped
+    history, are flushed before the state is written. Each checkpoint
+    replaces the previous file in one rename, so a crash while saving leaves
+    the last complete checkpoint.
+
+    Parameters
+    ----------
+    path : string
+        Path of the .npz checkpoint file.
+    components : dict
+        Components by name.
+    interval : int
+        Number of time steps between checkpoints.
+
+    Attributes
+    ----------
+    path : string
+    components : dict
+    interval : int
+    time_index : int
+        Time step of the last saved or loaded checkpoint.
+    """
+    def __init__(self, path, components, interval=None):
+        self.path = path
+        self.components = components
+        self.interval = interval
+        self.time_index = None
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def update(self, time_index):
+        """
+        Save a checkpoint if the time step completes an interval.
+
+        Parameters
+        ----------
+        time_index : int
+            Last solved time step.
+
+        Returns
+        -------
+        saved : bool
+        """
+        if self.interval and (time_index + 1) % self.interval == 0:
+            self.save(time_index)
+            return True
+        return False
+
+    def save(self, time_index):
+        """
+        Save the state of the components after a time step.
+
+        Parameters
+        ----------
+        time_index : int
+            Last solved time step.
+        """
+        arrays = {'time_index': np.array(time_index)}
+        for name, component in self.components.items():
+            if hasattr(component, 'flush'):
+                component.flush()
+            for key, value in component.get_state(time_index).items():
+                arrays['%s.%s' % (name, key)] = np.asarray(value)
+
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temporary_path, self.path)
+        self.time_index = time_index
+
+    def load(self):
+        """
+        Restore the state of the components from the checkpoint.
+
+        Returns
+        -------
+        time_index : int
+            Last solved time step of the checkpoint, the simulation continues
+            from the next time step.
+        """
+        with np.load(self.path) as data:
+            time_index = int(data['time_index'])
+            states = {name: {} for name in self.components}
+            for key in data.files:
+                name, _, state_key = key.rpartition('.')
+                if name in states:
+                    states[name][state_key] = data[key]
+        for name, component in self.components.items():
+            component.set_state(time_index, states[name])
+        self.time_index = time_index
+        return time_index
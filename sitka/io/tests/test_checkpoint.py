@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+
+from sitka.io.time import Time
+from sitka.io.checkpoint import Checkpoint, open_history_array
+from sitka.calculations.conduction import FiniteDifferenceMethod1D, BatchFiniteDifferenceMethod1D
+
+
+def test_open_history_array(tmp_path):
+    path = str(tmp_path / 'history.npy')
+    history_array = open_history_array(path, (10, 3), 21.0)
+    history_array[4] = 5.0
+    history_array.flush()
+    del history_array
+
+    history_array = open_history_array(path, (10, 3), resume=True)
+    assert isinstance(history_array, np.memmap)
+    assert (history_array[4] == 5.0).all()
+    assert (history_array[5] == 21.0).all()
+    with pytest.raises(ValueError):
+        open_history_array(path, (10, 4), resume=True)
+
+
+def test_finite_difference_restart_from_checkpoint(tmp_path, build_wall):
+    time = Time(time_steps_per_hour=4)
+    surface, zone_air = build_wall(time)
+    reference = FiniteDifferenceMethod1D(time, surface, zone_air, scheme='implicit')
+    for time_index in range(300):
+        reference.run_solver(0, time_index)
+
+    # Run with checkpoints and stop between two checkpoints
+    history_path = str(tmp_path / 'history.npy')
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air, scheme='implicit', history_path=history_path)
+    batch = BatchFiniteDifferenceMethod1D(time, [surface, surface], zone_air, scheme='implicit', history_path=str(tmp_path / 'batch.npy'))
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.npz'), {'wall': fdm, 'batch': batch}, interval=100)
+    for time_index in range(250):
+        fdm.run_solver(0, time_index)
+        batch.run_solver(0, time_index)
+        checkpoint.update(time_index)
+    del fdm, batch, checkpoint
+
+    # Restart from the last checkpoint
+    fdm = FiniteDifferenceMethod1D(time, surface, zone_air, scheme='implicit', history_path=history_path, resume=True)
+    batch = BatchFiniteDifferenceMethod1D(time, [surface, surface], zone_air, scheme='implicit', history_path=str(tmp_path / 'batch.npy'), resume=True)
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.npz'), {'wall': fdm, 'batch': batch}, interval=100)
+    assert checkpoint.exists
+    start = checkpoint.load() + 1
+    assert start == 200
+    for time_index in range(start, 300):
+        fdm.run_solver(0, time_index)
+        batch.run_solver(0, time_index)
+
+    np.testing.assert_allclose(fdm.temperature_array[:300], reference.temperature_array[:300])
+    np.testing.assert_allclose(batch.temperature_array[:300, 1], reference.temperature_array[:300])
@@ -1,5 +1,33 @@
 """Super classes to attach time series attributes to base classes.
 """
+import numpy as np
+
+
+def expand_compressed_values(values, index, length, fill_value=0.0):
+    """
+    Scatter values computed on a subset of time steps back onto the full
+    time series.
+
+    Parameters
+    ----------
+    values : array
+        Values for the time steps in index. Time is the last axis.
+    index : array of int
+        Positions of the computed time steps in the full time series.
+    length : int
+        Length of the full time series.
+    fill_value : float
+        Value used for the time steps that are not in index.
+
+    Returns
+    -------
+    expanded_values : array
+    """
+    values = np.asarray(values, dtype=float)
+    expanded_values = np.full(values.shape[:-1] + (length,), fill_value, dtype=float)
+    expanded_values[..., index] = values
+    return expanded_values
+
 class TimeSeriesComponent:
     """
     Component to attach the date-time object to a Pandas series attribute.
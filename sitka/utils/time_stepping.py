@@ -0,0 +1,142 @@
+"""Adaptive time stepping for transient solvers.
+"""
+import numpy as np
+
+
+class StepDoublingController:
+    """
+    Adaptive time step controller using step doubling error estimates.
+
+    The time steps are the maximum time step divided by powers of two, so a
+    solver only needs operators for a few time steps and can cache them.
+    Each step is taken once with the full time step and twice with half the
+    time step. The difference estimates the local error: the step is
+    repeated with half the time step when it is larger than the tolerance,
+    and the time step is doubled when the error of the doubled step is
+    expected to be within the tolerance and the time is aligned with it.
+
+    Parameters
+    ----------
+    maximum_time_step : float
+        Largest time step [s].
+    levels : int
+        Number of times the maximum time step can be halved.
+    tolerance : float
+        Largest accepted local error estimate, in the units of the state.
+    order : int
+        Order of accuracy of the solver, used to predict the error of a
+        doubled time step.
+
+    Attributes
+    ----------
+    time_steps : array
+        Available time steps from the largest to the smallest [s].
+    level : int
+        Position of the current time step in time_steps.
+    number_of_steps : int
+        Number of accepted steps.
+    number_of_rejected_steps : int
+        Number of steps repeated with a smaller time step.
+    number_of_inaccurate_steps : int
+        Number of steps accepted at the smallest time step with an error
+        estimate larger than the tolerance.
+    """
+    def __init__(self, maximum_time_step, levels=4, tolerance=0.05, order=1):
+        self.maximum_time_step = maximum_time_step
+        self.levels = levels
+        self.tolerance = tolerance
+        self.order = order
+        self.time_steps = maximum_time_step/2.0**np.arange(levels + 1)
+        self.level = levels
+        self.number_of_steps = 0
+        self.number_of_rejected_steps = 0
+        self.number_of_inaccurate_steps = 0
+
+    def integrate(self, step, state, start, stop):
+        """
+        Advance a state from the start to the stop time.
+
+        Parameters
+        ----------
+        step : callable
+            step(state, time, time_step) returning the state after the time
+            step.
+        state : array
+            State at the start time.
+        start : float
+            Start time [s].
+        stop : float
+            Stop time [s].
+
+        Returns
+        -------
+        times : array
+            Times of the accepted steps, including the start time [s].
+        states : array
+            States at the times (time, ...).
+        """
+        state = np.asarray(state, dtype=float)
+        times = [start]
+        states = [state]
+        time = start
+        full = None
+        while time < stop - 1e-9*self.maximum_time_step:
+            time_step = min(self.time_steps[self.level], stop - time)
+
+            # One full step and two half steps, the full step is the first
+            # half of the previous attempt after a rejection when the time
+            # steps match
+            if full is None:
+                full = step(state, time, time_step)
+            first_half = step(state, time, time_step/2)
+            half = step(first_half, time + time_step/2, time_step/2)
+            error = np.max(np.abs(half - full))
+
+            if error > self.tolerance:
+                if self.level < self.levels:
+                    self.level += 1
+                    self.number_of_rejected_steps += 1
+                    full = first_half if time_step/2 == min(self.time_steps[self.level], stop - time) else None
+                    continue
+                self.number_of_inaccurate_steps += 1
+
+            time += time_step
+            state = half
+            full = None
+            times.append(time)
+            states.append(state)
+            self.number_of_steps += 1
+
+            # Double the time step when the predicted error is small enough
+            # and the time is on the grid of the doubled step
+            if self.level > 0 and error*2.0**(self.order + 1) < self.tolerance:
+                doubled_time_step = self.time_steps[self.level - 1]
+                if np.isclose((time - start)/doubled_time_step, np.round((time - start)/doubled_time_step)):
+                    self.level -= 1
+
+        return np.array(times), np.array(states)
+
+
+def interpolate_states(times, states, report_times):
+    """
+    Linearly interpolate states onto reporting times.
+
+    Parameters
+    ----------
+    times : array
+        Increasing times of the states [s].
+    states : array
+        States (time, ...).
+    report_times : array
+        Reporting times [s].
+
+    Returns
+    -------
+    report_states : array
+        States at the reporting times (report time, ...).
+    """
+    report_times = np.asarray(report_times, dtype=float)
+    index = np.clip(np.searchsorted(times, report_times, side='right') - 1, 0, len(times) - 2)
+    weight = (report_times - times[index])/(times[index + 1] - times[index])
+    weight = np.clip(weight, 0.0, 1.0).reshape((-1,) + (1,)*(states.ndim - 1))
+    return (1 - weight)*states[index] + weight*states[index + 1]